@@ -31,7 +31,13 @@ import logging
 from logging.handlers import RotatingFileHandler
 from pathlib import Path
 from src.ui import RemoteControlUI
-from src.ssh import SSHConnection
+from src.ssh import SSHConnection, STATE_CONNECTED, STATE_DISCONNECTED, STATE_FAILED
+from src.agent import RemoteAgent
+from src.forwarding import PortForwarder
+from src.metrics import default_latency_stats
+from src.watchdog import EventLoopWatchdog, SamplingProfiler
+from src.remote_fs import RemoteFileSystem
+from src.profiles import ProfileStore, ConnectionPrewarmer
 
 
 def setup_logging():
@@ -105,7 +111,20 @@ class Application:
         root: Tkinter主窗口实例
         ssh: SSH连接管理器实例
         ui: 用户界面实例
+        forwarder: 端口转发管理器实例
+        watchdog: 界面卡顿看门狗实例
+        profiler: 界面性能分析器实例
+        remote_fs: 远程文件系统实例
+        profile_store: 连接配置存储实例
+        prewarmer: 连接预热器实例
     """
+
+    TUNNEL_REFRESH_INTERVAL = 1000  # 端口转发统计刷新间隔（毫秒）
+    STATS_EXPORT_INTERVAL = 15000  # 延迟统计导出间隔（毫秒）
+    STATS_EXPORT_PATH = Path('logs') / 'ssh_latency.prom'  # Prometheus文本文件路径
+    STALL_THRESHOLD = 0.5  # 判定为界面卡顿的事件循环延迟（秒）
+    PROFILE_DURATION = 30  # 性能分析时长（秒）
+    PROFILE_DIR = Path('logs') / 'profiles'  # 性能分析报告目录
     
     def __init__(self):
         """初始化应用程序实例
@@ -116,18 +135,48 @@ class Application:
         self.root = None  # Tkinter主窗口
         self.ssh = None   # SSH连接管理器
         self.ui = None    # 用户界面组件
+        self.forwarder = None  # 端口转发管理器，首次添加转发时创建
+        self.watchdog = None  # 界面卡顿看门狗
+        self.profiler = None  # 界面性能分析器
+        self.remote_fs = None  # 远程文件浏览，首次浏览时打开SFTP会话
+        self.profile_store = None  # 连接配置存储
+        self.prewarmer = None  # 连接预热器
+        self.agent = None  # 远程代理，连接信息中开启'remote_agent'时启动
+        self._agent_requested = False  # 本次连接是否开启了远程代理模式
     
     def initialize(self):
         """初始化应用程序组件"""
         try:
             self.root = tk.Tk()
             self.ssh = SSHConnection()
+            self.remote_fs = RemoteFileSystem(self.ssh)
+            self.profile_store = ProfileStore()
+            self.prewarmer = ConnectionPrewarmer(self.profile_store)
+            self.watchdog = EventLoopWatchdog(self.root, threshold=self.STALL_THRESHOLD)
+            self.profiler = SamplingProfiler()
+            track = self.watchdog.track
             self.ui = RemoteControlUI(
                 self.root,
-                on_connect=self._handle_connect,
-                on_disconnect=self._handle_disconnect,
-                on_send_command=self._handle_send_command
+                on_connect=track(self._handle_connect),
+                on_disconnect=track(self._handle_disconnect),
+                on_send_command=track(self._handle_send_command),
+                on_add_tunnel=track(self._handle_add_tunnel),
+                on_remove_tunnel=track(self._handle_remove_tunnel),
+                on_request_stats=default_latency_stats.get_stats,
+                on_export_stats=self._export_latency_stats,
+                on_toggle_profiler=self._handle_toggle_profiler,
+                on_list_dir=track(self._handle_list_dir),
+                on_select_profile=self.profile_store.get,
+                on_save_profile=track(self._handle_save_profile),
+                on_delete_profile=self._handle_delete_profile,
+                on_stat_path=track(self._handle_stat_path)
             )
+            self.ui.set_profiles(self.profile_store.list_profiles())
+            # 命令输出追加是已知的界面热点，卡顿报告中单独标出
+            self.ui.append_output = track(self.ui.append_output)
+            self.ssh.add_state_listener(self._handle_connection_state)
+            self.root.after(self.TUNNEL_REFRESH_INTERVAL, self._refresh_tunnels)
+            self.root.after(self.STATS_EXPORT_INTERVAL, self._periodic_stats_export)
             self.logger.info('应用程序初始化成功')
         except Exception as e:
             self.logger.error(f'应用程序初始化失败: {str(e)}')
@@ -135,9 +184,16 @@ class Application:
     
     def _handle_connect(self, connection_info):
         try:
-            self.ssh.connect(connection_info)
+            warm = self.prewarmer.take(connection_info)
+            if warm is not None:
+                self.ssh.adopt(warm)
+            else:
+                self.ssh.connect(connection_info)
             self.ui.append_output(f'成功连接到 {connection_info["ip"]}\n')
             self.logger.info(f'成功连接到远程主机: {connection_info["ip"]}')
+            self._agent_requested = bool(connection_info.get('remote_agent'))
+            if self._agent_requested:
+                self._start_agent()
             return True
         except Exception as e:
             error_msg = str(e)
@@ -145,14 +201,158 @@ class Application:
             self.logger.error(f'连接失败: {error_msg}')
             return False
     
+    def _handle_save_profile(self, name, connection_info, prewarm):
+        try:
+            if not self.profile_store.save(name, connection_info, prewarm):
+                self.ui.show_error('保存配置', '未安装keyring或没有可用的密钥环，密码未保存')
+            self.ui.set_profiles(self.profile_store.list_profiles())
+        except Exception as e:
+            self.ui.show_error('保存配置错误', str(e))
+            self.logger.error(f'保存连接配置失败: {str(e)}')
+
+    def _handle_delete_profile(self, name):
+        self.profile_store.delete(name)
+        self.ui.set_profiles(self.profile_store.list_profiles())
+
+    def _start_agent(self):
+        # 远程代理是可选模式，启动失败时回退为每次操作启动shell和SFTP会话
+        agent = RemoteAgent(self.ssh)
+        try:
+            agent.start()
+        except Exception as e:
+            self.logger.warning(f'远程代理启动失败，使用普通模式: {str(e)}')
+            self.root.after(0, self.ui.append_output, f'远程代理启动失败，使用普通模式: {str(e)}\n')
+            return
+        self.agent = agent
+        self.remote_fs.agent = agent
+
+    def _stop_agent(self):
+        agent, self.agent = self.agent, None
+        self.remote_fs.agent = None
+        if agent is not None:
+            agent.close()
+
     def _handle_disconnect(self):
         try:
+            self._agent_requested = False
+            self._stop_agent()
+            self._stop_forwarding()
+            self.remote_fs.close()
             self.ssh.disconnect()
             self.ui.append_output('已断开连接\n')
             self.logger.info('已断开与远程主机的连接')
         except Exception as e:
             self.logger.error(f'断开连接时发生错误: {str(e)}')
     
+    def _handle_add_tunnel(self, spec):
+        try:
+            if not self.ssh.is_connected:
+                self.ui.show_error('错误', '请先建立连接')
+                return
+            if self.forwarder is None:
+                self.forwarder = PortForwarder(self.ssh)
+            if spec['kind'] == 'remote':
+                tunnel = self.forwarder.add_remote_forward(
+                    spec['bind_port'], spec['target_host'], spec['target_port'])
+            else:
+                tunnel = self.forwarder.add_local_forward(
+                    spec['bind_port'], spec['target_host'], spec['target_port'])
+            self.ui.update_tunnels(self.forwarder.get_stats())
+            self.logger.info(f'已添加端口转发: {tunnel.stats()}')
+        except Exception as e:
+            error_msg = str(e)
+            self.ui.show_error('端口转发错误', error_msg)
+            self.logger.error(f'添加端口转发失败: {error_msg}')
+
+    def _handle_remove_tunnel(self, tunnel_id):
+        if self.forwarder is not None:
+            self.forwarder.remove_tunnel(tunnel_id)
+            self.ui.update_tunnels(self.forwarder.get_stats())
+
+    def _stop_forwarding(self):
+        if self.forwarder is not None:
+            self.forwarder.stop()
+            self.forwarder = None
+            self.ui.update_tunnels([])
+
+    def _refresh_tunnels(self):
+        # 定时刷新端口转发的字节计数
+        if self.forwarder is not None:
+            self.ui.update_tunnels(self.forwarder.get_stats())
+        self.root.after(self.TUNNEL_REFRESH_INTERVAL, self._refresh_tunnels)
+
+    def _export_latency_stats(self):
+        try:
+            default_latency_stats.write_prometheus(str(self.STATS_EXPORT_PATH))
+            return str(self.STATS_EXPORT_PATH)
+        except OSError as e:
+            self.logger.error(f'导出延迟统计失败: {str(e)}')
+            return None
+
+    def _periodic_stats_export(self):
+        # 定期导出延迟统计，供node_exporter的textfile收集器读取
+        self._export_latency_stats()
+        self.root.after(self.STATS_EXPORT_INTERVAL, self._periodic_stats_export)
+
+    def _handle_list_dir(self, path, refresh, done):
+        # 在后台线程中列出目录，完成后切换回Tk主线程刷新文件浏览列表
+        future = self.remote_fs.list_dir_async(path, refresh)
+
+        def finished(future):
+            error = future.exception()
+            if error is not None:
+                self.logger.error(f'列出远程目录失败: {str(error)}')
+                self.root.after(0, done, path, None, str(error))
+            else:
+                self.root.after(0, done, path, future.result(), None)
+
+        future.add_done_callback(finished)
+
+    def _handle_stat_path(self, path, done):
+        # 在后台线程中跟随符号链接获取属性，完成后切换回Tk主线程
+        future = self.remote_fs.stat_async(path, follow=True)
+
+        def finished(future):
+            error = future.exception()
+            if error is not None:
+                self.logger.error(f'获取远程文件属性失败: {str(error)}')
+                self.root.after(0, done, path, None, str(error))
+            else:
+                self.root.after(0, done, path, future.result(), None)
+
+        future.add_done_callback(finished)
+
+    def _handle_toggle_profiler(self, start):
+        if not start:
+            self.profiler.stop()
+            return
+        try:
+            self.profiler.start(self.PROFILE_DURATION, on_finish=self._handle_profile_finished)
+            self.ui.set_profiling(True)
+            self.ui.append_output(f'性能分析已开始，{self.PROFILE_DURATION} 秒后自动结束\n')
+        except Exception as e:
+            self.ui.show_error('性能分析错误', str(e))
+
+    def _handle_profile_finished(self, profiler):
+        # 由分析器线程调用，保存报告后切换回Tk主线程更新界面
+        path = profiler.save(str(self.PROFILE_DIR))
+        self.root.after(0, self.ui.set_profiling, False)
+        self.root.after(0, self.ui.append_output,
+                        f'性能分析报告已保存到 {path}（{profiler.sample_count} 个样本）\n')
+
+    def _handle_connection_state(self, state):
+        # 由SSH监控线程调用，界面更新需切换回Tk主线程
+        self.logger.info(f'SSH连接状态变化: {state}')
+        self.root.after(0, self.ui.set_connection_state, state)
+        if state == STATE_DISCONNECTED:
+            self.root.after(0, self.ui.append_output, '连接已中断，正在尝试重连...\n')
+        elif state == STATE_FAILED:
+            self.root.after(0, self.ui.append_output, '重连失败，请手动重新连接\n')
+        elif state == STATE_CONNECTED and self._agent_requested:
+            # 远程代理随原连接退出，重连后在新连接上重新启动
+            self._stop_agent()
+            self._start_agent()
+
     def _handle_send_command(self, command):
         try:
             if not self.ssh.is_connected:
@@ -161,12 +361,17 @@ class Application:
                 return
             
             self.logger.info(f'执行命令: {command}')
-            output, error = self.ssh.execute_command(command)
+            if self.agent is not None and self.agent.is_running:
+                # 远程代理模式：由常驻进程执行，不为每条命令打开新的会话
+                output, error, _ = self.agent.run(command)
+            else:
+                output, error = self.ssh.execute_command(command)
             
             self.ui.append_output(f'\n$ {command}\n')
             if output:
                 self.ui.append_output(output)
-                self.logger.debug(f'命令输出: {output}')
+                if self.logger.isEnabledFor(logging.DEBUG):
+                    self.logger.debug(f'命令输出: {output}')
             if error:
                 self.ui.append_output(f'错误: {error}\n')
                 self.logger.error(f'命令执行错误: {error}')
@@ -180,12 +385,18 @@ class Application:
         """运行应用程序"""
         try:
             self.initialize()
+            self.prewarmer.prewarm_all()
+            self.watchdog.start()
             self.logger.info('应用程序启动')
             self.root.mainloop()
         except Exception as e:
             self.logger.critical(f'应用程序运行时发生严重错误: {str(e)}')
             raise
         finally:
+            if self.watchdog is not None:
+                self.watchdog.stop()
+            if self.prewarmer is not None:
+                self.prewarmer.close()
             self.logger.info('应用程序关闭')
 
 def run_application():
@@ -0,0 +1 @@
+"""LinuxRemoteController 性能基准测试"""
@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+端口转发基准测试
+
+在回环地址上经本地SSH服务器建立端口转发，测量：
+1. 单连接批量吞吐量（MB/s）
+2. 并发短连接的建立速率和往返延迟
+
+使用方法：
+    python -m benchmarks.bench_forwarding --size 64 --connections 200 --concurrency 50
+    python -m benchmarks.bench_forwarding --kind remote
+
+作者：Cursor Team
+版本：0.1.0
+"""
+
+import argparse
+import socket
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict
+
+from benchmarks.server import LocalSSHServer
+from src.forwarding import PortForwarder
+from src.ssh import SSHConnection
+
+
+class _TargetServer:
+    """转发目标：收到'SEND n\\n'时回送n字节，其他数据原样回显"""
+
+    def __init__(self):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.bind(('127.0.0.1', 0))
+        self.sock.listen(512)
+        self.port = self.sock.getsockname()[1]
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+
+    def _accept_loop(self) -> None:
+        while True:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                break
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    @staticmethod
+    def _serve(conn: socket.socket) -> None:
+        with conn:
+            data = conn.recv(65536)
+            if data.startswith(b'SEND '):
+                remaining = int(data.split()[1])
+                block = b'x' * 65536
+                while remaining > 0:
+                    conn.sendall(block[:remaining])
+                    remaining -= len(block)
+                return
+            while data:
+                conn.sendall(data)
+                data = conn.recv(65536)
+
+    def close(self) -> None:
+        self.sock.close()
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> None:
+    received = 0
+    while received < size:
+        chunk = sock.recv(min(262144, size - received))
+        if not chunk:
+            raise RuntimeError(f'连接提前关闭: {received}/{size}')
+        received += len(chunk)
+
+
+def measure_throughput(port: int, size: int) -> float:
+    """经转发端口下载size字节，返回MB/s"""
+    with socket.create_connection(('127.0.0.1', port)) as sock:
+        start = time.perf_counter()
+        sock.sendall(f'SEND {size}\n'.encode())
+        _recv_exactly(sock, size)
+        elapsed = time.perf_counter() - start
+    return size / elapsed / (1024 * 1024)
+
+
+def measure_connections(port: int, connections: int, concurrency: int) -> Dict:
+    """并发建立短连接并做一次16字节回显，返回连接速率和延迟分布"""
+    payload = b'ping-0123456789\n'
+
+    def one(_):
+        start = time.perf_counter()
+        with socket.create_connection(('127.0.0.1', port)) as sock:
+            sock.sendall(payload)
+            _recv_exactly(sock, len(payload))
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = sorted(executor.map(one, range(connections)))
+    elapsed = time.perf_counter() - start
+    return {
+        'connections_per_second': connections / elapsed,
+        'p50_ms': statistics.median(latencies) * 1000,
+        'p99_ms': latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description='端口转发基准测试')
+    parser.add_argument('--kind', choices=('local', 'remote'), default='local', help='转发类型')
+    parser.add_argument('--size', type=float, default=64, help='吞吐量测试下载大小（MB）')
+    parser.add_argument('--connections', type=int, default=200, help='并发测试的连接总数')
+    parser.add_argument('--concurrency', type=int, default=50, help='同时进行的连接数')
+    args = parser.parse_args(argv)
+
+    target = _TargetServer()
+    with LocalSSHServer() as server:
+        ssh = SSHConnection(keepalive_interval=0, auto_reconnect=False)
+        ssh.connect(server.connection_info())
+        forwarder = PortForwarder(ssh)
+        try:
+            if args.kind == 'local':
+                tunnel = forwarder.add_local_forward(0, '127.0.0.1', target.port)
+            else:
+                tunnel = forwarder.add_remote_forward(0, '127.0.0.1', target.port)
+            mb_per_second = measure_throughput(tunnel.bind_port, int(args.size * 1024 * 1024))
+            result = measure_connections(tunnel.bind_port, args.connections, args.concurrency)
+            stats = tunnel.stats()
+        finally:
+            forwarder.stop()
+            ssh.disconnect()
+            target.close()
+
+    print(f'{args.kind} 转发 {stats["bind"]} -> {stats["target"]}')
+    print(f'吞吐量: {mb_per_second:.2f} MB/s（{args.size:g} MB）')
+    print(f'并发连接: {result["connections_per_second"]:.1f} 个/秒，'
+          f'p50 {result["p50_ms"]:.2f} ms，p99 {result["p99_ms"]:.2f} ms'
+          f'（{args.connections} 个连接，并发 {args.concurrency}）')
+    print(f'转发统计: 发送 {stats["bytes_sent"]} 字节，接收 {stats["bytes_received"]} 字节，'
+          f'累计连接 {stats["total_connections"]}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+传输配置档吞吐量基准测试
+
+通过LatencyProxy模拟不同网络条件，对每个传输配置档测量批量输出的吞吐量（MB/s）。
+
+使用方法：
+    python -m benchmarks.bench_transport_profiles --size 32 --latency 40
+    python -m benchmarks.bench_transport_profiles --latency 100 --bandwidth 2
+
+作者：Cursor Team
+版本：0.1.0
+"""
+
+import argparse
+import time
+from typing import Dict, List, Optional
+
+from benchmarks.server import LatencyProxy, LocalSSHServer
+from src.ssh import SSHConnection, TRANSPORT_PROFILES
+
+# 类似日志的可压缩输出，避免全零数据让压缩结果失真
+_LOG_LINE = '2026-01-01T00:00:00 web-01 sshd[4242]: Accepted password for root from 10.0.0.1'
+
+
+def measure_profile(server: LocalSSHServer, profile: str, size: int,
+                    latency: float, bandwidth: Optional[float], rounds: int) -> Dict:
+    """测量单个传输配置档的吞吐量
+
+    Args:
+        server: 已启动的本地SSH服务器
+        profile: 传输配置档名称
+        size: 每轮输出的字节数
+        latency: 单向延迟（秒）
+        bandwidth: 单向带宽上限（字节/秒）
+        rounds: 测量轮数，取最好成绩
+
+    Returns:
+        Dict: 包含profile、connect_seconds、best_seconds和mb_per_second的结果
+    """
+    command = f"yes '{_LOG_LINE}' | head -c {size}"
+    with LatencyProxy(server.address, latency=latency, bandwidth=bandwidth) as proxy:
+        ssh = SSHConnection(keepalive_interval=0, auto_reconnect=False)
+        start = time.perf_counter()
+        ssh.connect(server.connection_info(port=proxy.port, profile=profile))
+        connect_seconds = time.perf_counter() - start
+        try:
+            timings = []
+            for _ in range(rounds):
+                start = time.perf_counter()
+                output, _ = ssh.execute_command(command)
+                timings.append(time.perf_counter() - start)
+                if len(output) < size:
+                    raise RuntimeError(f'输出不完整: {len(output)}/{size}')
+        finally:
+            ssh.disconnect()
+    best = min(timings)
+    return {
+        'profile': profile,
+        'connect_seconds': connect_seconds,
+        'best_seconds': best,
+        'mb_per_second': size / best / (1024 * 1024),
+    }
+
+
+def run(profiles: List[str], size: int, latency: float,
+        bandwidth: Optional[float], rounds: int) -> List[Dict]:
+    with LocalSSHServer() as server:
+        return [measure_profile(server, name, size, latency, bandwidth, rounds)
+                for name in profiles]
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description='传输配置档吞吐量基准测试')
+    parser.add_argument('--profiles', nargs='+', default=list(TRANSPORT_PROFILES),
+                        choices=list(TRANSPORT_PROFILES), help='要测试的传输配置档')
+    parser.add_argument('--size', type=float, default=16, help='每轮输出大小（MB）')
+    parser.add_argument('--latency', type=float, default=40, help='单向延迟（毫秒）')
+    parser.add_argument('--bandwidth', type=float, default=None, help='单向带宽上限（MB/s）')
+    parser.add_argument('--rounds', type=int, default=3, help='每个配置档的测量轮数')
+    args = parser.parse_args(argv)
+
+    bandwidth = args.bandwidth * 1024 * 1024 if args.bandwidth else None
+    results = run(args.profiles, int(args.size * 1024 * 1024),
+                  args.latency / 1000, bandwidth, args.rounds)
+
+    print(f'延迟 {args.latency:g} ms，带宽 {args.bandwidth or "不限"} MB/s，输出 {args.size:g} MB')
+    print(f'{"配置档":<16}{"连接耗时(s)":>12}{"最佳耗时(s)":>12}{"吞吐(MB/s)":>12}')
+    for result in results:
+        print(f'{result["profile"]:<16}{result["connect_seconds"]:>12.3f}'
+              f'{result["best_seconds"]:>12.3f}{result["mb_per_second"]:>12.2f}')
+
+
+if __name__ == '__main__':
+    main()
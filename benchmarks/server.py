@@ -0,0 +1,466 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+基准测试用本地SSH服务器
+
+这个模块提供在回环地址上运行的进程内SSH服务器及网络模拟代理，主要功能包括：
+1. 基于paramiko.ServerInterface的SSH服务端，用本机shell执行远程命令，
+   并支持direct-tcpip通道和tcpip-forward请求（用于跳板机和端口转发）
+   以及只读的sftp子系统（用于文件浏览）
+2. 在客户端与服务器之间注入固定延迟和带宽限制的TCP代理
+
+主要组件：
+- LocalSSHServer类：进程内SSH服务器
+- LatencyProxy类：模拟广域网延迟和带宽的TCP代理
+
+使用示例：
+    with LocalSSHServer() as server, LatencyProxy(server.address, latency=0.05) as proxy:
+        info = server.connection_info(port=proxy.port)
+        ssh = SSHConnection()
+        ssh.connect(info)
+
+依赖：
+- paramiko：SSH协议的Python实现
+
+作者：Cursor Team
+版本：0.1.0
+"""
+
+import heapq
+import logging
+import os
+import socket
+import subprocess
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import paramiko
+
+# 命令结束后等待客户端关闭会话通道的最长时间（秒）
+CLIENT_CLOSE_TIMEOUT = 10
+
+_host_key: Optional[paramiko.PKey] = None
+_host_key_lock = threading.Lock()
+
+
+def _get_host_key() -> paramiko.PKey:
+    """生成并缓存服务器主机密钥，同一进程内只生成一次"""
+    global _host_key
+    with _host_key_lock:
+        if _host_key is None:
+            _host_key = paramiko.RSAKey.generate(2048)
+        return _host_key
+
+
+class _ServerInterface(paramiko.ServerInterface):
+    """本地SSH服务器的认证与通道策略"""
+
+    def __init__(self, server: 'LocalSSHServer', transport: paramiko.Transport):
+        self.server = server
+        self.transport = transport
+        self.direct_tcpip: Dict[int, Tuple[str, int]] = {}
+        self.forwards: Dict[int, socket.socket] = {}
+
+    def get_allowed_auths(self, username):
+        return 'password,publickey'
+
+    def check_auth_password(self, username, password):
+        if username == self.server.username and password == self.server.password:
+            return paramiko.AUTH_SUCCESSFUL
+        return paramiko.AUTH_FAILED
+
+    def check_auth_publickey(self, username, key):
+        if username == self.server.username and key in self.server.authorized_keys:
+            return paramiko.AUTH_SUCCESSFUL
+        return paramiko.AUTH_FAILED
+
+    def check_channel_request(self, kind, chanid):
+        if kind == 'session':
+            return paramiko.OPEN_SUCCEEDED
+        return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+    def check_channel_direct_tcpip_request(self, chanid, origin, destination):
+        self.direct_tcpip[chanid] = destination
+        return paramiko.OPEN_SUCCEEDED
+
+    def check_port_forward_request(self, address, port):
+        listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            listener.bind((address or self.server.host, port))
+        except OSError:
+            listener.close()
+            return False
+        listener.listen(128)
+        port = listener.getsockname()[1]
+        self.forwards[port] = listener
+        threading.Thread(target=self._forward_loop, args=(listener, address, port),
+                         daemon=True).start()
+        return port
+
+    def cancel_port_forward_request(self, address, port):
+        listener = self.forwards.pop(port, None)
+        if listener is not None:
+            listener.close()
+
+    def _forward_loop(self, listener: socket.socket, address: str, port: int) -> None:
+        while True:
+            try:
+                sock, origin = listener.accept()
+            except OSError:
+                break
+            try:
+                channel = self.transport.open_forwarded_tcpip_channel(origin, (address, port))
+            except (paramiko.SSHException, EOFError, OSError):
+                sock.close()
+                continue
+            relay(channel, sock)
+
+    def check_channel_pty_request(self, channel, term, width, height,
+                                  pixelwidth, pixelheight, modes):
+        return True
+
+    def check_channel_exec_request(self, channel, command):
+        threading.Thread(
+            target=self.server._run_command,
+            args=(channel, command.decode('utf-8')),
+            daemon=True
+        ).start()
+        return True
+
+
+class _LocalSFTPServer(paramiko.SFTPServerInterface):
+    """把本机文件系统以只读方式提供给SFTP客户端"""
+
+    def list_folder(self, path):
+        try:
+            return [paramiko.SFTPAttributes.from_stat(os.lstat(os.path.join(path, name)), name)
+                    for name in os.listdir(path)]
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+
+    def stat(self, path):
+        try:
+            return paramiko.SFTPAttributes.from_stat(os.stat(path))
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+
+    def lstat(self, path):
+        try:
+            return paramiko.SFTPAttributes.from_stat(os.lstat(path))
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+
+    def canonicalize(self, path):
+        return os.path.realpath(path)
+
+    def open(self, path, flags, attr):
+        if flags & (os.O_WRONLY | os.O_RDWR):
+            return paramiko.SFTP_PERMISSION_DENIED
+        try:
+            handle = paramiko.SFTPHandle(flags)
+            handle.readfile = open(path, 'rb')
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+        handle.filename = path
+        return handle
+
+
+class LocalSSHServer:
+    """进程内SSH服务器
+
+    监听回环地址，接受固定用户名的密码或公钥认证，
+    exec请求交给本机shell执行并把输出转发回客户端。
+
+    属性：
+        host: 监听地址
+        port: 实际监听端口
+        username: 允许登录的用户名
+        password: 允许登录的密码
+        authorized_keys: 允许登录的公钥列表
+    """
+
+    def __init__(self, username: str = 'bench', password: str = 'bench',
+                 host: str = '127.0.0.1', port: int = 0,
+                 authorized_keys: Optional[List[paramiko.PKey]] = None):
+        """初始化本地SSH服务器
+
+        Args:
+            username: 允许登录的用户名
+            password: 允许登录的密码
+            host: 监听地址
+            port: 监听端口，0表示由系统分配
+            authorized_keys: 允许登录的公钥列表
+        """
+        self.logger = logging.getLogger('LinuxRemoteControl.Bench.Server')
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.authorized_keys = list(authorized_keys or [])
+        self._sock: Optional[socket.socket] = None
+        self._transports: List[paramiko.Transport] = []
+        self._running = threading.Event()
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self.host, self.port
+
+    def connection_info(self, port: Optional[int] = None, **extra) -> Dict[str, str]:
+        """生成可直接传给SSHConnection.connect的连接信息
+
+        Args:
+            port: 覆盖连接端口，经代理连接时使用代理端口
+            **extra: 额外的连接信息字段，例如profile
+        """
+        info = {
+            'ip': self.host,
+            'port': port or self.port,
+            'username': self.username,
+            'password': self.password,
+        }
+        info.update(extra)
+        return info
+
+    def start(self) -> 'LocalSSHServer':
+        _get_host_key()
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._sock.bind((self.host, self.port))
+        self._sock.listen(128)
+        self.port = self._sock.getsockname()[1]
+        self._running.set()
+        threading.Thread(target=self._accept_loop, name='LocalSSHServer', daemon=True).start()
+        self.logger.debug(f'本地SSH服务器已启动: {self.host}:{self.port}')
+        return self
+
+    def stop(self) -> None:
+        self._running.clear()
+        if self._sock:
+            self._sock.close()
+            self._sock = None
+        for transport in self._transports:
+            transport.close()
+        self._transports.clear()
+
+    def __enter__(self) -> 'LocalSSHServer':
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def _accept_loop(self) -> None:
+        while self._running.is_set():
+            try:
+                client_sock, _ = self._sock.accept()
+            except OSError:
+                break
+            threading.Thread(target=self._serve, args=(client_sock,), daemon=True).start()
+
+    def _serve(self, client_sock: socket.socket) -> None:
+        """完成单个客户端的服务端握手，然后处理其通道"""
+        client_sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        transport = paramiko.Transport(client_sock)
+        transport.add_server_key(_get_host_key())
+        transport.use_compression(True)
+        transport.set_subsystem_handler('sftp', paramiko.SFTPServer, _LocalSFTPServer)
+        self._transports.append(transport)
+        interface = _ServerInterface(self, transport)
+        try:
+            transport.start_server(server=interface)
+        except (paramiko.SSHException, EOFError, OSError) as e:
+            self.logger.debug(f'服务端握手失败: {str(e)}')
+            return
+        try:
+            self._channel_loop(transport, interface)
+        finally:
+            for listener in interface.forwards.values():
+                listener.close()
+
+    def _channel_loop(self, transport: paramiko.Transport, interface: _ServerInterface) -> None:
+        """接收客户端打开的通道，把direct-tcpip通道接到目标地址"""
+        # paramiko只以弱引用登记通道，会话通道在exec请求到达前必须由这里持有，
+        # 否则并发打开的会话可能被回收关闭
+        sessions: List[paramiko.Channel] = []
+        while transport.is_active():
+            channel = transport.accept(timeout=1)
+            sessions = [session for session in sessions if not session.closed]
+            if channel is None:
+                continue
+            destination = interface.direct_tcpip.pop(channel.get_id(), None)
+            if destination is None:
+                sessions.append(channel)
+                continue
+            try:
+                target = socket.create_connection(destination, timeout=10)
+            except OSError as e:
+                self.logger.debug(f'无法连接转发目标 {destination}: {str(e)}')
+                channel.close()
+                continue
+            target.settimeout(None)
+            relay(channel, target)
+
+    def _run_command(self, channel: paramiko.Channel, command: str) -> None:
+        try:
+            proc = subprocess.Popen(command, shell=True, stdin=subprocess.PIPE,
+                                    stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            threading.Thread(target=self._feed_stdin, args=(channel, proc), daemon=True).start()
+            stderr_thread = threading.Thread(
+                target=lambda: channel.sendall_stderr(proc.stderr.read()),
+                daemon=True
+            )
+            stderr_thread.start()
+            for chunk in iter(lambda: proc.stdout.read1(65536), b''):
+                channel.sendall(chunk)
+            stderr_thread.join()
+            channel.send_exit_status(proc.wait())
+            channel.shutdown_write()
+            # paramiko在check_channel_exec_request返回后才发送请求成功应答，
+            # 命令很快结束时立即关闭通道可能抢在应答之前，让客户端误判通道已关闭。
+            # 客户端收到EOF和退出状态后会关闭通道，等客户端先关闭，超时后再由这里关闭
+            channel.status_event.wait(CLIENT_CLOSE_TIMEOUT)
+        except (OSError, EOFError, paramiko.SSHException) as e:
+            self.logger.debug(f'命令执行中断: {str(e)}')
+        finally:
+            channel.close()
+
+    @staticmethod
+    def _feed_stdin(channel: paramiko.Channel, proc: subprocess.Popen) -> None:
+        try:
+            for data in iter(lambda: channel.recv(65536), b''):
+                proc.stdin.write(data)
+                proc.stdin.flush()
+        except (OSError, EOFError, paramiko.SSHException):
+            pass
+        finally:
+            try:
+                proc.stdin.close()
+            except OSError:
+                pass
+
+
+class LatencyProxy:
+    """模拟广域网链路的TCP代理
+
+    每个方向上的数据都会延迟latency秒后才转发，
+    并可按bandwidth（字节/秒）限制转发速率，用于模拟高延迟或低带宽网络。
+
+    属性：
+        port: 代理监听端口
+        latency: 单向延迟（秒）
+        bandwidth: 单向带宽上限（字节/秒），None表示不限速
+    """
+
+    def __init__(self, target: Tuple[str, int], latency: float = 0.05,
+                 bandwidth: Optional[float] = None, host: str = '127.0.0.1'):
+        self.target = target
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.host = host
+        self.port = 0
+        self._sock: Optional[socket.socket] = None
+        self._running = threading.Event()
+
+    def start(self) -> 'LatencyProxy':
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._sock.bind((self.host, 0))
+        self._sock.listen(128)
+        self.port = self._sock.getsockname()[1]
+        self._running.set()
+        threading.Thread(target=self._accept_loop, name='LatencyProxy', daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self._running.clear()
+        if self._sock:
+            self._sock.close()
+            self._sock = None
+
+    def __enter__(self) -> 'LatencyProxy':
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def _accept_loop(self) -> None:
+        while self._running.is_set():
+            try:
+                client, _ = self._sock.accept()
+            except OSError:
+                break
+            upstream = socket.create_connection(self.target)
+            for sock in (client, upstream):
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._pipe(client, upstream)
+            self._pipe(upstream, client)
+
+    def _pipe(self, src: socket.socket, dst: socket.socket) -> None:
+        """启动单方向转发：读线程打时间戳入队，写线程到期后再发送"""
+        pending: List[Tuple[float, int, bytes]] = []
+        cond = threading.Condition()
+        seq = [0]
+
+        def reader():
+            while True:
+                try:
+                    data = src.recv(65536)
+                except OSError:
+                    data = b''
+                with cond:
+                    seq[0] += 1
+                    heapq.heappush(pending, (time.monotonic() + self.latency, seq[0], data))
+                    cond.notify()
+                if not data:
+                    break
+
+        def writer():
+            while True:
+                with cond:
+                    while not pending:
+                        cond.wait()
+                    due, _, data = pending[0]
+                    delay = due - time.monotonic()
+                    if delay > 0:
+                        cond.wait(delay)
+                        continue
+                    heapq.heappop(pending)
+                if not data:
+                    try:
+                        dst.shutdown(socket.SHUT_WR)
+                    except OSError:
+                        pass
+                    break
+                try:
+                    dst.sendall(data)
+                except OSError:
+                    break
+                if self.bandwidth:
+                    time.sleep(len(data) / self.bandwidth)
+
+        threading.Thread(target=reader, daemon=True).start()
+        threading.Thread(target=writer, daemon=True).start()
+
+
+def relay(channel, sock: socket.socket) -> None:
+    """在通道和socket之间双向转发数据，每个方向一个线程"""
+    def forward(src, dst):
+        try:
+            while True:
+                data = src.recv(65536)
+                if not data:
+                    break
+                dst.sendall(data)
+        except (OSError, EOFError, paramiko.SSHException):
+            pass
+        finally:
+            for endpoint in (src, dst):
+                try:
+                    endpoint.close()
+                except OSError:
+                    pass
+
+    threading.Thread(target=forward, args=(channel, sock), daemon=True).start()
+    threading.Thread(target=forward, args=(sock, channel), daemon=True).start()
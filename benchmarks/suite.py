@@ -0,0 +1,389 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+性能基准测试套件
+
+在回环地址上启动进程内SSH服务器（paramiko.ServerInterface），测量：
+1. SSHConnection.connect 连接延迟
+2. execute_command 小输出往返时间
+3. execute_command 大输出吞吐量
+4. 多个并发会话的命令吞吐量
+5. 远程代理（RemoteAgent）的命令和文件属性请求往返时间
+6. 经SFTP列出大目录的速率和缓存命中的耗时
+7. AsyncSSHConnection在一个事件循环中并发执行大量命令的吞吐量
+8. RemoteControlUI.append_output 追加速率（需要图形显示环境）
+
+结果写入JSON文件，compare子命令对比两次结果并标出退化的指标。
+
+使用方法：
+    python -m benchmarks.suite run --output bench_results.json
+    python -m benchmarks.suite run --output new.json --baseline bench_results.json
+    python -m benchmarks.suite compare bench_results.json new.json --threshold 0.15
+
+作者：Cursor Team
+版本：0.1.0
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import os
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List
+
+import paramiko
+
+from benchmarks.server import LocalSSHServer
+from src.agent import RemoteAgent
+from src.async_ssh import AsyncSSHConnection
+from src.remote_fs import RemoteFileSystem
+from src.ssh import SSHConnection
+
+LOWER_IS_BETTER = 'lower'
+HIGHER_IS_BETTER = 'higher'
+
+
+def _metric(value: float, unit: str, better: str, samples: List[float] = None) -> Dict:
+    metric = {'value': value, 'unit': unit, 'better': better}
+    if samples:
+        ordered = sorted(samples)
+        metric['p50'] = statistics.median(ordered)
+        metric['p95'] = ordered[max(0, int(len(ordered) * 0.95) - 1)]
+        metric['samples'] = len(ordered)
+    return metric
+
+
+def _new_connection(server: LocalSSHServer) -> SSHConnection:
+    ssh = SSHConnection(keepalive_interval=0, auto_reconnect=False)
+    ssh.connect(server.connection_info())
+    return ssh
+
+
+def bench_connect(server: LocalSSHServer, quick: bool) -> Dict[str, Dict]:
+    """测量完整连接（TCP、握手、认证）的耗时"""
+    samples = []
+    for _ in range(5 if quick else 20):
+        start = time.perf_counter()
+        ssh = _new_connection(server)
+        samples.append((time.perf_counter() - start) * 1000)
+        ssh.disconnect()
+    return {'connect_latency_ms': _metric(statistics.median(samples), 'ms', LOWER_IS_BETTER, samples)}
+
+
+def bench_command_rtt(server: LocalSSHServer, quick: bool) -> Dict[str, Dict]:
+    """测量小输出命令的往返时间"""
+    ssh = _new_connection(server)
+    try:
+        samples = []
+        for _ in range(10 if quick else 50):
+            start = time.perf_counter()
+            ssh.execute_command('echo ok')
+            samples.append((time.perf_counter() - start) * 1000)
+    finally:
+        ssh.disconnect()
+    return {'command_rtt_ms': _metric(statistics.median(samples), 'ms', LOWER_IS_BETTER, samples)}
+
+
+def bench_large_output(server: LocalSSHServer, quick: bool) -> Dict[str, Dict]:
+    """测量大输出命令的吞吐量"""
+    size = (8 if quick else 64) * 1024 * 1024
+    ssh = _new_connection(server)
+    try:
+        samples = []
+        for _ in range(2 if quick else 3):
+            start = time.perf_counter()
+            output, _ = ssh.execute_command(f"yes 'benchmark output line' | head -c {size}")
+            elapsed = time.perf_counter() - start
+            if len(output) < size:
+                raise RuntimeError(f'输出不完整: {len(output)}/{size}')
+            samples.append(size / elapsed / (1024 * 1024))
+    finally:
+        ssh.disconnect()
+    return {'large_output_mb_per_s': _metric(max(samples), 'MB/s', HIGHER_IS_BETTER, samples)}
+
+
+def bench_concurrent_sessions(server: LocalSSHServer, quick: bool) -> Dict[str, Dict]:
+    """测量多个并发会话同时执行命令的总吞吐量"""
+    sessions = 8 if quick else 32
+    commands = 5 if quick else 20
+
+    def session(_):
+        ssh = _new_connection(server)
+        try:
+            for _ in range(commands):
+                ssh.execute_command('echo ok')
+        finally:
+            ssh.disconnect()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as executor:
+        list(executor.map(session, range(sessions)))
+    elapsed = time.perf_counter() - start
+    return {
+        'concurrent_sessions_commands_per_s': _metric(
+            sessions * commands / elapsed, 'ops/s', HIGHER_IS_BETTER),
+    }
+
+
+def bench_agent(server: LocalSSHServer, quick: bool) -> Dict[str, Dict]:
+    """测量经远程代理执行命令和获取文件属性的往返时间"""
+    ssh = _new_connection(server)
+    try:
+        with RemoteAgent(ssh) as agent:
+            results = {}
+            for name, operation in (('agent_command_rtt_ms', lambda: agent.run('echo ok')),
+                                    ('agent_stat_rtt_ms', lambda: agent.stat('/'))):
+                samples = []
+                for _ in range(20 if quick else 200):
+                    start = time.perf_counter()
+                    operation()
+                    samples.append((time.perf_counter() - start) * 1000)
+                results[name] = _metric(statistics.median(samples), 'ms', LOWER_IS_BETTER, samples)
+    finally:
+        ssh.disconnect()
+    return results
+
+
+def bench_list_dir(server: LocalSSHServer, quick: bool) -> Dict[str, Dict]:
+    """测量经SFTP列出大目录的速率，以及再次打开时命中缓存的耗时"""
+    count = 20000 if quick else 100000
+    ssh = _new_connection(server)
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            for index in range(count):
+                open(os.path.join(directory, f'file{index:06d}'), 'w').close()
+            fs = RemoteFileSystem(ssh, prefetch_limit=0)
+            try:
+                start = time.perf_counter()
+                entries = fs.list_dir(directory)
+                elapsed = time.perf_counter() - start
+                if len(entries) != count:
+                    raise RuntimeError(f'目录条目不完整: {len(entries)}/{count}')
+                start = time.perf_counter()
+                fs.list_dir(directory)
+                cached_ms = (time.perf_counter() - start) * 1000
+            finally:
+                fs.close()
+    finally:
+        ssh.disconnect()
+    return {
+        'list_dir_entries_per_s': _metric(count / elapsed, 'entries/s', HIGHER_IS_BETTER),
+        'list_dir_cached_ms': _metric(cached_ms, 'ms', LOWER_IS_BETTER),
+    }
+
+
+def bench_async_sessions(server: LocalSSHServer, quick: bool) -> Dict[str, Dict]:
+    """测量在一个事件循环中经多个连接并发执行命令的总吞吐量"""
+    connections = 8 if quick else 32
+    commands = 50 if quick else 200
+
+    async def run_all() -> float:
+        conns = [AsyncSSHConnection(keepalive_interval=0) for _ in range(connections)]
+        try:
+            await asyncio.gather(*(conn.connect(server.connection_info()) for conn in conns))
+            start = time.perf_counter()
+            await asyncio.gather(*(conn.execute_command('echo ok')
+                                   for conn in conns for _ in range(commands)))
+            return time.perf_counter() - start
+        finally:
+            await asyncio.gather(*(conn.disconnect() for conn in conns))
+
+    loop = asyncio.new_event_loop()
+    try:
+        elapsed = loop.run_until_complete(run_all())
+    finally:
+        loop.close()
+    return {
+        'async_commands_per_s': _metric(connections * commands / elapsed, 'ops/s', HIGHER_IS_BETTER),
+    }
+
+
+def bench_append_output(server: LocalSSHServer, quick: bool) -> Dict[str, Dict]:
+    """测量RemoteControlUI.append_output的追加速率，无图形显示环境时跳过"""
+    import tkinter as tk
+    from src.ui import RemoteControlUI
+
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        logging.getLogger('LinuxRemoteControl.Bench').warning(f'跳过append_output测试: {str(e)}')
+        return {}
+    try:
+        root.withdraw()
+        ui = RemoteControlUI(root, on_connect=lambda info: True,
+                             on_disconnect=lambda: None, on_send_command=lambda command: None)
+        line = 'Jan  1 00:00:00 web-01 sshd[4242]: Accepted password for root from 10.0.0.1\n'
+        chunk = line * 50
+        chunks = 200 if quick else 1000
+        start = time.perf_counter()
+        for _ in range(chunks):
+            ui.append_output(chunk)
+        root.update_idletasks()
+        elapsed = time.perf_counter() - start
+    finally:
+        root.destroy()
+    return {
+        'append_output_chunks_per_s': _metric(chunks / elapsed, 'chunks/s', HIGHER_IS_BETTER),
+        'append_output_mb_per_s': _metric(
+            chunks * len(chunk.encode('utf-8')) / elapsed / (1024 * 1024), 'MB/s', HIGHER_IS_BETTER),
+    }
+
+
+BENCHMARKS: List[Callable[[LocalSSHServer, bool], Dict[str, Dict]]] = [
+    bench_connect,
+    bench_command_rtt,
+    bench_large_output,
+    bench_concurrent_sessions,
+    bench_agent,
+    bench_list_dir,
+    bench_async_sessions,
+    bench_append_output,
+]
+
+
+def run(quick: bool = False, only: List[str] = None) -> Dict:
+    """运行基准测试并返回结果字典
+
+    Args:
+        quick: 使用较少的迭代次数快速运行
+        only: 只运行名称包含其中任一字符串的测试
+
+    Returns:
+        Dict: 包含meta和results两部分的结果
+    """
+    results: Dict[str, Dict] = {}
+    with LocalSSHServer() as server:
+        for bench in BENCHMARKS:
+            if only and not any(name in bench.__name__ for name in only):
+                continue
+            print(f'运行 {bench.__name__} ...', file=sys.stderr)
+            results.update(bench(server, quick))
+    return {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'paramiko': paramiko.__version__,
+            'platform': platform.platform(),
+            'quick': quick,
+            'only': list(only) if only else None,
+        },
+        'results': results,
+    }
+
+
+def compare(baseline: Dict, current: Dict, threshold: float) -> List[Dict]:
+    """对比两次结果，返回每个共同指标的变化
+
+    基线中有而当前结果中缺少的指标（例如某项测试开始出错或被删除）视为退化，
+    current为None、missing为True。当前结果只运行了部分测试（--only）时不检查缺少的指标。
+
+    Args:
+        baseline: 基线结果
+        current: 当前结果
+        threshold: 判定为退化的相对变化阈值，例如0.1表示变差10%
+
+    Returns:
+        List[Dict]: 每个指标的name、baseline、current、change、regressed和missing字段
+    """
+    rows = []
+    for name, metric in current['results'].items():
+        base = baseline['results'].get(name)
+        if base is None or not base['value']:
+            continue
+        change = (metric['value'] - base['value']) / base['value']
+        worse = -change if metric['better'] == HIGHER_IS_BETTER else change
+        rows.append({
+            'name': name,
+            'unit': metric['unit'],
+            'baseline': base['value'],
+            'current': metric['value'],
+            'change': change,
+            'regressed': worse > threshold,
+            'missing': False,
+        })
+    if current.get('meta', {}).get('only'):
+        return rows
+    for name, base in baseline['results'].items():
+        if name not in current['results']:
+            rows.append({
+                'name': name,
+                'unit': base['unit'],
+                'baseline': base['value'],
+                'current': None,
+                'change': None,
+                'regressed': True,
+                'missing': True,
+            })
+    return rows
+
+
+def _print_results(results: Dict) -> None:
+    for name, metric in results['results'].items():
+        print(f'{name:<40}{metric["value"]:>12.2f} {metric["unit"]}')
+
+
+def _print_comparison(rows: List[Dict]) -> None:
+    for row in rows:
+        if row['missing']:
+            print(f'{row["name"]:<40}{row["baseline"]:>12.2f}{"缺失":>10} {row["unit"]:<8}'
+                  f'{"":>9}  <-- 退化')
+            continue
+        flag = '  <-- 退化' if row['regressed'] else ''
+        print(f'{row["name"]:<40}{row["baseline"]:>12.2f}{row["current"]:>12.2f} {row["unit"]:<8}'
+              f'{row["change"] * 100:>+8.1f}%{flag}')
+
+
+def _load(path: str) -> Dict:
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='LinuxRemoteController 性能基准测试套件')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help='运行基准测试')
+    run_parser.add_argument('--output', default='bench_results.json', help='结果输出文件')
+    run_parser.add_argument('--baseline', help='运行后与该基线结果对比')
+    run_parser.add_argument('--threshold', type=float, default=0.1, help='退化判定阈值')
+    run_parser.add_argument('--quick', action='store_true', help='减少迭代次数快速运行')
+    run_parser.add_argument('--only', nargs='+', help='只运行名称包含这些字符串的测试')
+
+    compare_parser = subparsers.add_parser('compare', help='对比两次结果')
+    compare_parser.add_argument('baseline', help='基线结果文件')
+    compare_parser.add_argument('current', help='当前结果文件')
+    compare_parser.add_argument('--threshold', type=float, default=0.1, help='退化判定阈值')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        current = run(quick=args.quick, only=args.only)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(current, f, ensure_ascii=False, indent=2)
+        _print_results(current)
+        print(f'结果已写入 {args.output}')
+        if not args.baseline:
+            return 0
+        baseline = _load(args.baseline)
+    else:
+        baseline, current = _load(args.baseline), _load(args.current)
+
+    rows = compare(baseline, current, args.threshold)
+    _print_comparison(rows)
+    regressions = [row['name'] for row in rows if row['regressed']]
+    if regressions:
+        print(f'发现 {len(regressions)} 项性能退化（阈值 {args.threshold:.0%}）: {", ".join(regressions)}')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
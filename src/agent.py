@@ -0,0 +1,276 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+远程代理模块
+
+这个模块在已建立的SSH连接上启动一个常驻的远程辅助进程，用分帧的RPC协议
+执行常用操作，避免每次操作都通过exec_command启动shell并解析文本。主要功能包括：
+1. 经SSH通道的标准输入上传辅助脚本（src/agent_helper.py）并保持运行
+2. 在同一个通道上并发发送多个请求，按请求编号匹配响应
+3. 提供执行命令、获取文件属性、读取文件范围、列出目录和读取/proc的接口
+
+主要组件：
+- RemoteAgent类：远程代理客户端
+
+帧格式（大端序）：
+    4字节JSON头长度 + 4字节数据长度 + JSON头（UTF-8） + 数据
+
+使用示例：
+    agent = RemoteAgent(ssh)
+    agent.start()
+    output, error, exit_status = agent.run('uptime')
+    entries = agent.listdir('/var/log')
+    futures = [agent.submit('stat', path=path) for path in paths]
+    agent.close()
+
+远程主机需要安装python3。连接断开后代理随之退出，重连后需重新调用start。
+
+作者：Cursor Team
+版本：0.1.0
+"""
+
+import json
+import logging
+import os
+import struct
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Dict, List, Optional, Tuple
+
+from src.output import StreamDecoder
+
+FRAME_HEADER = struct.Struct('>II')
+HELPER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'agent_helper.py')
+
+# 远程引导命令：先读一行脚本长度，再读取并执行脚本，之后标准输入用于传输请求帧
+_BOOTSTRAP = 'import sys;exec(sys.stdin.buffer.read(int(sys.stdin.buffer.readline())))'
+
+
+def encode_frame(header: Dict, payload: bytes = b'') -> bytes:
+    """把JSON头和数据编码为一帧"""
+    body = json.dumps(header).encode('utf-8')
+    return FRAME_HEADER.pack(len(body), len(payload)) + body + payload
+
+
+class RemoteAgent:
+    """远程代理客户端
+
+    所有请求共用一个SSH通道，由后台读取线程按请求编号把响应分发给对应的Future，
+    因此可以在多个线程中同时调用，也可以用submit一次发出多个请求。
+
+    属性：
+        ssh: SSH连接管理器实例
+        python: 远程主机上的Python解释器
+        timeout: 请求默认超时时间（秒）
+        remote_pid: 远程代理进程号
+    """
+
+    def __init__(self, ssh, python: str = 'python3', timeout: float = 30):
+        """初始化远程代理客户端
+
+        Args:
+            ssh: 已连接的SSH连接管理器
+            python: 远程主机上的Python解释器
+            timeout: 请求默认超时时间（秒）
+        """
+        self.logger = logging.getLogger('LinuxRemoteControl.Agent')
+        self.ssh = ssh
+        self.python = python
+        self.timeout = timeout
+        self.remote_pid: Optional[int] = None
+
+        self._channel = None
+        self._reader_thread: Optional[threading.Thread] = None
+        self._buffer = bytearray()
+        self._pending: Dict[int, Future] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self._send_lock = threading.Lock()
+
+    @property
+    def is_running(self) -> bool:
+        return self._reader_thread is not None and self._reader_thread.is_alive()
+
+    def start(self) -> None:
+        """上传辅助脚本并启动远程代理
+
+        Raises:
+            Exception: 未连接或远程代理启动失败时抛出
+        """
+        if self.is_running:
+            return
+        if not self.ssh.is_connected:
+            raise Exception('未连接到服务器')
+        try:
+            with open(HELPER_PATH, 'rb') as f:
+                source = f.read()
+            channel = self.ssh.client.get_transport().open_session(timeout=self.timeout)
+            channel.exec_command(f'{self.python} -u -c "{_BOOTSTRAP}"')
+            channel.sendall(b'%d\n' % len(source) + source)
+        except Exception as e:
+            self.logger.error(f'启动远程代理失败: {str(e)}')
+            raise Exception(f'启动远程代理失败：{str(e)}')
+        self._attach(channel)
+        header, _ = self.call('ping')
+        self.remote_pid = header['pid']
+        self.logger.info(f'远程代理已启动，进程号 {self.remote_pid}')
+
+    def _attach(self, channel) -> None:
+        self._channel = channel
+        self._buffer = bytearray()
+        self._reader_thread = threading.Thread(target=self._reader_loop, args=(channel,),
+                                               name='RemoteAgentReader', daemon=True)
+        self._reader_thread.start()
+
+    def close(self) -> None:
+        """关闭远程代理，未完成的请求以异常结束"""
+        channel, self._channel = self._channel, None
+        if channel is not None:
+            channel.close()
+        if self._reader_thread is not None:
+            self._reader_thread.join(timeout=5)
+            self._reader_thread = None
+        self._fail_pending('远程代理已关闭')
+
+    def __enter__(self) -> 'RemoteAgent':
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def submit(self, op: str, payload: bytes = b'', **args) -> Future:
+        """发送请求并立即返回Future
+
+        Args:
+            op: 操作名称
+            payload: 请求数据
+            **args: 操作参数，写入JSON头
+
+        Returns:
+            Future: 结果为(响应头, 响应数据)，远程报错时为异常
+        """
+        with self._lock:
+            if self._channel is None or not self.is_running:
+                raise Exception('远程代理未启动')
+            self._next_id += 1
+            request_id = self._next_id
+            future = Future()
+            self._pending[request_id] = future
+            channel = self._channel
+        frame = encode_frame(dict(args, id=request_id, op=op), payload)
+        try:
+            with self._send_lock:
+                channel.sendall(frame)
+        except Exception as e:
+            with self._lock:
+                self._pending.pop(request_id, None)
+            raise Exception(f'发送请求失败：{str(e)}')
+        return future
+
+    def call(self, op: str, payload: bytes = b'', request_timeout: Optional[float] = None,
+             **args) -> Tuple[Dict, bytes]:
+        """发送请求并等待响应
+
+        Args:
+            op: 操作名称
+            payload: 请求数据
+            request_timeout: 等待响应的超时时间（秒），默认为self.timeout
+            **args: 操作参数
+
+        Returns:
+            Tuple[Dict, bytes]: 响应头和响应数据
+
+        Raises:
+            Exception: 远程报错、超时或代理断开时抛出
+        """
+        future = self.submit(op, payload, **args)
+        try:
+            return future.result(request_timeout if request_timeout is not None else self.timeout)
+        except FutureTimeoutError:
+            raise Exception(f'远程代理请求超时：{op}')
+
+    def run(self, command: str, timeout: Optional[float] = None,
+            stdin: bytes = b'', cwd: Optional[str] = None) -> Tuple[str, str, int]:
+        """在远程主机上执行命令，不分配伪终端
+
+        Args:
+            command: shell命令
+            timeout: 命令超时时间（秒），默认为self.timeout
+            stdin: 写入命令标准输入的数据
+            cwd: 工作目录
+
+        Returns:
+            Tuple[str, str, int]: 标准输出、标准错误和退出状态码，按连接的编码解码
+        """
+        timeout = timeout if timeout is not None else self.timeout
+        args = {'command': command, 'timeout': timeout}
+        if cwd:
+            args['cwd'] = cwd
+        header, data = self.call('run', stdin, request_timeout=timeout + 5, **args)
+        split = header['stdout_size']
+        view = memoryview(data)
+        encoding = self.ssh.encoding
+        return (StreamDecoder(encoding).decode(view[:split], final=True),
+                StreamDecoder(encoding).decode(view[split:], final=True),
+                header['exit_status'])
+
+    def stat(self, path: str, follow: bool = True) -> Dict:
+        """获取文件属性，包含mode、size、mtime、uid、gid、is_dir和is_link"""
+        header, _ = self.call('stat', path=path, follow=follow)
+        return {key: header[key] for key in ('mode', 'size', 'mtime', 'uid', 'gid', 'is_dir', 'is_link')}
+
+    def read(self, path: str, offset: int = 0, length: int = -1) -> bytes:
+        """读取文件从offset开始的length个字节，length为-1时读到文件末尾"""
+        _, data = self.call('read', path=path, offset=offset, length=length)
+        return data
+
+    def listdir(self, path: str) -> List[Dict]:
+        """列出目录，每个条目包含name和stat返回的属性"""
+        header, _ = self.call('listdir', path=path)
+        return header['entries']
+
+    def proc(self, *names: str) -> Dict[str, str]:
+        """读取/proc下的文件，例如proc('loadavg', 'meminfo')"""
+        header, _ = self.call('proc', names=list(names))
+        return header['files']
+
+    def _read_exactly(self, channel, size: int) -> bytes:
+        while len(self._buffer) < size:
+            chunk = channel.recv(65536)
+            if not chunk:
+                raise EOFError()
+            self._buffer += chunk
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+    def _reader_loop(self, channel) -> None:
+        try:
+            while True:
+                header_size, payload_size = FRAME_HEADER.unpack(
+                    self._read_exactly(channel, FRAME_HEADER.size))
+                header = json.loads(self._read_exactly(channel, header_size).decode('utf-8'))
+                payload = self._read_exactly(channel, payload_size)
+                with self._lock:
+                    future = self._pending.pop(header.get('id'), None)
+                if future is None:
+                    continue
+                if header.get('ok'):
+                    future.set_result((header, payload))
+                else:
+                    future.set_exception(Exception(f'远程代理错误：{header.get("error")}'))
+        except EOFError:
+            self.logger.info('远程代理已退出')
+        except Exception as e:
+            if self._channel is channel:
+                self.logger.error(f'读取远程代理响应失败: {str(e)}')
+        finally:
+            self._fail_pending('远程代理连接已断开')
+
+    def _fail_pending(self, message: str) -> None:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for future in pending.values():
+            future.set_exception(Exception(message))
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+远程代理辅助脚本
+
+由src/agent.py经SSH通道的标准输入上传到远程主机并常驻运行，只依赖Python 3.6+标准库。
+从标准输入读取请求帧，在线程池中并发处理，把响应帧写回标准输出。
+
+帧格式（大端序）：
+    4字节JSON头长度 + 4字节数据长度 + JSON头（UTF-8） + 数据
+
+请求头包含id和op字段，响应头包含相同的id以及ok字段，失败时带error字段。
+支持的操作：
+- ping：返回协议版本和进程号
+- run：执行shell命令，数据为标准输入，响应数据为标准输出后接标准错误
+- stat：获取文件属性
+- read：读取文件的指定范围，响应数据为文件内容
+- listdir：列出目录及每个条目的属性
+- proc：读取/proc下的文件
+
+作者：Cursor Team
+版本：0.1.0
+"""
+
+import json
+import os
+import re
+import signal
+import stat
+import struct
+import subprocess
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+VERSION = 1
+FRAME_HEADER = struct.Struct('>II')
+_PROC_NAME = re.compile(r'^[A-Za-z0-9_]+(/[A-Za-z0-9_]+)*$')
+
+
+def _read_exactly(stream, size):
+    data = stream.read(size)
+    if len(data) < size:
+        raise EOFError()
+    return data
+
+
+def _stat_dict(st):
+    return {
+        'mode': st.st_mode,
+        'size': st.st_size,
+        'mtime': st.st_mtime,
+        'uid': st.st_uid,
+        'gid': st.st_gid,
+        'is_dir': stat.S_ISDIR(st.st_mode),
+        'is_link': stat.S_ISLNK(st.st_mode),
+    }
+
+
+class AgentServer:
+    """读取请求帧并在线程池中处理的代理服务端"""
+
+    def __init__(self, stdin, stdout, workers=8):
+        self.stdin = stdin
+        self.stdout = stdout
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.lock = threading.Lock()
+
+    def serve(self):
+        try:
+            while True:
+                try:
+                    header_size, payload_size = FRAME_HEADER.unpack(
+                        _read_exactly(self.stdin, FRAME_HEADER.size))
+                except EOFError:
+                    break
+                header = json.loads(_read_exactly(self.stdin, header_size).decode('utf-8'))
+                payload = _read_exactly(self.stdin, payload_size)
+                self.executor.submit(self.handle, header, payload)
+        finally:
+            self.executor.shutdown(wait=True)
+
+    def handle(self, header, payload):
+        try:
+            handler = getattr(self, 'op_' + str(header.get('op')), None)
+            if handler is None:
+                raise ValueError('不支持的操作: %s' % header.get('op'))
+            result, data = handler(header, payload)
+            result.update(id=header.get('id'), ok=True)
+        except Exception as e:
+            result, data = {'id': header.get('id'), 'ok': False,
+                            'error': '%s: %s' % (type(e).__name__, e)}, b''
+        self.send(result, data)
+
+    def send(self, header, payload=b''):
+        body = json.dumps(header).encode('utf-8')
+        with self.lock:
+            self.stdout.write(FRAME_HEADER.pack(len(body), len(payload)))
+            self.stdout.write(body)
+            self.stdout.write(payload)
+            self.stdout.flush()
+
+    def op_ping(self, header, payload):
+        return {'version': VERSION, 'pid': os.getpid()}, b''
+
+    def op_run(self, header, payload):
+        proc = subprocess.Popen(
+            header['command'], shell=True, cwd=header.get('cwd'),
+            stdin=subprocess.PIPE if payload else subprocess.DEVNULL,
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, start_new_session=True)
+        try:
+            out, err = proc.communicate(payload or None, timeout=header.get('timeout'))
+        except subprocess.TimeoutExpired:
+            # 结束整个进程组，否则shell的子进程继续占用管道，communicate会一直等待
+            os.killpg(proc.pid, signal.SIGKILL)
+            proc.communicate()
+            raise
+        return {'exit_status': proc.returncode, 'stdout_size': len(out)}, out + err
+
+    def op_stat(self, header, payload):
+        path = header['path']
+        st = os.stat(path) if header.get('follow', True) else os.lstat(path)
+        return _stat_dict(st), b''
+
+    def op_read(self, header, payload):
+        length = header.get('length', -1)
+        with open(header['path'], 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            f.seek(header.get('offset', 0))
+            data = f.read(length if length is not None and length >= 0 else -1)
+        return {'size': size}, data
+
+    def op_listdir(self, header, payload):
+        entries = []
+        with os.scandir(header['path']) as it:
+            for entry in it:
+                try:
+                    info = _stat_dict(entry.stat(follow_symlinks=False))
+                    info['is_dir'] = entry.is_dir()
+                except OSError:
+                    continue
+                info['name'] = entry.name
+                entries.append(info)
+        return {'entries': entries}, b''
+
+    def op_proc(self, header, payload):
+        files = {}
+        for name in header['names']:
+            if not _PROC_NAME.match(name):
+                raise ValueError('非法的/proc路径: %s' % name)
+            with open('/proc/' + name, encoding='utf-8', errors='replace') as f:
+                files[name] = f.read()
+        return {'files': files}, b''
+
+
+if __name__ == '__main__':
+    AgentServer(sys.stdin.buffer, sys.stdout.buffer).serve()
@@ -0,0 +1,456 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+asyncio SSH连接模块
+
+这个模块为asyncio服务提供可等待的SSH接口，主要功能包括：
+1. 可等待的连接、断开、重连和命令执行，错误信息与SSHConnection一致
+2. 以异步迭代器逐块读取命令输出，按主机配置的编码增量解码，
+   读取慢时暂停接收，由SSH流控窗口约束内存
+3. 阻塞的连接建立和打开通道在共享的有界线程池中执行，
+   命令输出通过事件循环的add_reader读取，不占用线程
+
+主要组件：
+- AsyncSSHConnection类：asyncio SSH连接管理器
+- AsyncCommand类：正在执行的远程命令
+
+使用示例：
+    async def main():
+        async with AsyncSSHConnection() as conn:
+            await conn.connect({'ip': '192.168.1.100', 'username': 'root', 'password': '***'})
+            output, error = await conn.execute_command('uptime')
+            async for text in conn.stream_command('journalctl -f'):
+                print(text, end='')
+
+底层仍使用paramiko：每个连接由paramiko的传输层线程收发数据包，
+同一连接上的并发命令不再额外占用线程。每条命令的通道使用一对管道文件描述符，
+同时运行数千条命令时需要相应调高进程的文件描述符上限。
+
+作者：Cursor Team
+版本：0.1.0
+"""
+
+import asyncio
+import collections
+import logging
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Deque, Dict, Optional, Tuple
+
+import paramiko
+
+from src.output import OutputBuffer, OutputFilter, StreamDecoder
+from src.ssh import SSHConnection
+
+# 共享线程池的线程数，决定同时进行的连接握手和通道打开数量
+DEFAULT_MAX_WORKERS = 32
+# 单条命令未被读取的输出达到该字节数后暂停接收
+DEFAULT_MAX_BUFFERED = 1024 * 1024
+# 每个连接同时打开的会话数，与OpenSSH服务端MaxSessions的默认值一致
+DEFAULT_MAX_SESSIONS = 10
+
+_default_executor: Optional[ThreadPoolExecutor] = None
+_default_executor_lock = threading.Lock()
+
+
+def default_executor() -> ThreadPoolExecutor:
+    """返回进程内所有AsyncSSHConnection共享的线程池"""
+    global _default_executor
+    with _default_executor_lock:
+        if _default_executor is None:
+            _default_executor = ThreadPoolExecutor(max_workers=DEFAULT_MAX_WORKERS,
+                                                   thread_name_prefix='AsyncSSH')
+        return _default_executor
+
+
+class _LoopBoundConnection(SSHConnection):
+    """不启动后台监控线程的SSH连接
+
+    传输层保活仍然开启，连接存活由调用方在执行命令时按需检查，
+    大量连接不会各自多占用一个监控线程。
+    """
+
+    def _start_monitor(self) -> None:
+        return
+
+
+class AsyncCommand:
+    """正在执行的远程命令
+
+    用async for逐块读取解码后的标准输出，结束后调用wait获取退出状态码；
+    不需要文本时用read_chunk或read_bytes读取原始字节。
+    未分配伪终端时标准错误单独收集，命令结束后从stderr属性读取。
+
+    属性：
+        command: 命令
+        exit_status: 退出状态码，命令结束前为None
+        timings: 命令执行各阶段的耗时（秒）
+    """
+
+    def __init__(self, connection: 'AsyncSSHConnection', channel: paramiko.Channel, command: str,
+                 timeout: float, start: float, max_buffered: int = DEFAULT_MAX_BUFFERED,
+                 on_close: Optional[Callable[[], None]] = None):
+        self.command = command
+        self.exit_status: Optional[int] = None
+        self.timings: Dict[str, float] = {'channel_open': time.perf_counter() - start}
+
+        self._connection = connection
+        self._channel = channel
+        self._timeout = timeout
+        self._start = start
+        self._max_buffered = max_buffered
+        self._on_close = on_close
+        self._loop = asyncio.get_event_loop()
+        self._chunks: Deque[bytes] = collections.deque()
+        self._buffered = 0
+        self._stderr = bytearray()
+        self._stdout_eof = False
+        self._stderr_eof = False
+        self._error: Optional[Exception] = None
+        self._waiter: Optional[asyncio.Future] = None
+        self._encoding = connection.ssh.encoding
+        self._decoder = StreamDecoder(self._encoding)
+        self._reading = False
+
+        channel.setblocking(0)
+        self._fd = channel.fileno()
+        self._resume()
+
+    @property
+    def stderr(self) -> str:
+        """已收到的标准错误"""
+        return StreamDecoder(self._encoding).decode(self._stderr, final=True)
+
+    @property
+    def stderr_bytes(self) -> bytes:
+        """已收到的标准错误的原始字节"""
+        return bytes(self._stderr)
+
+    @property
+    def _eof(self) -> bool:
+        return self._stdout_eof and self._stderr_eof
+
+    def _resume(self) -> None:
+        if not self._reading and not self._eof:
+            self._reading = True
+            self._loop.add_reader(self._fd, self._on_readable)
+            # 恢复读取前通道里可能已经有数据
+            self._on_readable()
+
+    def _pause(self) -> None:
+        if self._reading:
+            self._reading = False
+            self._loop.remove_reader(self._fd)
+
+    def _on_readable(self) -> None:
+        try:
+            while self._reading:
+                progressed = False
+                if not self._stdout_eof:
+                    data = self._recv(self._channel.recv)
+                    if data == b'':
+                        self._stdout_eof = True
+                    elif data:
+                        if not self._chunks and 'first_byte' not in self.timings:
+                            self.timings['first_byte'] = time.perf_counter() - self._start
+                        self._chunks.append(data)
+                        self._buffered += len(data)
+                        progressed = True
+                if not self._stderr_eof:
+                    data = self._recv(self._channel.recv_stderr)
+                    if data == b'':
+                        self._stderr_eof = True
+                    elif data:
+                        self._stderr += data
+                        progressed = True
+                if self._eof:
+                    self.timings['last_byte'] = time.perf_counter() - self._start
+                    self._pause()
+                elif not progressed:
+                    break
+                elif self._buffered >= self._max_buffered:
+                    # 暂停后通道接收窗口耗尽，服务器随之停止发送
+                    self._pause()
+        except Exception as e:
+            self._error = e
+            self._pause()
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.set_result(None)
+
+    @staticmethod
+    def _recv(recv) -> Optional[bytes]:
+        try:
+            return recv(65536)
+        except socket.timeout:
+            return None
+
+    async def read_chunk(self) -> bytes:
+        """读取下一块原始标准输出，输出结束时返回b''
+
+        Raises:
+            Exception: 超过timeout秒没有新输出时抛出
+        """
+        while not self._chunks:
+            if self._error is not None:
+                raise self._connection._command_error(self._error)
+            if self._eof:
+                return b''
+            self._waiter = self._loop.create_future()
+            try:
+                await asyncio.wait_for(self._waiter, self._timeout)
+            except asyncio.TimeoutError:
+                self.close()
+                self._connection.logger.error('命令执行超时')
+                raise Exception('命令执行超时，请检查命令是否正确或网络状态')
+            finally:
+                self._waiter = None
+        chunk = self._chunks.popleft()
+        self._buffered -= len(chunk)
+        if self._buffered < self._max_buffered:
+            self._resume()
+        return chunk
+
+    def __aiter__(self) -> 'AsyncCommand':
+        return self
+
+    async def __anext__(self) -> str:
+        while True:
+            chunk = await self.read_chunk()
+            text = self._decoder.decode(chunk, final=not chunk)
+            if text:
+                return text
+            if not chunk:
+                raise StopAsyncIteration
+
+    async def read_bytes(self) -> memoryview:
+        """读取全部剩余的标准输出并等待命令结束，返回未解码的字节"""
+        output = OutputBuffer()
+        while True:
+            chunk = await self.read_chunk()
+            if not chunk:
+                break
+            output.append(chunk)
+        await self.wait()
+        return output.getbuffer()
+
+    async def read(self) -> str:
+        """读取全部剩余的标准输出并等待命令结束"""
+        return self._decoder.decode(await self.read_bytes(), final=True)
+
+    async def wait(self) -> int:
+        """等待命令结束并返回退出状态码，未读取的标准输出会被丢弃"""
+        if self.exit_status is not None:
+            return self.exit_status
+        while await self.read_chunk():
+            pass
+        if self._channel.exit_status_ready():
+            exit_status = self._channel.recv_exit_status()
+        else:
+            # 部分服务器在EOF之后才发送退出状态
+            exit_status = await self._loop.run_in_executor(
+                self._connection.executor, self._channel.recv_exit_status)
+        self.exit_status = exit_status
+        self.timings['exit_status'] = self.timings['command_total'] = time.perf_counter() - self._start
+        self._connection._record_command(self.timings)
+        self.close()
+        return exit_status
+
+    def close(self) -> None:
+        """停止读取并关闭通道"""
+        self._pause()
+        self._channel.close()
+        on_close, self._on_close = self._on_close, None
+        if on_close is not None:
+            on_close()
+
+    async def __aenter__(self) -> 'AsyncCommand':
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.close()
+
+
+class AsyncSSHConnection:
+    """asyncio SSH连接管理器
+
+    接口与SSHConnection对应，所有方法都在事件循环线程中调用。
+    连接不启动后台监控线程，执行命令时发现断线可通过retry=True按需重连。
+    同时执行的命令超过max_sessions时排队等待，避免超出服务端的会话数限制。
+
+    属性：
+        ssh: 底层的SSHConnection实例
+        executor: 执行阻塞操作的线程池
+        logger: 日志记录器实例
+    """
+
+    def __init__(self, executor: Optional[ThreadPoolExecutor] = None,
+                 max_buffered: int = DEFAULT_MAX_BUFFERED,
+                 max_sessions: int = DEFAULT_MAX_SESSIONS, **kwargs):
+        """初始化asyncio SSH连接管理器
+
+        Args:
+            executor: 执行连接握手和打开通道的线程池，默认使用进程内共享的default_executor
+            max_buffered: 单条命令未被读取的输出上限（字节），超过后暂停接收
+            max_sessions: 同时打开的会话数上限
+            **kwargs: 传给SSHConnection的参数，例如keepalive_interval、jump_pool
+        """
+        self.logger = logging.getLogger('LinuxRemoteControl.AsyncSSH')
+        self.ssh = _LoopBoundConnection(**kwargs)
+        self.executor = executor or default_executor()
+        self.max_buffered = max_buffered
+        self.max_sessions = max_sessions
+        # 信号量在首次执行命令时创建，绑定到当时运行的事件循环
+        self._sessions: Optional[asyncio.Semaphore] = None
+
+    @property
+    def is_connected(self) -> bool:
+        return self.ssh.is_connected
+
+    async def _run(self, func, *args):
+        return await asyncio.get_event_loop().run_in_executor(self.executor, func, *args)
+
+    async def connect(self, connection_info: Dict[str, str]) -> bool:
+        """建立SSH连接，参数和异常与SSHConnection.connect相同"""
+        return await self._run(self.ssh.connect, connection_info)
+
+    async def reconnect(self) -> bool:
+        """使用上次的连接信息重新建立连接"""
+        return await self._run(self.ssh.reconnect)
+
+    async def disconnect(self) -> None:
+        """断开SSH连接"""
+        await self._run(self.ssh.disconnect)
+
+    async def __aenter__(self) -> 'AsyncSSHConnection':
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.disconnect()
+
+    async def open_command(self, command: str, timeout: float = 30,
+                           get_pty: bool = True) -> AsyncCommand:
+        """在新通道中执行命令，立即返回AsyncCommand
+
+        Args:
+            command: 要执行的命令
+            timeout: 打开通道和等待输出的超时时间（秒）
+            get_pty: 是否分配伪终端，分配时标准错误合并到标准输出
+
+        Raises:
+            Exception: 未连接、超时或SSH错误时抛出，错误信息与SSHConnection.execute_command相同
+        """
+        if self._sessions is None:
+            self._sessions = asyncio.Semaphore(self.max_sessions)
+        await self._sessions.acquire()
+        try:
+            self.logger.debug(f'准备执行命令: {command}')
+            start = time.perf_counter()
+            channel = await self._run(self._open_channel, command, timeout, get_pty)
+        except BaseException:
+            self._sessions.release()
+            raise
+        return AsyncCommand(self, channel, command, timeout, start, self.max_buffered,
+                            on_close=self._sessions.release)
+
+    def _open_channel(self, command: str, timeout: float, get_pty: bool) -> paramiko.Channel:
+        if not self.ssh.is_connected:
+            self.logger.error('尝试在未连接状态下执行命令')
+            raise Exception('未连接到服务器')
+        try:
+            channel = self.ssh.client.get_transport().open_session(timeout=timeout)
+            if get_pty:
+                channel.get_pty()
+            channel.exec_command(command)
+            return channel
+        except Exception as e:
+            raise self._command_error(e)
+
+    def _command_error(self, error: Exception) -> Exception:
+        """把paramiko异常转换为与SSHConnection一致的异常"""
+        if isinstance(error, socket.timeout):
+            self.logger.error('命令执行超时')
+            return Exception('命令执行超时，请检查命令是否正确或网络状态')
+        if isinstance(error, paramiko.SSHException):
+            self.logger.error(f'SSH命令执行错误: {str(error)}')
+            return Exception(f'SSH命令执行错误: {str(error)}')
+        self.logger.error(f'执行命令时发生未知错误: {str(error)}')
+        return error
+
+    def _record_command(self, timings: Dict[str, float]) -> None:
+        self.ssh.last_command_timings = timings
+        connection_info = self.ssh._connection_info
+        if connection_info is not None:
+            self.ssh.latency_stats.record_all(connection_info['ip'], timings)
+
+    async def execute_command(self, command: str, retry: bool = False, timeout: float = 30,
+                              output_filter: Optional[OutputFilter] = None) -> Tuple[str, str]:
+        """执行远程命令
+
+        Args:
+            command: 要执行的命令
+            retry: 命令因连接中断而失败时，是否在重连后重新执行一次。仅应对幂等命令开启
+            timeout: 打开通道和等待输出的超时时间（秒）
+            output_filter: 在远程主机上过滤和压缩输出，指定时不分配伪终端，
+                传输统计写入ssh.last_transfer_stats
+
+        Returns:
+            Tuple[str, str]: (标准输出, 标准错误)，按连接信息中的'encoding'解码
+        """
+        output, error = await self.execute_command_raw(command, retry, timeout, output_filter)
+        encoding = self.ssh.encoding
+        return (StreamDecoder(encoding).decode(output, final=True),
+                StreamDecoder(encoding).decode(error, final=True))
+
+    async def execute_command_raw(self, command: str, retry: bool = False, timeout: float = 30,
+                                  output_filter: Optional[OutputFilter] = None) -> Tuple[memoryview, bytes]:
+        """执行远程命令并返回未解码的(标准输出, 标准错误)，参数同execute_command"""
+        if retry and not self.is_connected:
+            await self.reconnect()
+        try:
+            return await self._execute_command(command, timeout, output_filter)
+        except Exception:
+            if not retry or self.is_connected or not await self.reconnect():
+                raise
+            self.logger.warning(f'连接中断，重连后重新执行命令: {command}')
+            return await self._execute_command(command, timeout, output_filter)
+
+    async def _execute_command(self, command: str, timeout: float,
+                               output_filter: Optional[OutputFilter]) -> Tuple[memoryview, bytes]:
+        if output_filter is None:
+            async with await self.open_command(command, timeout) as running:
+                output = await running.read_bytes()
+            error = running.stderr_bytes
+            self.ssh.last_transfer_stats = {'raw_bytes': len(output), 'output_bytes': len(output),
+                                            'wire_bytes': len(output)}
+        else:
+            receiver = output_filter.receiver()
+            async with await self.open_command(output_filter.wrap(command), timeout,
+                                               get_pty=False) as running:
+                while True:
+                    chunk = await running.read_chunk()
+                    if not chunk:
+                        break
+                    receiver.feed(chunk)
+                await running.wait()
+            output, error = receiver.finish(running.stderr_bytes)
+            self.ssh.last_transfer_stats = receiver.stats
+        if running.exit_status != 0:
+            self.logger.warning(f'命令执行返回非零状态码: {running.exit_status}')
+        return output, error
+
+    async def stream_command(self, command: str, timeout: float = 30,
+                             get_pty: bool = True) -> AsyncIterator[str]:
+        """执行命令并逐块产出解码后的标准输出，适合持续输出的命令
+
+        提前退出迭代时关闭通道；需要退出状态码时改用open_command。
+        """
+        running = await self.open_command(command, timeout, get_pty)
+        try:
+            async for text in running:
+                yield text
+            await running.wait()
+        finally:
+            running.close()
@@ -0,0 +1,500 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+SSH端口转发模块
+
+这个模块在已建立的SSH连接之上实现端口转发，主要功能包括：
+1. 本地端口转发（ssh -L）：本机监听端口，经SSH通道连接远程可达的目标
+2. 远程端口转发（ssh -R）：远程主机监听端口，经SSH通道连接本机可达的目标
+3. 统计每条转发的连接数和收发字节数
+
+所有转发连接的数据都在同一个基于selectors（Linux上为epoll）的事件循环线程中中转，
+而不是每个socket一个线程。打开SSH通道和连接本地目标这类会阻塞一个RTT的操作
+交给少量工作线程完成，完成后再交回事件循环登记。
+
+主要组件：
+- Tunnel类：单条端口转发及其统计数据
+- PortForwarder类：端口转发管理器，运行中转事件循环
+
+使用示例：
+    forwarder = PortForwarder(ssh)
+    tunnel = forwarder.add_local_forward(15432, 'db.internal', 5432)
+    ...
+    forwarder.stop()
+
+依赖：
+- paramiko：SSH协议的Python实现
+
+作者：Cursor Team
+版本：0.1.0
+"""
+
+import itertools
+import logging
+import queue
+import selectors
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src.ssh import SSHConnection, STATE_CONNECTED
+
+LOCAL = 'local'
+REMOTE = 'remote'
+
+_BUFFER_SIZE = 65536
+# 有数据等待写入SSH通道（对端窗口已满）时事件循环的轮询间隔（秒）
+_STALL_POLL_INTERVAL = 0.005
+
+
+class Tunnel:
+    """单条端口转发
+
+    属性：
+        id: 转发编号
+        kind: 转发类型，LOCAL或REMOTE
+        bind_address: 监听地址（本地转发为本机地址，远程转发为远程主机地址）
+        bind_port: 监听端口
+        target_host: 目标主机
+        target_port: 目标端口
+        bytes_sent: 经SSH通道发出的字节数（本机一侧发往远程一侧）
+        bytes_received: 经SSH通道收到的字节数（远程一侧发往本机一侧）
+        active_connections: 当前活动连接数
+        total_connections: 累计连接数
+    """
+
+    _ids = itertools.count(1)
+
+    def __init__(self, kind: str, bind_address: str, bind_port: int,
+                 target_host: str, target_port: int):
+        self.id = next(self._ids)
+        self.kind = kind
+        self.bind_address = bind_address
+        self.bind_port = bind_port
+        self.target_host = target_host
+        self.target_port = target_port
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.active_connections = 0
+        self.total_connections = 0
+        self.listener: Optional[socket.socket] = None
+
+    def stats(self) -> Dict:
+        """返回转发的描述和统计数据"""
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'bind': f'{self.bind_address or "*"}:{self.bind_port}',
+            'target': f'{self.target_host}:{self.target_port}',
+            'bytes_sent': self.bytes_sent,
+            'bytes_received': self.bytes_received,
+            'active_connections': self.active_connections,
+            'total_connections': self.total_connections,
+        }
+
+
+class _Pipe:
+    """一条被转发的连接：本地socket与SSH通道组成的一对端点
+
+    每个方向最多缓存一块未写出的数据，缓存未清空前不再读取来源端，
+    由此把对端的流控（TCP窗口或SSH通道窗口）传递回来源端。
+    """
+
+    def __init__(self, tunnel: Tunnel, sock: socket.socket, channel):
+        self.tunnel = tunnel
+        self.sock = sock
+        self.channel = channel
+        self.to_channel = b''
+        self.to_sock = b''
+        self.sock_eof = False
+        self.channel_eof = False
+        self.closed = False
+
+
+class PortForwarder:
+    """端口转发管理器
+
+    在SSHConnection的传输层上提供本地和远程端口转发，
+    全部转发连接由一个后台事件循环线程中转。
+    SSH连接重连后会自动重新申请远程端口转发。
+
+    属性：
+        ssh: 提供传输层的SSH连接管理器
+        logger: 日志记录器实例
+    """
+
+    def __init__(self, ssh: SSHConnection, workers: int = 4):
+        """初始化端口转发管理器
+
+        Args:
+            ssh: 已连接的SSH连接管理器
+            workers: 打开通道和连接本地目标的工作线程数
+        """
+        self.ssh = ssh
+        self.logger = logging.getLogger('LinuxRemoteControl.Forwarding')
+        self._tunnels: Dict[int, Tunnel] = {}
+        self._remote_ports: Dict[int, Tunnel] = {}
+        self._pipes: List[_Pipe] = []
+        self._stalled: List[_Pipe] = []
+        self._selector = selectors.DefaultSelector()
+        self._tasks: 'queue.Queue[Callable[[], None]]' = queue.Queue()
+        self._wakeup_r, self._wakeup_w = socket.socketpair()
+        self._wakeup_r.setblocking(False)
+        self._selector.register(self._wakeup_r, selectors.EVENT_READ, None)
+        self._executor = ThreadPoolExecutor(max_workers=workers,
+                                            thread_name_prefix='PortForwarderWorker')
+        self._running = True
+        self._thread = threading.Thread(target=self._loop, name='PortForwarder', daemon=True)
+        self._thread.start()
+        self.ssh.add_state_listener(self._handle_ssh_state)
+
+    # ---- 公共接口 ----
+
+    def add_local_forward(self, bind_port: int, target_host: str, target_port: int,
+                          bind_address: str = '127.0.0.1') -> Tunnel:
+        """添加本地端口转发（ssh -L）
+
+        Args:
+            bind_port: 本机监听端口，0表示由系统分配
+            target_host: 从远程主机看到的目标地址
+            target_port: 目标端口
+            bind_address: 本机监听地址
+
+        Returns:
+            Tunnel: 新建的转发，bind_port为实际监听端口
+        """
+        listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            listener.bind((bind_address, bind_port))
+            listener.listen(128)
+        except OSError as e:
+            listener.close()
+            self.logger.error(f'无法监听本地端口 {bind_address}:{bind_port}: {str(e)}')
+            raise Exception(f'无法监听本地端口 {bind_port}: {str(e)}')
+        listener.setblocking(False)
+
+        tunnel = Tunnel(LOCAL, bind_address, listener.getsockname()[1], target_host, target_port)
+        tunnel.listener = listener
+        self._tunnels[tunnel.id] = tunnel
+        self._call_soon(lambda: self._selector.register(listener, selectors.EVENT_READ, tunnel))
+        self.logger.info(f'已添加本地端口转发 {bind_address}:{tunnel.bind_port} -> '
+                         f'{target_host}:{target_port}')
+        return tunnel
+
+    def add_remote_forward(self, bind_port: int, target_host: str, target_port: int,
+                           bind_address: str = '') -> Tunnel:
+        """添加远程端口转发（ssh -R）
+
+        Args:
+            bind_port: 远程主机监听端口，0表示由服务器分配
+            target_host: 从本机看到的目标地址
+            target_port: 目标端口
+            bind_address: 远程主机监听地址，空字符串表示所有地址
+
+        Returns:
+            Tunnel: 新建的转发，bind_port为服务器实际分配的端口
+        """
+        tunnel = Tunnel(REMOTE, bind_address, bind_port, target_host, target_port)
+        self._request_remote_forward(tunnel)
+        self._tunnels[tunnel.id] = tunnel
+        self.logger.info(f'已添加远程端口转发 {bind_address or "*"}:{tunnel.bind_port} -> '
+                         f'{target_host}:{target_port}')
+        return tunnel
+
+    def remove_tunnel(self, tunnel_id: int) -> None:
+        """删除转发并关闭它的所有连接"""
+        tunnel = self._tunnels.pop(tunnel_id, None)
+        if tunnel is None:
+            return
+        if tunnel.kind == REMOTE:
+            self._remote_ports.pop(tunnel.bind_port, None)
+            transport = self._transport()
+            if transport is not None:
+                try:
+                    transport.cancel_port_forward(tunnel.bind_address, tunnel.bind_port)
+                except Exception as e:
+                    self.logger.warning(f'取消远程端口转发失败: {str(e)}')
+        self._call_soon(lambda: self._close_tunnel(tunnel))
+        self.logger.info(f'已删除端口转发 #{tunnel.id}')
+
+    def get_stats(self) -> List[Dict]:
+        """返回所有转发的统计数据"""
+        return [tunnel.stats() for tunnel in list(self._tunnels.values())]
+
+    def stop(self) -> None:
+        """删除所有转发并停止事件循环"""
+        for tunnel_id in list(self._tunnels):
+            self.remove_tunnel(tunnel_id)
+        self.ssh.remove_state_listener(self._handle_ssh_state)
+        self._running = False
+        self._wakeup()
+        if self._thread is not threading.current_thread():
+            self._thread.join(timeout=2)
+        self._executor.shutdown(wait=False)
+
+    # ---- 线程间协作 ----
+
+    def _transport(self):
+        client = self.ssh.client
+        return client.get_transport() if client is not None else None
+
+    def _call_soon(self, callback: Callable[[], None]) -> None:
+        """把回调交给事件循环线程执行"""
+        self._tasks.put(callback)
+        self._wakeup()
+
+    def _wakeup(self) -> None:
+        try:
+            self._wakeup_w.send(b'\0')
+        except OSError:
+            pass
+
+    def _handle_ssh_state(self, state: str) -> None:
+        if state != STATE_CONNECTED:
+            return
+        for tunnel in list(self._tunnels.values()):
+            if tunnel.kind == REMOTE:
+                try:
+                    self._request_remote_forward(tunnel)
+                except Exception as e:
+                    self.logger.error(f'重连后恢复远程端口转发失败: {str(e)}')
+
+    def _request_remote_forward(self, tunnel: Tunnel) -> None:
+        transport = self._transport()
+        if transport is None or not self.ssh.is_connected:
+            raise Exception('未连接到服务器')
+        try:
+            port = transport.request_port_forward(tunnel.bind_address, tunnel.bind_port,
+                                                  handler=self._handle_forwarded_channel)
+        except Exception as e:
+            self.logger.error(f'申请远程端口转发失败: {str(e)}')
+            raise Exception(f'申请远程端口转发失败: {str(e)}')
+        self._remote_ports.pop(tunnel.bind_port, None)
+        tunnel.bind_port = port
+        self._remote_ports[port] = tunnel
+
+    def _handle_forwarded_channel(self, channel, origin: Tuple[str, int],
+                                  server: Tuple[str, int]) -> None:
+        """远程端口有新连接时由paramiko传输线程调用"""
+        tunnel = self._remote_ports.get(server[1])
+        if tunnel is None:
+            channel.close()
+            return
+        self._executor.submit(self._connect_remote_target, tunnel, channel)
+
+    def _connect_remote_target(self, tunnel: Tunnel, channel) -> None:
+        try:
+            sock = socket.create_connection((tunnel.target_host, tunnel.target_port), timeout=10)
+        except OSError as e:
+            self.logger.warning(f'无法连接转发目标 {tunnel.target_host}:{tunnel.target_port}: {str(e)}')
+            channel.close()
+            return
+        self._call_soon(lambda: self._add_pipe(tunnel, sock, channel))
+
+    def _open_local_channel(self, tunnel: Tunnel, sock: socket.socket) -> None:
+        transport = self._transport()
+        try:
+            if transport is None:
+                raise Exception('未连接到服务器')
+            channel = transport.open_channel(
+                'direct-tcpip',
+                (tunnel.target_host, tunnel.target_port),
+                sock.getpeername()[:2],
+                timeout=10
+            )
+        except Exception as e:
+            self.logger.warning(f'无法打开到 {tunnel.target_host}:{tunnel.target_port} 的通道: {str(e)}')
+            sock.close()
+            return
+        self._call_soon(lambda: self._add_pipe(tunnel, sock, channel))
+
+    # ---- 事件循环（仅在事件循环线程中执行） ----
+
+    def _loop(self) -> None:
+        while self._running:
+            timeout = _STALL_POLL_INTERVAL if self._stalled else None
+            for key, events in self._selector.select(timeout):
+                if key.data is None:
+                    self._run_tasks()
+                elif isinstance(key.data, Tunnel):
+                    self._accept(key.data)
+                else:
+                    pipe, side = key.data
+                    try:
+                        self._on_ready(pipe, side, events)
+                    except Exception as e:
+                        self.logger.debug(f'转发连接中断: {str(e)}')
+                        self._close_pipe(pipe)
+            if self._stalled:
+                for pipe in list(self._stalled):
+                    try:
+                        self._flush_channel(pipe)
+                    except Exception as e:
+                        self.logger.debug(f'转发连接中断: {str(e)}')
+                        self._close_pipe(pipe)
+        for pipe in list(self._pipes):
+            self._close_pipe(pipe)
+        self._selector.close()
+        self._wakeup_r.close()
+        self._wakeup_w.close()
+
+    def _run_tasks(self) -> None:
+        try:
+            while self._wakeup_r.recv(4096):
+                pass
+        except (BlockingIOError, OSError):
+            pass
+        while True:
+            try:
+                callback = self._tasks.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                callback()
+            except Exception as e:
+                self.logger.error(f'端口转发任务执行失败: {str(e)}')
+
+    def _accept(self, tunnel: Tunnel) -> None:
+        try:
+            sock, _ = tunnel.listener.accept()
+        except (BlockingIOError, OSError):
+            return
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._executor.submit(self._open_local_channel, tunnel, sock)
+
+    def _add_pipe(self, tunnel: Tunnel, sock: socket.socket, channel) -> None:
+        if tunnel.id not in self._tunnels:
+            sock.close()
+            channel.close()
+            return
+        sock.setblocking(False)
+        channel.setblocking(False)
+        pipe = _Pipe(tunnel, sock, channel)
+        self._pipes.append(pipe)
+        tunnel.active_connections += 1
+        tunnel.total_connections += 1
+        self._update_interest(pipe)
+
+    def _on_ready(self, pipe: _Pipe, side: str, events: int) -> None:
+        if side == 'sock':
+            if events & selectors.EVENT_WRITE:
+                self._flush_sock(pipe)
+            if events & selectors.EVENT_READ and not pipe.closed:
+                try:
+                    data = pipe.sock.recv(_BUFFER_SIZE)
+                except BlockingIOError:
+                    return
+                if data:
+                    pipe.to_channel = data
+                    pipe.tunnel.bytes_sent += len(data)
+                    self._flush_channel(pipe)
+                else:
+                    pipe.sock_eof = True
+                    self._flush_channel(pipe)
+        else:
+            try:
+                data = pipe.channel.recv(_BUFFER_SIZE)
+            except socket.timeout:
+                return
+            if data:
+                pipe.to_sock = data
+                pipe.tunnel.bytes_received += len(data)
+                self._flush_sock(pipe)
+            else:
+                pipe.channel_eof = True
+                self._flush_sock(pipe)
+        if not pipe.closed:
+            self._update_interest(pipe)
+
+    def _flush_channel(self, pipe: _Pipe) -> None:
+        while pipe.to_channel and pipe.channel.send_ready():
+            sent = pipe.channel.send(pipe.to_channel)
+            pipe.to_channel = pipe.to_channel[sent:]
+        if pipe.to_channel:
+            if pipe not in self._stalled:
+                self._stalled.append(pipe)
+            return
+        if pipe in self._stalled:
+            self._stalled.remove(pipe)
+            self._update_interest(pipe)
+        if pipe.sock_eof:
+            pipe.channel.shutdown_write()
+        self._maybe_close(pipe)
+
+    def _flush_sock(self, pipe: _Pipe) -> None:
+        if pipe.to_sock:
+            try:
+                sent = pipe.sock.send(pipe.to_sock)
+            except BlockingIOError:
+                sent = 0
+            pipe.to_sock = pipe.to_sock[sent:]
+        if not pipe.to_sock and pipe.channel_eof:
+            try:
+                pipe.sock.shutdown(socket.SHUT_WR)
+            except OSError:
+                pass
+        self._maybe_close(pipe)
+
+    def _maybe_close(self, pipe: _Pipe) -> None:
+        if (pipe.sock_eof and pipe.channel_eof
+                and not pipe.to_channel and not pipe.to_sock):
+            self._close_pipe(pipe)
+
+    def _update_interest(self, pipe: _Pipe) -> None:
+        sock_events = 0
+        if not pipe.to_channel and not pipe.sock_eof:
+            sock_events |= selectors.EVENT_READ
+        if pipe.to_sock:
+            sock_events |= selectors.EVENT_WRITE
+        channel_events = 0
+        if not pipe.to_sock and not pipe.channel_eof:
+            channel_events |= selectors.EVENT_READ
+        self._set_interest(pipe.sock, sock_events, (pipe, 'sock'))
+        self._set_interest(pipe.channel, channel_events, (pipe, 'channel'))
+
+    def _set_interest(self, fileobj, events: int, data) -> None:
+        try:
+            key = self._selector.get_key(fileobj)
+        except KeyError:
+            key = None
+        if not events:
+            if key is not None:
+                self._selector.unregister(fileobj)
+        elif key is None:
+            self._selector.register(fileobj, events, data)
+        elif key.events != events:
+            self._selector.modify(fileobj, events, data)
+
+    def _close_pipe(self, pipe: _Pipe) -> None:
+        if pipe.closed:
+            return
+        pipe.closed = True
+        for endpoint in (pipe.sock, pipe.channel):
+            try:
+                self._selector.unregister(endpoint)
+            except (KeyError, ValueError):
+                pass
+            try:
+                endpoint.close()
+            except OSError:
+                pass
+        if pipe in self._stalled:
+            self._stalled.remove(pipe)
+        if pipe in self._pipes:
+            self._pipes.remove(pipe)
+            pipe.tunnel.active_connections -= 1
+
+    def _close_tunnel(self, tunnel: Tunnel) -> None:
+        if tunnel.listener is not None:
+            try:
+                self._selector.unregister(tunnel.listener)
+            except (KeyError, ValueError):
+                pass
+            tunnel.listener.close()
+            tunnel.listener = None
+        for pipe in list(self._pipes):
+            if pipe.tunnel is tunnel:
+                self._close_pipe(pipe)
@@ -0,0 +1,190 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+延迟统计模块
+
+这个模块负责汇总SSH连接和命令执行各阶段的耗时，主要功能包括：
+1. 按主机和阶段维护固定分桶的延迟直方图
+2. 提供统计查询接口（次数、均值、最值、分位数估计）
+3. 导出Prometheus文本格式，供node_exporter的textfile收集器读取
+
+主要组件：
+- Histogram类：单个阶段的延迟直方图
+- LatencyStats类：按(主机, 阶段)组织的直方图集合
+
+阶段名称：
+- 连接：key_load（使用私钥文件时，含解密）、tcp_connect（含DNS解析，经跳板机时为打开通道）、
+  banner、kex、auth、connect_total（包含key_load）
+- 命令：channel_open、first_byte、last_byte、exit_status、command_total
+
+使用示例：
+    stats = LatencyStats()
+    stats.record('192.168.1.100', 'kex', 0.042)
+    print(stats.get_stats()['192.168.1.100']['kex']['p95'])
+    stats.write_prometheus('logs/ssh_latency.prom')
+
+作者：Cursor Team
+版本：0.1.0
+"""
+
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+# 直方图分桶上界（秒）
+BUCKETS: Tuple[float, ...] = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+
+CONNECT_PHASES = ('key_load', 'tcp_connect', 'banner', 'kex', 'auth', 'connect_total')
+COMMAND_PHASES = ('channel_open', 'first_byte', 'last_byte', 'exit_status', 'command_total')
+
+_METRIC_NAME = 'linux_remote_controller_ssh_phase_seconds'
+
+
+class Histogram:
+    """单个阶段的延迟直方图
+
+    属性：
+        counts: 每个分桶（非累计）的样本数，最后一个为+Inf桶
+        count: 样本总数
+        total: 样本耗时总和（秒）
+        min: 最小耗时（秒）
+        max: 最大耗时（秒）
+    """
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def observe(self, seconds: float) -> None:
+        index = len(BUCKETS)
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                index = i
+                break
+        self.counts[index] += 1
+        self.count += 1
+        self.total += seconds
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = seconds if self.max is None else max(self.max, seconds)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """按分桶线性插值估计分位数"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        lower = 0.0
+        for i, count in enumerate(self.counts):
+            upper = BUCKETS[i] if i < len(BUCKETS) else self.max
+            if count and seen + count >= rank:
+                estimate = lower + (upper - lower) * (rank - seen) / count
+                return min(max(estimate, self.min), self.max)
+            seen += count
+            lower = upper
+        return self.max
+
+    def summary(self) -> Dict:
+        return {
+            'count': self.count,
+            'mean': self.total / self.count if self.count else None,
+            'min': self.min,
+            'max': self.max,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+            'p99': self.quantile(0.99),
+        }
+
+
+class LatencyStats:
+    """按(主机, 阶段)汇总的延迟直方图集合
+
+    所有方法都是线程安全的，可由多个SSH连接同时记录。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: Dict[Tuple[str, str], Histogram] = {}
+
+    def record(self, host: str, phase: str, seconds: float) -> None:
+        """记录一次阶段耗时
+
+        Args:
+            host: 主机地址
+            phase: 阶段名称
+            seconds: 耗时（秒）
+        """
+        with self._lock:
+            histogram = self._histograms.get((host, phase))
+            if histogram is None:
+                histogram = self._histograms[(host, phase)] = Histogram()
+            histogram.observe(seconds)
+
+    def record_all(self, host: str, timings: Dict[str, float]) -> None:
+        """批量记录同一次操作的各阶段耗时"""
+        for phase, seconds in timings.items():
+            self.record(host, phase, seconds)
+
+    def get_stats(self, host: Optional[str] = None) -> Dict[str, Dict[str, Dict]]:
+        """查询统计数据
+
+        Args:
+            host: 只返回该主机的数据，None表示全部主机
+
+        Returns:
+            Dict[str, Dict[str, Dict]]: {主机: {阶段: 统计摘要}}，耗时单位为秒
+        """
+        with self._lock:
+            items = [(key, histogram.summary()) for key, histogram in self._histograms.items()
+                     if host is None or key[0] == host]
+        stats: Dict[str, Dict[str, Dict]] = {}
+        for (item_host, phase), summary in sorted(items):
+            stats.setdefault(item_host, {})[phase] = summary
+        return stats
+
+    def reset(self) -> None:
+        """清空所有统计数据"""
+        with self._lock:
+            self._histograms.clear()
+
+    def to_prometheus(self) -> str:
+        """导出Prometheus文本格式"""
+        lines = [
+            f'# HELP {_METRIC_NAME} Latency of SSH connection and command phases.',
+            f'# TYPE {_METRIC_NAME} histogram',
+        ]
+        with self._lock:
+            items = sorted((key, list(h.counts), h.count, h.total)
+                           for key, h in self._histograms.items())
+        for (host, phase), counts, count, total in items:
+            labels = f'host="{_escape_label(host)}",phase="{_escape_label(phase)}"'
+            cumulative = 0
+            for bound, bucket_count in zip(BUCKETS, counts):
+                cumulative += bucket_count
+                lines.append(f'{_METRIC_NAME}_bucket{{{labels},le="{bound:g}"}} {cumulative}')
+            lines.append(f'{_METRIC_NAME}_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f'{_METRIC_NAME}_sum{{{labels}}} {total:.6f}')
+            lines.append(f'{_METRIC_NAME}_count{{{labels}}} {count}')
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path: str) -> None:
+        """原子地写入Prometheus文本文件，避免收集器读到半个文件"""
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp_path, path)
+
+
+def _escape_label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+# 进程级共享的延迟统计，SSHConnection默认记录到这里
+default_latency_stats = LatencyStats()
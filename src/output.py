@@ -0,0 +1,237 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+命令输出处理模块
+
+这个模块负责以字节为单位收集命令输出并按需解码，主要功能包括：
+1. 把接收到的数据块写入预分配、按倍数扩容的缓冲区，按memoryview取出，不额外复制
+2. 按主机配置的编码增量解码，多字节字符被拆分到两个数据块时也能正确拼接
+3. 无法解码的字节替换为U+FFFD，二进制或编码不符的输出不会导致命令失败
+4. 在远程主机上过滤（grep、head、tail、字节数上限）和gzip压缩输出，本地流式解压
+
+主要组件：
+- OutputBuffer类：命令输出的接收缓冲区
+- StreamDecoder类：增量解码器
+- OutputFilter类：远程过滤和压缩选项
+- FilteredOutput类：接收过滤后的输出并统计传输字节数
+
+使用示例：
+    buffer = OutputBuffer()
+    for chunk in chunks:
+        buffer.append(chunk)
+    text = StreamDecoder('gbk').decode(buffer.getbuffer(), final=True)
+
+作者：Cursor Team
+版本：0.1.0
+"""
+
+import codecs
+import re
+import shlex
+import zlib
+from typing import Dict, Optional, Tuple, Union
+
+DEFAULT_ENCODING = 'utf-8'
+
+BytesLike = Union[bytes, bytearray, memoryview]
+
+
+def check_encoding(encoding: str) -> str:
+    """校验编码名称，返回规范化后的名称
+
+    只接受字节与文本互相转换的编码，hex、zlib、rot13等codecs不能用于解码命令输出。
+
+    Raises:
+        Exception: 编码不存在或不是文本编码时抛出
+    """
+    try:
+        codec = codecs.lookup(encoding)
+    except LookupError:
+        raise Exception(f'不支持的编码: {encoding}')
+    if not getattr(codec, '_is_text_encoding', True):
+        raise Exception(f'不支持的编码: {encoding}')
+    return codec.name
+
+
+class OutputBuffer:
+    """命令输出的接收缓冲区
+
+    数据块直接写入预分配的bytearray，空间不足时按倍数扩容，
+    取出时返回引用缓冲区的memoryview。
+
+    属性：
+        size: 已写入的字节数
+    """
+
+    def __init__(self, size_hint: int = 64 * 1024):
+        """初始化缓冲区
+
+        Args:
+            size_hint: 预分配的字节数
+        """
+        self._buffer = bytearray(size_hint)
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def append(self, chunk: BytesLike) -> None:
+        """写入一个数据块"""
+        end = self.size + len(chunk)
+        if end > len(self._buffer):
+            self._buffer.extend(bytes(max(end, len(self._buffer) * 2) - len(self._buffer)))
+        self._buffer[self.size:end] = chunk
+        self.size = end
+
+    def getbuffer(self) -> memoryview:
+        """返回已写入内容的memoryview，之后不应再写入"""
+        return memoryview(self._buffer)[:self.size]
+
+
+class StreamDecoder:
+    """增量解码器
+
+    上一块末尾不完整的多字节字符会保留到下一块一起解码。
+
+    属性：
+        encoding: 编码名称
+    """
+
+    def __init__(self, encoding: str = DEFAULT_ENCODING, errors: str = 'replace'):
+        """初始化解码器
+
+        Args:
+            encoding: 编码名称，例如utf-8、gbk
+            errors: 解码错误处理方式，默认替换为U+FFFD
+        """
+        self.encoding = check_encoding(encoding)
+        self._decoder = codecs.getincrementaldecoder(self.encoding)(errors=errors)
+
+    def decode(self, data: BytesLike, final: bool = False) -> str:
+        """解码一个数据块
+
+        Args:
+            data: 数据块
+            final: 是否为最后一块，为True时输出剩余的不完整字符
+
+        Returns:
+            str: 本块可以确定的文本
+        """
+        return self._decoder.decode(data, final)
+
+
+# 远程管道把命令原始输出的字节数以该标记写到标准错误
+RAW_BYTES_MARKER = b'__LRC_RAW_BYTES__'
+_RAW_BYTES_PATTERN = re.compile(re.escape(RAW_BYTES_MARKER) + rb' ([0-9]+)\n')
+
+
+class OutputFilter:
+    """在远程主机上过滤和压缩命令输出
+
+    把命令包装为shell管道，依次执行grep、head、tail、字节数上限和gzip压缩，
+    只把过滤后的结果传回本地。原始输出的字节数由dd统计并以RAW_BYTES_MARKER
+    标记写到标准错误。远程主机需要POSIX shell和dd，压缩时还需要gzip。
+
+    过滤后命令的退出状态码为管道最后一个命令的状态码。
+
+    属性：
+        grep: 只保留匹配该扩展正则表达式的行
+        ignore_case: grep时忽略大小写
+        head: 只保留前N行
+        tail: 只保留后N行，与head同时指定时先取head
+        max_bytes: 最多传回的字节数（压缩前）
+        compress: 是否在远程gzip压缩、本地边接收边解压
+    """
+
+    def __init__(self, grep: Optional[str] = None, ignore_case: bool = False,
+                 head: Optional[int] = None, tail: Optional[int] = None,
+                 max_bytes: Optional[int] = None, compress: bool = False):
+        self.grep = grep
+        self.ignore_case = ignore_case
+        self.head = head
+        self.tail = tail
+        self.max_bytes = max_bytes
+        self.compress = compress
+
+    def wrap(self, command: str) -> str:
+        """生成在远程执行的shell管道"""
+        # 命令放在子shell中并以换行结束，命令末尾的注释或&不会影响管道
+        stages = [f'({command}\n)',
+                  "{ dd bs=65536 2>&1 >&3 | sed -n 's/^\\([0-9][0-9]*\\) bytes.*/"
+                  f"{RAW_BYTES_MARKER.decode()} \\1/p' >&2; }} 3>&1"]
+        if self.grep is not None:
+            stages.append(f'grep -E {"-i " if self.ignore_case else ""}-e {shlex.quote(self.grep)}')
+        if self.head is not None:
+            stages.append(f'head -n {int(self.head)}')
+        if self.tail is not None:
+            stages.append(f'tail -n {int(self.tail)}')
+        if self.max_bytes is not None:
+            stages.append(f'head -c {int(self.max_bytes)}')
+        if self.compress:
+            stages.append('gzip -c')
+        return ' | '.join(stages)
+
+    def receiver(self) -> 'FilteredOutput':
+        """创建接收本次命令输出的FilteredOutput"""
+        return FilteredOutput(self.compress)
+
+
+class FilteredOutput:
+    """接收经OutputFilter过滤的输出，压缩时边接收边解压
+
+    属性：
+        output: 解压后的输出
+        wire_bytes: 经SSH通道收到的字节数
+        raw_bytes: 远程命令原始输出的字节数，无法获得时为None
+    """
+
+    def __init__(self, compressed: bool):
+        self.output = OutputBuffer()
+        self.wire_bytes = 0
+        self.raw_bytes: Optional[int] = None
+        self._decompressor = zlib.decompressobj(wbits=31) if compressed else None
+
+    def feed(self, chunk: BytesLike) -> None:
+        """写入一个收到的数据块"""
+        self.wire_bytes += len(chunk)
+        if self._decompressor is None:
+            self.output.append(chunk)
+            return
+        try:
+            self.output.append(self._decompressor.decompress(chunk))
+        except zlib.error as e:
+            raise Exception(f'解压命令输出失败: {str(e)}')
+
+    def finish(self, stderr: BytesLike) -> Tuple[memoryview, bytes]:
+        """结束接收，从标准错误中取出原始字节数标记
+
+        Args:
+            stderr: 命令的标准错误
+
+        Returns:
+            Tuple[memoryview, bytes]: (输出, 去掉标记后的标准错误)
+
+        Raises:
+            Exception: 压缩数据不完整时抛出
+        """
+        if self._decompressor is not None:
+            self.output.append(self._decompressor.flush())
+            # flush不检查完整性，远程gzip被终止或通道中断时压缩流不完整
+            if not self._decompressor.eof:
+                raise Exception('解压命令输出失败: 压缩数据不完整')
+        # 命令的标准错误不以换行结束或仍在写入时，标记可能出现在一行中间
+        match = None
+        for match in _RAW_BYTES_PATTERN.finditer(stderr):
+            pass
+        if match is None:
+            return self.output.getbuffer(), bytes(stderr)
+        self.raw_bytes = int(match.group(1))
+        stderr = bytes(stderr)
+        return self.output.getbuffer(), stderr[:match.start()] + stderr[match.end():]
+
+    @property
+    def stats(self) -> Dict[str, Optional[int]]:
+        """传输统计：raw_bytes、output_bytes和wire_bytes"""
+        return {'raw_bytes': self.raw_bytes, 'output_bytes': self.output.size,
+                'wire_bytes': self.wire_bytes}
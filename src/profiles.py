@@ -0,0 +1,321 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+连接配置管理模块
+
+这个模块负责保存常用的连接配置，并在后台预先建立连接，主要功能包括：
+1. 把连接配置保存到JSON文件，密码和私钥密码短语保存在系统密钥环中
+2. 在后台预热选中的配置：完成DNS解析、TCP连接、SSH握手和认证，并记录主机密钥
+3. 点击连接时直接接管已预热的连接
+
+主要组件：
+- ProfileStore类：连接配置存储
+- ConnectionPrewarmer类：后台预热连接
+
+凭据通过可选依赖keyring保存（pip install keyring），未安装或没有可用的密钥环后端时
+不保存密码，每次连接需要重新输入。凭据不会以明文写入配置文件。
+
+使用示例：
+    store = ProfileStore()
+    store.save('web-01', {'ip': '10.0.0.1', 'username': 'root', 'password': '***'}, prewarm=True)
+    prewarmer = ConnectionPrewarmer(store)
+    prewarmer.prewarm_all()
+    ssh = prewarmer.take(store.get('web-01'))
+
+作者：Cursor Team
+版本：0.1.0
+"""
+
+import json
+import logging
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from src.output import DEFAULT_ENCODING, check_encoding
+from src.ssh import SSHConnection
+
+try:
+    import keyring
+except ImportError:
+    keyring = None
+
+KEYRING_SERVICE = 'LinuxRemoteController'
+DEFAULT_PROFILE_PATH = Path.home() / '.linux_remote_controller' / 'profiles.json'
+
+# 只保存在密钥环中的字段
+SECRET_FIELDS = ('password', 'passphrase')
+# 预热连接与连接请求匹配时比较的字段
+# host_key不参与匹配：预热时已校验或记录了主机密钥
+# encoding参与匹配：接管连接时沿用预热时的连接信息，编码不同的预热连接不能使用
+_MATCH_FIELDS = ('ip', 'port', 'username', 'password', 'key_filename', 'passphrase',
+                 'use_agent', 'profile', 'jump_host', 'encoding')
+
+# 预热状态
+PREWARM_WARMING = 'warming'
+PREWARM_READY = 'ready'
+PREWARM_FAILED = 'failed'
+
+
+def _match_key(connection_info: Dict) -> str:
+    fields = {name: connection_info.get(name) or None for name in _MATCH_FIELDS}
+    fields['port'] = int(fields['port'] or 22)
+    try:
+        fields['encoding'] = check_encoding(fields['encoding'] or DEFAULT_ENCODING)
+    except Exception:
+        pass
+    return json.dumps(fields, sort_keys=True, default=str)
+
+
+class ProfileStore:
+    """连接配置存储
+
+    配置文件只保存非敏感字段和预热开关，密码等凭据保存在系统密钥环中。
+
+    属性：
+        path: 配置文件路径
+        secrets_available: 是否可以安全保存凭据
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """初始化配置存储
+
+        Args:
+            path: 配置文件路径，默认为~/.linux_remote_controller/profiles.json
+        """
+        self.logger = logging.getLogger('LinuxRemoteControl.Profiles')
+        self.path = Path(path) if path else DEFAULT_PROFILE_PATH
+        self.secrets_available = keyring is not None
+        self._lock = threading.Lock()
+        self._profiles: Dict[str, Dict] = self._load()
+
+    def _load(self) -> Dict[str, Dict]:
+        if not self.path.exists():
+            return {}
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            self.logger.error(f'读取连接配置失败: {str(e)}')
+            return {}
+
+    def _write(self) -> None:
+        """原子地写入配置文件，仅当前用户可读写"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(self._profiles, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def list_profiles(self) -> List[str]:
+        """返回按名称排序的配置名称列表"""
+        with self._lock:
+            return sorted(self._profiles)
+
+    def prewarm_profiles(self) -> List[str]:
+        """返回开启了启动预热的配置名称列表"""
+        with self._lock:
+            return sorted(name for name, profile in self._profiles.items() if profile.get('prewarm'))
+
+    def get(self, name: str) -> Dict:
+        """获取配置，返回可直接传给SSHConnection.connect的连接信息
+
+        Args:
+            name: 配置名称
+
+        Returns:
+            Dict: 连接信息，包含从密钥环读取的凭据和prewarm字段
+
+        Raises:
+            Exception: 配置不存在时抛出
+        """
+        with self._lock:
+            if name not in self._profiles:
+                raise Exception(f'连接配置不存在: {name}')
+            profile = dict(self._profiles[name])
+        profile.update(self._get_secrets(name))
+        return profile
+
+    def save(self, name: str, connection_info: Dict, prewarm: bool = False) -> bool:
+        """保存配置
+
+        Args:
+            name: 配置名称
+            connection_info: 连接信息，凭据字段保存到密钥环
+            prewarm: 是否在启动时预热
+
+        Returns:
+            bool: 凭据是否已保存，未提供凭据时也返回True
+        """
+        if not name:
+            raise Exception('配置名称不能为空')
+        profile = {key: value for key, value in connection_info.items()
+                   if key not in SECRET_FIELDS and key != 'prewarm'}
+        profile['prewarm'] = bool(prewarm)
+        with self._lock:
+            # 保留已记录的主机密钥，除非连接目标发生变化
+            previous = self._profiles.get(name, {})
+            if 'host_key' not in profile and previous.get('ip') == profile.get('ip') \
+                    and previous.get('port') == profile.get('port') and previous.get('host_key'):
+                profile['host_key'] = previous['host_key']
+            self._profiles[name] = profile
+            self._write()
+        secrets = {key: connection_info[key] for key in SECRET_FIELDS if connection_info.get(key)}
+        saved = self._set_secrets(name, secrets)
+        self.logger.info(f'已保存连接配置: {name}')
+        return saved
+
+    def set_host_key(self, name: str, host_key: str) -> None:
+        """记录配置的主机密钥，之后的连接会校验服务器密钥"""
+        with self._lock:
+            if name not in self._profiles:
+                return
+            self._profiles[name]['host_key'] = host_key
+            self._write()
+
+    def delete(self, name: str) -> None:
+        """删除配置及其凭据"""
+        with self._lock:
+            if self._profiles.pop(name, None) is None:
+                return
+            self._write()
+        self._set_secrets(name, {})
+        self.logger.info(f'已删除连接配置: {name}')
+
+    def _get_secrets(self, name: str) -> Dict[str, str]:
+        if not self.secrets_available:
+            return {}
+        try:
+            value = keyring.get_password(KEYRING_SERVICE, name)
+        except Exception as e:
+            self.logger.warning(f'读取密钥环失败: {str(e)}')
+            return {}
+        return json.loads(value) if value else {}
+
+    def _set_secrets(self, name: str, secrets: Dict[str, str]) -> bool:
+        if not self.secrets_available:
+            if secrets:
+                self.logger.warning('未安装keyring，凭据不会被保存')
+            return not secrets
+        try:
+            if secrets:
+                keyring.set_password(KEYRING_SERVICE, name, json.dumps(secrets))
+            elif keyring.get_password(KEYRING_SERVICE, name) is not None:
+                keyring.delete_password(KEYRING_SERVICE, name)
+            return True
+        except Exception as e:
+            self.logger.warning(f'写入密钥环失败，凭据不会被保存: {str(e)}')
+            return not secrets
+
+
+class ConnectionPrewarmer:
+    """在后台预先建立连接
+
+    预热的连接已完成认证并开启保活，调用take时按连接信息匹配并移交给调用方，
+    每个预热连接只能被取走一次。
+
+    属性：
+        store: 连接配置存储
+        keepalive_interval: 预热连接的保活间隔（秒）
+    """
+
+    def __init__(self, store: ProfileStore, max_workers: int = 4, keepalive_interval: int = 15,
+                 connection_factory: Optional[Callable[[], SSHConnection]] = None):
+        """初始化预热器
+
+        Args:
+            store: 连接配置存储
+            max_workers: 同时预热的连接数
+            keepalive_interval: 预热连接的保活间隔（秒）
+            connection_factory: 创建SSH连接管理器的函数，默认为不自动重连的SSHConnection
+        """
+        self.logger = logging.getLogger('LinuxRemoteControl.Prewarm')
+        self.store = store
+        self.keepalive_interval = keepalive_interval
+        self.connection_factory = connection_factory or (
+            lambda: SSHConnection(keepalive_interval=keepalive_interval, auto_reconnect=False))
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='Prewarm')
+        self._lock = threading.Lock()
+        self._warm: Dict[str, SSHConnection] = {}
+        self._status: Dict[str, str] = {}
+        self._closed = False
+
+    def prewarm_all(self) -> List[Future]:
+        """预热所有开启了启动预热的配置"""
+        return [self.prewarm(name) for name in self.store.prewarm_profiles()]
+
+    def prewarm(self, name: str) -> Future:
+        """在后台预热一个配置，返回结果为是否成功的Future"""
+        with self._lock:
+            self._status[name] = PREWARM_WARMING
+        return self._executor.submit(self._prewarm, name)
+
+    def _prewarm(self, name: str) -> bool:
+        if self._closed:
+            return False
+        try:
+            connection_info = self.store.get(name)
+            ssh = self.connection_factory()
+            ssh.connect(connection_info)
+        except Exception as e:
+            self.logger.warning(f'预热连接配置 {name} 失败: {str(e)}')
+            with self._lock:
+                self._status[name] = PREWARM_FAILED
+            return False
+        if not connection_info.get('host_key'):
+            host_key = ssh.get_host_key()
+            if host_key:
+                self.store.set_host_key(name, host_key)
+                connection_info['host_key'] = host_key
+        key = _match_key(connection_info)
+        with self._lock:
+            closed = self._closed
+            if not closed:
+                previous = self._warm.pop(key, None)
+                self._warm[key] = ssh
+                self._status[name] = PREWARM_READY
+        if closed:
+            # 预热器已关闭，没有人会取走或断开这个连接
+            ssh.disconnect()
+            return False
+        if previous is not None:
+            previous.disconnect()
+        self.logger.info(f'连接配置 {name} 已预热，耗时 '
+                         f'{ssh.last_connect_timings.get("connect_total", 0) * 1000:.0f} ms')
+        return True
+
+    def status(self, name: str) -> Optional[str]:
+        """返回配置的预热状态，未预热时返回None"""
+        with self._lock:
+            return self._status.get(name)
+
+    def take(self, connection_info: Dict) -> Optional[SSHConnection]:
+        """取走与连接信息匹配且仍然存活的预热连接
+
+        Args:
+            connection_info: 连接信息
+
+        Returns:
+            Optional[SSHConnection]: 预热的连接，没有可用的预热连接时返回None
+        """
+        with self._lock:
+            ssh = self._warm.pop(_match_key(connection_info), None)
+        if ssh is None:
+            return None
+        if not ssh.is_connected:
+            ssh.disconnect()
+            return None
+        return ssh
+
+    def close(self) -> None:
+        """断开所有未被取走的预热连接，取消尚未开始的预热任务"""
+        with self._lock:
+            self._closed = True
+            warm, self._warm = self._warm, {}
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        for ssh in warm.values():
+            ssh.disconnect()
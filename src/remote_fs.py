@@ -0,0 +1,333 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+远程文件系统浏览模块
+
+这个模块通过SFTP按需列出远程目录，为文件浏览面板提供数据，主要功能包括：
+1. 按目录缓存列表和文件属性，超过TTL后重新获取
+2. 在后台预取刚打开目录的子目录，进入子目录时直接命中缓存
+3. 在后台线程中列出目录，不阻塞界面线程
+4. 远程代理（src/agent.py）运行时改用代理列目录和获取属性，不再打开SFTP会话
+
+主要组件：
+- RemoteEntry类：目录条目
+- RemoteFileSystem类：带缓存和预取的远程目录列表
+
+前台列表和后台预取各用一个SFTP会话，预取大目录时不会阻塞用户正在打开的目录。
+连接重连后会自动重新打开SFTP会话。
+
+使用示例：
+    fs = RemoteFileSystem(ssh, ttl=30)
+    entries = fs.list_dir('/var/log')
+    future = fs.list_dir_async('/etc')
+    future.add_done_callback(lambda f: print(len(f.result())))
+
+作者：Cursor Team
+版本：0.1.0
+"""
+
+import collections
+import logging
+import posixpath
+import stat
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, NamedTuple, Optional
+
+import paramiko
+
+
+class RemoteEntry(NamedTuple):
+    """目录条目，大目录中可能有数十万个，因此使用元组以节省内存"""
+
+    name: str
+    size: int
+    mode: int
+    mtime: int
+    is_dir: bool
+    is_link: bool
+
+    @classmethod
+    def from_agent(cls, info: Dict, name: Optional[str] = None) -> 'RemoteEntry':
+        """由远程代理返回的属性字典创建条目，按lstat的mode判断类型，与SFTP一致"""
+        mode = info.get('mode') or 0
+        return cls(
+            name=name if name is not None else info['name'],
+            size=info.get('size') or 0,
+            mode=mode,
+            mtime=int(info.get('mtime') or 0),
+            is_dir=stat.S_ISDIR(mode),
+            is_link=stat.S_ISLNK(mode),
+        )
+
+    @classmethod
+    def from_attributes(cls, attr: paramiko.SFTPAttributes, name: Optional[str] = None) -> 'RemoteEntry':
+        mode = attr.st_mode or 0
+        return cls(
+            name=name if name is not None else attr.filename,
+            size=attr.st_size or 0,
+            mode=mode,
+            mtime=attr.st_mtime or 0,
+            is_dir=stat.S_ISDIR(mode),
+            is_link=stat.S_ISLNK(mode),
+        )
+
+
+class _Listing:
+    """一个目录的缓存列表"""
+
+    def __init__(self, entries: List[RemoteEntry]):
+        self.entries = entries
+        self.fetched_at = time.monotonic()
+        self._by_name: Optional[Dict[str, RemoteEntry]] = None
+
+    def find(self, name: str) -> Optional[RemoteEntry]:
+        if self._by_name is None:
+            self._by_name = {entry.name: entry for entry in self.entries}
+        return self._by_name.get(name)
+
+
+class _SFTPSession:
+    """按需打开、连接变化后自动重开的SFTP会话"""
+
+    def __init__(self, ssh):
+        self.ssh = ssh
+        self.lock = threading.Lock()
+        self._sftp: Optional[paramiko.SFTPClient] = None
+        self._transport = None
+
+    def get(self) -> paramiko.SFTPClient:
+        """返回可用的SFTP客户端，调用方需持有self.lock"""
+        if not self.ssh.is_connected:
+            raise Exception('未连接到服务器')
+        transport = self.ssh.client.get_transport()
+        if self._sftp is None or self._transport is not transport or self._sftp.get_channel().closed:
+            self.close()
+            self._sftp = self.ssh.client.open_sftp()
+            self._transport = transport
+        return self._sftp
+
+    def close(self) -> None:
+        if self._sftp is not None:
+            try:
+                self._sftp.close()
+            except Exception:
+                pass
+            self._sftp = None
+            self._transport = None
+
+
+class RemoteFileSystem:
+    """带目录缓存和子目录预取的远程文件系统
+
+    属性：
+        ssh: SSH连接管理器实例
+        ttl: 目录缓存的有效期（秒）
+        max_cached_dirs: 最多缓存的目录数，超过后淘汰最久未使用的目录
+        prefetch_limit: 每次打开目录后最多预取的子目录数
+        hits: 缓存命中次数
+        misses: 缓存未命中次数
+        prefetched: 预取的目录数
+        agent: 远程代理（RemoteAgent），运行时代替SFTP，为None或未运行时使用SFTP
+    """
+
+    def __init__(self, ssh, ttl: float = 30, max_cached_dirs: int = 256,
+                 prefetch_limit: int = 16):
+        """初始化远程文件系统
+
+        Args:
+            ssh: SSH连接管理器
+            ttl: 目录缓存的有效期（秒）
+            max_cached_dirs: 最多缓存的目录数
+            prefetch_limit: 每次打开目录后最多预取的子目录数，0表示不预取
+        """
+        self.logger = logging.getLogger('LinuxRemoteControl.RemoteFS')
+        self.ssh = ssh
+        self.ttl = ttl
+        self.max_cached_dirs = max_cached_dirs
+        self.prefetch_limit = prefetch_limit
+        self.hits = 0
+        self.misses = 0
+        self.prefetched = 0
+        self.agent = None
+
+        self._cache: 'collections.OrderedDict[str, _Listing]' = collections.OrderedDict()
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._session = _SFTPSession(ssh)
+        self._prefetch_session = _SFTPSession(ssh)
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='RemoteFS')
+        self._prefetch_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='RemoteFSPrefetch')
+        self._generation = 0
+
+    def list_dir(self, path: str, refresh: bool = False) -> List[RemoteEntry]:
+        """列出目录，目录在前、按名称排序
+
+        Args:
+            path: 远程目录的绝对路径
+            refresh: 忽略缓存重新获取
+
+        Returns:
+            List[RemoteEntry]: 目录条目列表，调用方不应修改
+
+        Raises:
+            Exception: 未连接或无法列出目录时抛出
+        """
+        path = posixpath.normpath(path)
+        with self._lock:
+            listing = None if refresh else self._fresh(path)
+            if listing is not None:
+                self.hits += 1
+                self._generation += 1
+                generation = self._generation
+            else:
+                self.misses += 1
+        if listing is None:
+            listing = self._fetch(path, self._session)
+            with self._lock:
+                self._generation += 1
+                generation = self._generation
+        self._schedule_prefetch(path, listing.entries, generation)
+        return listing.entries
+
+    def list_dir_async(self, path: str, refresh: bool = False) -> Future:
+        """在后台线程中列出目录，返回结果为条目列表的Future"""
+        return self._executor.submit(self.list_dir, path, refresh)
+
+    def stat(self, path: str, follow: bool = False) -> RemoteEntry:
+        """获取文件属性
+
+        不跟随符号链接时，父目录缓存有效则直接从缓存返回。
+
+        Args:
+            path: 远程文件路径
+            follow: 是否跟随符号链接返回目标的属性，用于判断链接是否指向目录
+        """
+        path = posixpath.normpath(path)
+        parent, name = posixpath.split(path)
+        with self._lock:
+            # 缓存中的条目是链接本身的属性，跟随链接时不能使用
+            listing = self._fresh(parent) if name and not follow else None
+            entry = listing.find(name) if listing is not None else None
+        if entry is not None:
+            return entry
+        agent = self._running_agent()
+        if agent is not None:
+            try:
+                return RemoteEntry.from_agent(agent.stat(path, follow=follow), name or path)
+            except Exception as e:
+                raise Exception(f'无法获取文件属性 {path}: {str(e)}')
+        with self._session.lock:
+            try:
+                sftp = self._session.get()
+                attr = sftp.stat(path) if follow else sftp.lstat(path)
+            except IOError as e:
+                raise Exception(f'无法获取文件属性 {path}: {str(e)}')
+        return RemoteEntry.from_attributes(attr, name or path)
+
+    def stat_async(self, path: str, follow: bool = False) -> Future:
+        """在后台线程中获取文件属性，返回结果为RemoteEntry的Future"""
+        return self._executor.submit(self.stat, path, follow)
+
+    def invalidate(self, path: Optional[str] = None) -> None:
+        """使目录缓存失效，path为None时清空全部缓存"""
+        with self._lock:
+            if path is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(posixpath.normpath(path), None)
+
+    def close(self) -> None:
+        """关闭SFTP会话并清空缓存"""
+        with self._lock:
+            self._generation += 1
+            self._cache.clear()
+        with self._session.lock:
+            self._session.close()
+        with self._prefetch_session.lock:
+            self._prefetch_session.close()
+
+    def _running_agent(self):
+        agent = self.agent
+        return agent if agent is not None and agent.is_running else None
+
+    def _fresh(self, path: str) -> Optional[_Listing]:
+        """返回未过期的缓存列表，调用方需持有self._lock"""
+        listing = self._cache.get(path)
+        if listing is None:
+            return None
+        if time.monotonic() - listing.fetched_at > self.ttl:
+            del self._cache[path]
+            return None
+        self._cache.move_to_end(path)
+        return listing
+
+    def _fetch(self, path: str, session: _SFTPSession) -> _Listing:
+        # 同一目录的并发请求（例如预取和用户打开同时发生）只获取一次
+        with self._lock:
+            future = self._inflight.get(path)
+            owner = future is None
+            if owner:
+                future = self._inflight[path] = Future()
+        if not owner:
+            return future.result()
+        try:
+            start = time.perf_counter()
+            agent = self._running_agent()
+            if agent is not None:
+                # 代理在同一个通道上并发处理请求，不需要按会话串行
+                try:
+                    entries = [RemoteEntry.from_agent(info) for info in agent.listdir(path)]
+                except Exception as e:
+                    raise Exception(f'无法列出目录 {path}: {str(e)}')
+            else:
+                with session.lock:
+                    try:
+                        entries = [RemoteEntry.from_attributes(attr)
+                                   for attr in session.get().listdir_iter(path, read_aheads=64)]
+                    except IOError as e:
+                        raise Exception(f'无法列出目录 {path}: {str(e)}')
+            entries.sort(key=lambda entry: (not entry.is_dir, entry.name))
+            listing = _Listing(entries)
+            with self._lock:
+                self._cache[path] = listing
+                self._cache.move_to_end(path)
+                while len(self._cache) > self.max_cached_dirs:
+                    self._cache.popitem(last=False)
+            self.logger.debug(f'列出目录 {path}: {len(entries)} 个条目，'
+                              f'耗时 {(time.perf_counter() - start) * 1000:.1f} ms')
+            future.set_result(listing)
+            return listing
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(path, None)
+
+    def _schedule_prefetch(self, path: str, entries: List[RemoteEntry], generation: int) -> None:
+        if not self.prefetch_limit:
+            return
+        children = []
+        for entry in entries:
+            if not entry.is_dir:
+                break
+            children.append(posixpath.join(path, entry.name))
+            if len(children) >= self.prefetch_limit:
+                break
+        for child in children:
+            self._prefetch_executor.submit(self._prefetch, child, generation)
+
+    def _prefetch(self, path: str, generation: int) -> None:
+        # 用户已经打开了别的目录时放弃旧的预取任务
+        with self._lock:
+            if generation != self._generation or self._fresh(path) is not None:
+                return
+        try:
+            self._fetch(path, self._prefetch_session)
+            with self._lock:
+                self.prefetched += 1
+        except Exception as e:
+            self.logger.debug(f'预取目录失败: {str(e)}')
@@ -9,9 +9,19 @@ SSH连接管理模块
 2. 执行远程命令
 3. 管理连接状态
 4. 处理连接错误
+5. 连接存活检测与断线自动重连
+6. 按网络环境选择传输配置档（窗口大小、压缩、算法偏好）
+7. 经跳板机（ProxyJump）连接内网主机，多个目标共享同一跳板机连接
+8. 密码、私钥和ssh-agent认证，解密后的私钥在进程内缓存
+9. 记录连接（TCP、banner、密钥交换、认证）和命令执行各阶段的耗时
+10. 校验保存的主机密钥，接管在后台预热的连接
+11. 以字节收集命令输出，按主机配置的编码解码，二进制输出可直接取原始字节
+12. 在远程主机上过滤和压缩命令输出后再传回，统计节省的传输字节数
 
 主要组件：
 - SSHConnection类：SSH连接管理器，处理所有SSH相关操作
+- JumpHostPool类：跳板机连接池，按引用计数共享已认证的跳板机传输层
+- PrivateKeyCache类：已解密私钥的内存缓存
 
 使用示例：
     ssh = SSHConnection()
@@ -34,78 +44,515 @@ SSH连接管理模块
 """
 
 import paramiko
+import base64
+import hashlib
+import hmac
 import logging
+import os
+import select
 import socket
-from typing import Dict, Tuple, Optional
+import threading
+import time
+from typing import Callable, Dict, List, Tuple, Optional
+
+from src.metrics import LatencyStats, default_latency_stats
+from src.output import DEFAULT_ENCODING, OutputBuffer, OutputFilter, StreamDecoder, check_encoding
+
+# 连接状态事件，通过add_state_listener注册的回调函数接收
+STATE_CONNECTED = 'connected'        # 连接已建立（包括重连成功）
+STATE_DISCONNECTED = 'disconnected'  # 检测到连接意外断开
+STATE_RECONNECTING = 'reconnecting'  # 正在尝试重连
+STATE_FAILED = 'failed'              # 重连失败，已放弃
+
+# 传输配置档：按网络环境调整流控窗口、最大包长、压缩和算法偏好
+#   window_size: 通道接收窗口（字节），高延迟链路上吞吐量上限约为 window_size / RTT
+#   max_packet_size: 通告给服务器的最大数据包长度（字节）
+#   compress: 是否启用zlib压缩，仅在带宽受限时有收益
+#   ciphers / kex: 优先协商的加密算法和密钥交换算法，未列出的算法仍作为后备
+TRANSPORT_PROFILES = {
+    'lan': {
+        'window_size': 4 * 1024 * 1024,
+        'max_packet_size': 32768,
+        'compress': False,
+        'ciphers': ('aes128-gcm@openssh.com', 'aes128-ctr'),
+        'kex': ('curve25519-sha256@libssh.org', 'ecdh-sha2-nistp256'),
+    },
+    'wan': {
+        'window_size': 32 * 1024 * 1024,
+        'max_packet_size': 65536,
+        'compress': False,
+        'ciphers': ('aes128-gcm@openssh.com', 'aes128-ctr'),
+        'kex': ('curve25519-sha256@libssh.org', 'ecdh-sha2-nistp256'),
+    },
+    'low_bandwidth': {
+        'window_size': 2 * 1024 * 1024,
+        'max_packet_size': 16384,
+        'compress': True,
+        'ciphers': ('aes128-gcm@openssh.com', 'aes128-ctr'),
+        'kex': ('curve25519-sha256@libssh.org', 'ecdh-sha2-nistp256'),
+    },
+}
+DEFAULT_TRANSPORT_PROFILE = 'lan'
+
+
+def _prefer(available: Tuple[str, ...], preferred: Tuple[str, ...]) -> Tuple[str, ...]:
+    """将偏好算法排到前面，保留其余算法作为后备"""
+    first = tuple(name for name in preferred if name in available)
+    return first + tuple(name for name in available if name not in first)
+
+
+class _TimedTransport(paramiko.Transport):
+    """记录握手各阶段完成时间的传输层
+
+    created_at为TCP连接建立后（或跳板机通道打开后）创建传输层的时间，
+    banner_done_at为收到服务器版本标识的时间，handshake_done_at为密钥交换完成的时间。
+    """
+
+    banner_done_at: Optional[float] = None
+    handshake_done_at: Optional[float] = None
+
+    def __init__(self, *args, **kwargs):
+        self.created_at = time.perf_counter()
+        super().__init__(*args, **kwargs)
+
+    def _check_banner(self):
+        super()._check_banner()
+        self.banner_done_at = time.perf_counter()
+
+    def start_client(self, event=None, timeout=None):
+        super().start_client(event=event, timeout=timeout)
+        self.handshake_done_at = time.perf_counter()
+
+
+def _profile_transport_factory(profile: Dict) -> Callable[..., paramiko.Transport]:
+    """创建按传输配置档初始化paramiko.Transport的工厂函数
+
+    供SSHClient.connect的transport_factory参数使用，
+    算法偏好需要在密钥交换开始之前设置。
+    """
+    def factory(sock, **kwargs) -> paramiko.Transport:
+        transport = _TimedTransport(
+            sock,
+            default_window_size=profile['window_size'],
+            default_max_packet_size=profile['max_packet_size'],
+            **kwargs
+        )
+        options = transport.get_security_options()
+        options.ciphers = _prefer(options.ciphers, profile['ciphers'])
+        options.kex = _prefer(options.kex, profile['kex'])
+        return transport
+    return factory
+
 
 class SSHConnection:
     """SSH连接管理器类
     
     处理与远程Linux服务器的SSH连接和命令执行。
     实现了连接建立、命令执行、错误处理等核心功能。
+    连接建立后由后台监控线程定期检查传输层状态，
+    一旦发现连接断开即通知监听者，并按指数退避自动重连。
     
     属性：
         client: paramiko.SSHClient实例
         logger: 日志记录器实例
+        keepalive_interval: 保活包发送及存活检查间隔（秒），0表示禁用
+        auto_reconnect: 连接断开后是否自动重连
+        max_reconnect_attempts: 每次断线最多重连次数
+        reconnect_backoff: 首次重连前的等待时间（秒），之后每次翻倍
+        max_reconnect_backoff: 重连等待时间上限（秒）
+        jump_pool: 跳板机连接池
+        key_cache: 已解密私钥缓存
+        latency_stats: 各阶段耗时的汇总统计
+        last_auth_seconds: 最近一次连接认证阶段的耗时（秒），无法测量时为None
+        last_connect_timings: 最近一次连接各阶段的耗时（秒），阶段名称见src.metrics
+        last_command_timings: 最近一次命令执行各阶段的耗时（秒）
+        last_transfer_stats: 最近一次命令的输出字节数，包含raw_bytes（命令原始输出）、
+            output_bytes（过滤和解压后）和wire_bytes（经通道传输），无法统计时为None
     """
     
-    def __init__(self):
+    def __init__(self, keepalive_interval: int = 5, auto_reconnect: bool = True,
+                 max_reconnect_attempts: int = 5, reconnect_backoff: float = 1.0,
+                 max_reconnect_backoff: float = 30.0,
+                 jump_pool: Optional['JumpHostPool'] = None,
+                 key_cache: Optional['PrivateKeyCache'] = None,
+                 latency_stats: Optional[LatencyStats] = None):
         """初始化SSH连接管理器
         
         创建日志记录器并初始化SSH客户端。
         初始状态下未建立连接。
+
+        Args:
+            keepalive_interval: 保活及存活检查间隔（秒），0表示禁用
+            auto_reconnect: 连接断开后是否自动重连
+            max_reconnect_attempts: 每次断线最多重连次数
+            reconnect_backoff: 首次重连前的等待时间（秒）
+            max_reconnect_backoff: 重连等待时间上限（秒）
+            jump_pool: 共享跳板机连接的连接池，默认使用进程级共享的default_jump_pool
+            key_cache: 已解密私钥缓存，默认使用进程级共享的default_key_cache
+            latency_stats: 连接和命令各阶段耗时的汇总统计，默认使用default_latency_stats
         """
         self.client: Optional[paramiko.SSHClient] = None
         self.logger = logging.getLogger('LinuxRemoteControl.SSH')
+        self.keepalive_interval = keepalive_interval
+        self.auto_reconnect = auto_reconnect
+        self.max_reconnect_attempts = max_reconnect_attempts
+        self.reconnect_backoff = reconnect_backoff
+        self.max_reconnect_backoff = max_reconnect_backoff
+        self.jump_pool = jump_pool if jump_pool is not None else default_jump_pool
+        self.key_cache = key_cache if key_cache is not None else default_key_cache
+        self.latency_stats = latency_stats if latency_stats is not None else default_latency_stats
+        self.last_auth_seconds: Optional[float] = None
+        self.last_connect_timings: Dict[str, float] = {}
+        self.last_command_timings: Dict[str, float] = {}
+        self.last_transfer_stats: Dict[str, Optional[int]] = {}
+
+        self._connection_info: Optional[Dict[str, str]] = None
+        self._listeners: List[Callable[[str], None]] = []
+        self._reconnect_lock = threading.Lock()
+        self._closing = threading.Event()
+        # 每次调用disconnect加一，重连完成后据此判断期间用户是否已断开连接
+        self._disconnect_count = 0
+        self._monitor_thread: Optional[threading.Thread] = None
+        self._jump_info: Optional[Dict] = None
+
+    def add_state_listener(self, callback: Callable[[str], None]) -> None:
+        """注册连接状态监听者
+
+        回调函数在后台监控线程中被调用，参数为STATE_*常量之一。
+        需要操作界面的监听者应自行切换回主线程。
+
+        Args:
+            callback: 接收状态字符串的回调函数
+        """
+        self._listeners.append(callback)
+
+    def remove_state_listener(self, callback: Callable[[str], None]) -> None:
+        """移除已注册的连接状态监听者"""
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _notify(self, state: str) -> None:
+        for callback in list(self._listeners):
+            try:
+                callback(state)
+            except Exception as e:
+                self.logger.error(f'连接状态回调执行失败: {str(e)}')
 
     def connect(self, connection_info: Dict[str, str]) -> bool:
         """建立SSH连接
 
         Args:
-            connection_info: 包含连接信息的字典，需要包含'ip'、'username'和'password'字段
+            connection_info: 包含连接信息的字典，需要包含'ip'、'username'和'password'字段，
+                可选字段'port'（默认22）、'profile'（传输配置档名称，见TRANSPORT_PROFILES）
+                'jump_host'（跳板机连接信息字典，格式与connection_info相同）、
+                'key_filename'（私钥文件路径）、'passphrase'（私钥密码短语，缺省时使用'password'）、
+                'use_agent'（是否尝试ssh-agent中的密钥）、'host_key'（保存的主机密钥，
+                格式同get_host_key，服务器密钥不一致时拒绝连接）和'encoding'（命令输出的编码，
+                默认utf-8）。使用私钥或agent时可以不提供'password'
 
         Returns:
             bool: 连接是否成功
         """
+        profile_name = connection_info.get('profile') or DEFAULT_TRANSPORT_PROFILE
+        if profile_name not in TRANSPORT_PROFILES:
+            self.logger.error(f'未知的传输配置: {profile_name}')
+            raise Exception(f'未知的传输配置: {profile_name}')
+        profile = TRANSPORT_PROFILES[profile_name]
+        port = int(connection_info.get('port') or 22)
+        if connection_info.get('encoding'):
+            check_encoding(connection_info['encoding'])
+
+        sock = None
         try:
             self.logger.info(f'正在连接到 {connection_info["ip"]}...')
-            self.logger.debug(f'连接参数: 用户名={connection_info["username"]}, IP={connection_info["ip"]}, 端口=22')
+            self.logger.debug(f'连接参数: 用户名={connection_info["username"]}, IP={connection_info["ip"]}, '
+                              f'端口={port}, 传输配置={profile_name}')
             
+            # 私钥解密单独计为key_load阶段，不计入tcp_connect
+            pkey = None
+            key_load = None
+            if connection_info.get('key_filename'):
+                key_start = time.perf_counter()
+                pkey = self.key_cache.load(
+                    connection_info['key_filename'],
+                    connection_info.get('passphrase') or connection_info.get('password')
+                )
+                key_load = time.perf_counter() - key_start
+
+            start = time.perf_counter()
+            sock = self._open_jump_channel(connection_info, port)
+
             self.client = paramiko.SSHClient()
             self.client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+            if connection_info.get('host_key'):
+                self._pin_host_key(connection_info['ip'], port, connection_info['host_key'])
             self.logger.debug('已创建SSH客户端实例，正在尝试建立连接...')
             
+            self.last_auth_seconds = None
+            self.last_connect_timings = {}
             self.client.connect(
                 connection_info['ip'],
                 username=connection_info['username'],
-                password=connection_info['password'],
+                password=connection_info.get('password') or None,
+                pkey=pkey,
                 timeout=30,  # 增加超时时间到30秒
-                port=22,    # 明确指定SSH端口
-                look_for_keys=False,  # 禁用密钥认证，仅使用密码认证
-                banner_timeout=20  # 添加banner超时设置
+                port=port,
+                allow_agent=bool(connection_info.get('use_agent')),
+                look_for_keys=False,  # 只使用明确指定的私钥，不扫描~/.ssh
+                banner_timeout=20,  # 添加banner超时设置
+                compress=profile['compress'],
+                transport_factory=_profile_transport_factory(profile),
+                sock=sock
             )
+            self._record_connect_timings(connection_info['ip'], start, key_load)
+            self._configure_transport()
             self.logger.info(f'成功连接到 {connection_info["ip"]}')
             self.logger.debug('SSH会话已建立，认证成功')
+            self._connection_info = dict(connection_info)
+            self._closing.clear()
+            self._start_monitor()
             return True
         except paramiko.AuthenticationException:
             self.logger.error(f'认证失败：用户名或密码错误 (IP: {connection_info["ip"]})')
-            self.client = None
+            self._abort_connect(sock)
             raise Exception('认证失败：用户名或密码错误')
         except socket.timeout:
             self.logger.error(f'连接超时：无法连接到服务器 (IP: {connection_info["ip"]})')
-            self.client = None
+            self._abort_connect(sock)
             raise Exception('连接超时：请检查网络连接和服务器状态')
         except paramiko.SSHException as e:
             self.logger.error(f'SSH连接错误：{str(e)} (IP: {connection_info["ip"]})')
-            self.client = None
+            self._abort_connect(sock)
             raise Exception(f'SSH连接错误：{str(e)}')
         except Exception as e:
             self.logger.error(f'连接失败：{str(e)} (IP: {connection_info["ip"]})')
-            self.client = None
+            self._abort_connect(sock)
             raise Exception(f'连接失败：{str(e)}')
 
+    def _abort_connect(self, sock: Optional[paramiko.Channel]) -> None:
+        """连接失败时关闭半开的客户端和跳板机通道，并释放跳板机引用
+
+        跳板机连接由多个目标主机共享，不关闭通道会在跳板机传输层上持续泄漏。
+        """
+        self._close_client()
+        if sock is not None:
+            try:
+                sock.close()
+            except Exception:
+                pass
+        self._release_jump_host()
+
+    def _pin_host_key(self, ip: str, port: int, host_key: str) -> None:
+        """把保存的主机密钥加入客户端，服务器密钥不一致时paramiko会拒绝连接"""
+        try:
+            key_type, key_data = host_key.split(None, 1)
+            key = paramiko.PKey.from_type_string(key_type, base64.b64decode(key_data))
+        except Exception as e:
+            raise Exception(f'保存的主机密钥无效：{str(e)}')
+        hostname = ip if port == 22 else f'[{ip}]:{port}'
+        self.client.get_host_keys().add(hostname, key.get_name(), key)
+
+    def get_host_key(self) -> Optional[str]:
+        """返回当前连接的服务器主机密钥，格式为"类型 base64数据"，未连接时返回None"""
+        if not self.is_connected:
+            return None
+        key = self.client.get_transport().get_remote_server_key()
+        return f'{key.get_name()} {key.get_base64()}'
+
+    def adopt(self, other: 'SSHConnection') -> None:
+        """接管另一个实例已建立的连接，用于使用后台预热的连接
+
+        接管后other不再持有连接，本实例按自己的保活和重连设置继续工作。
+
+        Args:
+            other: 已连接的SSH连接管理器
+
+        Raises:
+            Exception: other未连接时抛出
+        """
+        if not other.is_connected:
+            raise Exception('预热的连接已断开')
+        # 先停止other的监控线程，避免它把移交中的连接当作断线处理
+        other._closing.set()
+        monitor = other._monitor_thread
+        if monitor and monitor is not threading.current_thread():
+            monitor.join(timeout=1)
+        other._monitor_thread = None
+
+        self._close_client()
+        self._release_jump_host()
+        self.client, other.client = other.client, None
+        self._jump_info, other._jump_info = other._jump_info, None
+        self._connection_info, other._connection_info = other._connection_info, None
+        self.last_connect_timings = dict(other.last_connect_timings)
+        self.last_auth_seconds = other.last_auth_seconds
+        self._configure_transport()
+        self._closing.clear()
+        self._start_monitor()
+        self.logger.info(f'已接管到 {self._connection_info["ip"]} 的预热连接')
+
+    def _record_connect_timings(self, host: str, start: float, key_load: Optional[float] = None) -> None:
+        """根据传输层记录的时间点计算连接各阶段耗时并汇总到延迟统计
+
+        Args:
+            host: 主机地址
+            start: 开始建立TCP连接（或打开跳板机通道）的时间点
+            key_load: 加载私钥的耗时，未使用私钥文件时为None
+        """
+        end = time.perf_counter()
+        transport = self.client.get_transport()
+        points = [getattr(transport, name, None)
+                  for name in ('created_at', 'banner_done_at', 'handshake_done_at')]
+        self.last_connect_timings = {}
+        if all(isinstance(point, float) for point in points):
+            created_at, banner_done_at, handshake_done_at = points
+            self.last_connect_timings = {
+                'tcp_connect': created_at - start,
+                'banner': banner_done_at - created_at,
+                'kex': handshake_done_at - banner_done_at,
+                'auth': end - handshake_done_at,
+            }
+        # 传输层不是_TimedTransport时（如自定义工厂）只能记录总耗时
+        if key_load is not None:
+            self.last_connect_timings['key_load'] = key_load
+        self.last_connect_timings['connect_total'] = end - start + (key_load or 0)
+        self.last_auth_seconds = self.last_connect_timings.get('auth')
+        self.latency_stats.record_all(host, self.last_connect_timings)
+        self.logger.info('连接耗时: ' + ', '.join(
+            f'{phase}={seconds * 1000:.1f}ms' for phase, seconds in self.last_connect_timings.items()))
+
+    def _open_jump_channel(self, connection_info: Dict, port: int) -> Optional[paramiko.Channel]:
+        """经跳板机打开到目标主机的direct-tcpip通道
+
+        跳板机连接由jump_pool在多个SSHConnection之间共享，
+        本连接首次使用时登记引用，断开时释放。
+
+        Returns:
+            Optional[paramiko.Channel]: 作为目标连接socket的通道，未配置跳板机时返回None
+        """
+        jump_info = connection_info.get('jump_host')
+        if not jump_info:
+            return None
+        if self._jump_info is None:
+            self.jump_pool.acquire(jump_info)
+            self._jump_info = dict(jump_info)
+        self.logger.debug(f'经跳板机 {jump_info["ip"]} 连接到 {connection_info["ip"]}:{port}')
+        return self.jump_pool.open_channel(jump_info, (connection_info['ip'], port))
+
+    def _release_jump_host(self) -> None:
+        if self._jump_info is not None:
+            self.jump_pool.release(self._jump_info)
+            self._jump_info = None
+
+    def _configure_transport(self) -> None:
+        """关闭Nagle算法，并开启SSH保活包及TCP层的快速断线检测"""
+        transport = self.client.get_transport()
+        if transport is None:
+            return
+        sock = getattr(transport, 'sock', None)
+        if isinstance(sock, socket.socket):
+            # 打开通道、申请pty、exec等请求都是小包，Nagle算法与对端的延迟确认叠加
+            # 会让每条命令多等约40ms
+            try:
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            except OSError as e:
+                self.logger.debug(f'设置TCP_NODELAY失败: {str(e)}')
+        if not self.keepalive_interval:
+            return
+        transport.set_keepalive(self.keepalive_interval)
+
+        if not isinstance(sock, socket.socket):
+            return
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+            if hasattr(socket, 'TCP_KEEPIDLE'):
+                interval = max(1, int(self.keepalive_interval))
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, interval)
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, interval)
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPCNT, 3)
+            if hasattr(socket, 'TCP_USER_TIMEOUT'):
+                # 已发送数据长时间得不到确认时由内核直接判定连接失效
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_USER_TIMEOUT,
+                                int(self.keepalive_interval * 3 * 1000))
+        except OSError as e:
+            self.logger.debug(f'设置TCP保活参数失败: {str(e)}')
+
+    def _start_monitor(self) -> None:
+        if not self.keepalive_interval:
+            return
+        if self._monitor_thread and self._monitor_thread.is_alive():
+            return
+        self._monitor_thread = threading.Thread(
+            target=self._monitor_loop,
+            name='SSHConnectionMonitor',
+            daemon=True
+        )
+        self._monitor_thread.start()
+
+    def _monitor_loop(self) -> None:
+        """后台监控线程：定期检查传输层是否存活"""
+        while not self._closing.wait(self.keepalive_interval):
+            if self.is_connected:
+                continue
+            self.logger.warning('检测到SSH连接已断开')
+            self._notify(STATE_DISCONNECTED)
+            if not self.auto_reconnect or not self.reconnect():
+                break
+
+    def reconnect(self) -> bool:
+        """使用上次的连接信息重新建立连接
+
+        按指数退避重试，最多尝试max_reconnect_attempts次。
+        多个线程同时调用时只会进行一轮重连。
+
+        Returns:
+            bool: 重连是否成功
+        """
+        disconnect_count = self._disconnect_count
+        connection_info = self._connection_info
+        if connection_info is None:
+            return False
+        with self._reconnect_lock:
+            if self.is_connected:
+                return True
+            self._notify(STATE_RECONNECTING)
+            delay = self.reconnect_backoff
+            for attempt in range(1, self.max_reconnect_attempts + 1):
+                if self._closing.wait(delay) or disconnect_count != self._disconnect_count:
+                    return False
+                self.logger.info(f'正在进行第 {attempt} 次重连...')
+                self._close_client()
+                try:
+                    self.connect(connection_info)
+                except Exception as e:
+                    self.logger.warning(f'第 {attempt} 次重连失败: {str(e)}')
+                    delay = min(delay * 2, self.max_reconnect_backoff)
+                    continue
+                if disconnect_count != self._disconnect_count:
+                    # 重连过程中用户断开了连接，关闭刚建立的连接，不恢复会话
+                    self.logger.info('重连期间连接已被断开，关闭新建立的连接')
+                    self.disconnect()
+                    return False
+                self.logger.info('重连成功')
+                self._notify(STATE_CONNECTED)
+                return True
+            self.logger.error(f'重连 {self.max_reconnect_attempts} 次后仍然失败，放弃重连')
+            self._notify(STATE_FAILED)
+            return False
+
+    def _close_client(self) -> None:
+        if self.client:
+            try:
+                self.client.close()
+            except Exception:
+                pass
+            self.client = None
+
     def disconnect(self) -> None:
         """断开SSH连接"""
+        self._disconnect_count += 1
+        self._closing.set()
+        self._connection_info = None
         if self.client:
             try:
                 self.logger.info('正在断开SSH连接...')
@@ -115,42 +562,138 @@ class SSHConnection:
                 self.logger.error(f'断开连接时发生错误：{str(e)}')
             finally:
                 self.client = None
+        self._release_jump_host()
+        monitor = self._monitor_thread
+        if monitor and monitor is not threading.current_thread():
+            monitor.join(timeout=1)
+        self._monitor_thread = None
 
-    def execute_command(self, command: str) -> Tuple[str, str]:
+    @property
+    def encoding(self) -> str:
+        """当前连接命令输出的编码"""
+        connection_info = self._connection_info
+        return (connection_info or {}).get('encoding') or DEFAULT_ENCODING
+
+    def execute_command(self, command: str, retry: bool = False, timeout: float = 30,
+                        output_filter: Optional[OutputFilter] = None) -> Tuple[str, str]:
         """执行远程命令
 
+        输出按连接信息中的'encoding'解码，无法解码的字节替换为U+FFFD。
+
         Args:
             command: 要执行的命令
+            retry: 命令因连接中断而失败时，是否在重连后重新执行一次。
+                仅应对幂等命令开启
+            timeout: 等待新输出的超时时间（秒），远程过滤时可能长时间没有输出，需相应调大
+            output_filter: 在远程主机上过滤和压缩输出，指定时不分配伪终端，
+                标准错误单独返回，传输统计见last_transfer_stats
 
         Returns:
             Tuple[str, str]: (标准输出, 标准错误)
         """
+        encoding = self.encoding
+        output, error = self.execute_command_raw(command, retry, timeout, output_filter)
+        return (StreamDecoder(encoding).decode(output, final=True),
+                StreamDecoder(encoding).decode(error, final=True))
+
+    def execute_command_raw(self, command: str, retry: bool = False, timeout: float = 30,
+                            output_filter: Optional[OutputFilter] = None) -> Tuple[memoryview, memoryview]:
+        """执行远程命令并返回未解码的输出
+
+        Args:
+            command: 要执行的命令
+            retry: 同execute_command
+            timeout: 同execute_command
+            output_filter: 同execute_command
+
+        Returns:
+            Tuple[memoryview, memoryview]: (标准输出, 标准错误)，直接引用接收缓冲区，
+                需要bytes时调用tobytes()
+        """
+        if retry and not self.is_connected:
+            self.reconnect()
+        try:
+            return self._execute_command(command, timeout, output_filter)
+        except Exception:
+            if not retry or self.is_connected or not self.reconnect():
+                raise
+            self.logger.warning(f'连接中断，重连后重新执行命令: {command}')
+            return self._execute_command(command, timeout, output_filter)
+
+    def _execute_command(self, command: str, timeout: float = 30,
+                         output_filter: Optional[OutputFilter] = None) -> Tuple[memoryview, memoryview]:
         if not self.is_connected:
             self.logger.error('尝试在未连接状态下执行命令')
             raise Exception('未连接到服务器')
+        # 其他线程可能在命令执行期间断开连接并清空连接信息，先记下主机地址
+        host = (self._connection_info or {}).get('ip')
 
         try:
             self.logger.debug(f'准备执行命令: {command}')
+            start = time.perf_counter()
+            receiver = output_filter.receiver() if output_filter else None
             stdin, stdout, stderr = self.client.exec_command(
-                command,
-                timeout=30,  # 设置命令执行超时时间
-                get_pty=True  # 获取伪终端，以支持交互式命令
+                output_filter.wrap(command) if output_filter else command,
+                timeout=timeout,  # 设置命令执行超时时间
+                # 获取伪终端，以支持交互式命令；过滤输出时不分配，避免伪终端改写压缩数据
+                get_pty=output_filter is None
             )
+            timings = {'channel_open': time.perf_counter() - start}
             self.logger.debug('命令已发送，等待执行结果...')
 
-            # 读取命令输出
-            output = stdout.read().decode('utf-8')
-            error = stderr.read().decode('utf-8')
+            # 读取命令输出，按块读取以记录首字节和末字节时间
+            output = receiver.output if receiver else OutputBuffer()
+            received = 0
+            if receiver:
+                # 不分配伪终端时标准错误是单独的流，必须与标准输出同时读取，
+                # 否则标准错误填满通道窗口后远程命令阻塞，标准输出永远读不到结束
+                error_buffer = OutputBuffer(4096)
+                for data, is_stderr in self._read_streams(stdout.channel, timeout):
+                    if is_stderr:
+                        error_buffer.append(data)
+                        continue
+                    if not received:
+                        timings['first_byte'] = time.perf_counter() - start
+                    received += len(data)
+                    receiver.feed(data)
+            else:
+                # 伪终端把标准错误合并到标准输出
+                while True:
+                    chunk = stdout.channel.recv(65536)
+                    if not chunk:
+                        break
+                    if not received:
+                        timings['first_byte'] = time.perf_counter() - start
+                    received += len(chunk)
+                    output.append(chunk)
+            timings['last_byte'] = time.perf_counter() - start
+            if receiver:
+                output_view, error_data = receiver.finish(error_buffer.getbuffer())
+                error = memoryview(error_data)
+                self.last_transfer_stats = receiver.stats
+                raw_bytes = receiver.raw_bytes if receiver.raw_bytes is not None else '未知'
+                self.logger.info(f'过滤命令输出: 原始 {raw_bytes} 字节，过滤后 {output.size} 字节，'
+                                 f'传输 {received} 字节')
+            else:
+                output_view = output.getbuffer()
+                error = memoryview(stderr.read())
+                self.last_transfer_stats = {'raw_bytes': received, 'output_bytes': received,
+                                            'wire_bytes': received}
             exit_status = stdout.channel.recv_exit_status()
+            timings['exit_status'] = timings['command_total'] = time.perf_counter() - start
+            self.last_command_timings = timings
+            if host is not None:
+                self.latency_stats.record_all(host, timings)
 
-            self.logger.debug(f'命令执行完成，退出状态码: {exit_status}')
+            self.logger.debug(f'命令执行完成，退出状态码: {exit_status}，输出 {output.size} 字节')
             if exit_status != 0:
                 self.logger.warning(f'命令执行返回非零状态码: {exit_status}')
-                self.logger.debug(f'错误输出: {error}')
+                if error and self.logger.isEnabledFor(logging.DEBUG):
+                    self.logger.debug(f'错误输出: {StreamDecoder(self.encoding).decode(error, final=True)}')
             else:
                 self.logger.debug('命令执行成功')
 
-            return output, error
+            return output_view, error
 
         except socket.timeout:
             self.logger.error('命令执行超时')
@@ -162,11 +705,206 @@ class SSHConnection:
             self.logger.error(f'执行命令时发生未知错误: {str(e)}')
             raise
 
+    @staticmethod
+    def _read_streams(channel: paramiko.Channel, timeout: float):
+        """同时读取通道的标准输出和标准错误，逐块产生(数据, 是否为标准错误)
+
+        超过timeout秒两个流都没有新数据时抛出socket.timeout。
+        """
+        channel.settimeout(0.0)
+        stdout_eof = stderr_eof = False
+        while not (stdout_eof and stderr_eof):
+            progressed = False
+            for is_stderr, recv in ((False, channel.recv), (True, channel.recv_stderr)):
+                if stderr_eof if is_stderr else stdout_eof:
+                    continue
+                try:
+                    data = recv(65536)
+                except socket.timeout:
+                    continue
+                if not data:
+                    if is_stderr:
+                        stderr_eof = True
+                    else:
+                        stdout_eof = True
+                    continue
+                progressed = True
+                yield data, is_stderr
+            # 通道的fileno在任一流有数据或收到EOF时可读
+            if not progressed and not (stdout_eof and stderr_eof) \
+                    and not select.select([channel], [], [], timeout)[0]:
+                raise socket.timeout()
+
     @property
     def is_connected(self) -> bool:
         """检查是否已连接
 
+        不仅检查客户端实例是否存在，还检查底层传输层是否仍处于活动状态。
+
         Returns:
             bool: 是否已连接
         """
-        return self.client is not None
\ No newline at end of file
+        if self.client is None:
+            return False
+        transport = self.client.get_transport()
+        return transport is not None and bool(transport.is_active())
+
+
+class _JumpHostEntry:
+    """连接池中的单个跳板机条目"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.connection = SSHConnection(auto_reconnect=False)
+        self.refs = 0
+
+
+class JumpHostPool:
+    """跳板机连接池
+
+    按(ip, 端口, 用户名)共享已认证的跳板机连接。所有经同一跳板机的目标主机
+    都在这一条传输层上打开direct-tcpip通道，因此向大量内网主机扇出时
+    只需要登录跳板机一次。跳板机在首次打开通道时才建立连接，断开后会在下次
+    打开通道时重新建立，最后一个使用者释放后关闭。
+    跳板机连接信息本身也可以包含'jump_host'，从而实现多级跳板。
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger('LinuxRemoteControl.SSH.JumpHost')
+        self._lock = threading.Lock()
+        self._entries: Dict[Tuple[str, int, str], _JumpHostEntry] = {}
+
+    @staticmethod
+    def _key(jump_info: Dict) -> Tuple[str, int, str]:
+        return jump_info['ip'], int(jump_info.get('port') or 22), jump_info['username']
+
+    def acquire(self, jump_info: Dict) -> None:
+        """登记一个跳板机使用者"""
+        with self._lock:
+            entry = self._entries.setdefault(self._key(jump_info), _JumpHostEntry())
+            entry.refs += 1
+
+    def release(self, jump_info: Dict) -> None:
+        """注销一个跳板机使用者，最后一个使用者释放时关闭跳板机连接"""
+        with self._lock:
+            key = self._key(jump_info)
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            entry.refs -= 1
+            if entry.refs > 0:
+                return
+            del self._entries[key]
+        self.logger.info(f'跳板机 {key[0]} 已无使用者，关闭连接')
+        entry.connection.disconnect()
+
+    def open_channel(self, jump_info: Dict, destination: Tuple[str, int],
+                     timeout: float = 30) -> paramiko.Channel:
+        """在共享的跳板机传输层上打开到目标地址的direct-tcpip通道
+
+        Args:
+            jump_info: 跳板机连接信息，需先通过acquire登记
+            destination: 目标主机(地址, 端口)
+            timeout: 打开通道的超时时间（秒）
+
+        Returns:
+            paramiko.Channel: 可作为目标SSH连接socket使用的通道
+        """
+        with self._lock:
+            entry = self._entries.get(self._key(jump_info))
+        if entry is None:
+            raise Exception(f'跳板机 {jump_info["ip"]} 未登记')
+        with entry.lock:
+            if not entry.connection.is_connected:
+                # 先关闭已断开的旧连接，再重新登录
+                entry.connection.disconnect()
+                self.logger.info(f'正在登录跳板机 {jump_info["ip"]}...')
+                entry.connection.connect(jump_info)
+            transport = entry.connection.client.get_transport()
+        return transport.open_channel('direct-tcpip', destination, ('127.0.0.1', 0),
+                                      timeout=timeout)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class PrivateKeyCache:
+    """已解密私钥的内存缓存
+
+    按(绝对路径, 修改时间)缓存解密后的paramiko.PKey对象，
+    向上千台主机扇出时同一个带密码短语的私钥只需解析和解密一次。
+    私钥文件被修改后缓存自动失效。缓存只保存在当前进程内存中。
+
+    缓存项同时保存密码短语的加盐摘要，命中时密码短语不一致按未命中处理，
+    重新从文件解密，错误的密码短语不能取得已缓存的私钥。
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger('LinuxRemoteControl.SSH.Keys')
+        self._lock = threading.Lock()
+        # (路径, 修改时间) -> (私钥, 盐, 密码短语摘要)
+        self._keys: Dict[Tuple[str, int], Tuple[paramiko.PKey, bytes, bytes]] = {}
+        self._loading: Dict[str, threading.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _digest(salt: bytes, secret: Optional[bytes]) -> bytes:
+        return hmac.new(salt, secret or b'', hashlib.sha256).digest()
+
+    def load(self, path: str, passphrase: Optional[str] = None) -> paramiko.PKey:
+        """加载私钥，命中缓存且密码短语一致时直接返回已解密的密钥对象
+
+        Args:
+            path: 私钥文件路径
+            passphrase: 私钥密码短语，未加密的私钥可为None
+
+        Returns:
+            paramiko.PKey: 解密后的私钥
+        """
+        path = os.path.abspath(os.path.expanduser(path))
+        try:
+            key = (path, os.stat(path).st_mtime_ns)
+        except OSError as e:
+            raise Exception(f'无法读取私钥文件 {path}: {e.strerror}')
+        secret = passphrase.encode('utf-8') if isinstance(passphrase, str) else passphrase
+
+        with self._lock:
+            loading = self._loading.setdefault(path, threading.Lock())
+        # 同一私钥并发加载时只让一个线程解密，其余线程等待后命中缓存
+        with loading:
+            with self._lock:
+                cached = self._keys.get(key)
+                if cached is not None:
+                    pkey, salt, digest = cached
+                    if hmac.compare_digest(digest, self._digest(salt, secret)):
+                        self.hits += 1
+                        return pkey
+                self.misses += 1
+            start = time.perf_counter()
+            try:
+                pkey = paramiko.PKey.from_path(path, secret)
+            except (paramiko.PasswordRequiredException, TypeError) as e:
+                if passphrase:
+                    raise Exception(f'无法加载私钥 {path}: {str(e)}')
+                raise Exception('私钥已加密，请提供密码短语')
+            except (paramiko.SSHException, ValueError) as e:
+                raise Exception(f'无法加载私钥 {path}: {str(e)}')
+            self.logger.debug(f'已加载私钥 {path}，耗时 {(time.perf_counter() - start) * 1000:.1f} ms')
+            salt = os.urandom(16)
+            with self._lock:
+                for stale in [k for k in self._keys if k[0] == path]:
+                    del self._keys[stale]
+                self._keys[key] = (pkey, salt, self._digest(salt, secret))
+            return pkey
+
+    def clear(self) -> None:
+        """清空缓存中的所有私钥"""
+        with self._lock:
+            self._keys.clear()
+
+
+# 进程级共享的跳板机连接池，SSHConnection默认使用
+default_jump_pool = JumpHostPool()
+# 进程级共享的私钥缓存，SSHConnection默认使用
+default_key_cache = PrivateKeyCache()
@@ -9,9 +9,16 @@
 2. 提供连接设置界面
 3. 实现命令输入和输出显示
 4. 处理用户交互事件
+5. 管理端口转发并显示每条转发的字节计数
+6. 显示连接和命令各阶段的延迟统计
+7. 提供界面性能分析开关
+8. 浏览远程文件系统，大目录使用只渲染可见行的虚拟列表
+9. 选择、保存和删除连接配置
+10. 按主机选择命令输出的编码
 
 主要组件：
 - RemoteControlUI类：主界面类，实现所有GUI相关功能
+- VirtualListView类：只渲染可见行的列表控件
 
 使用示例：
     root = tk.Tk()
@@ -33,7 +40,185 @@
 import tkinter as tk
 from tkinter import ttk
 from tkinter import messagebox
+from tkinter import filedialog
+from tkinter import simpledialog
 import logging
+import posixpath
+import stat
+import time
+
+from src.output import DEFAULT_ENCODING
+
+# 编码下拉列表中的常用编码
+OUTPUT_ENCODINGS = ('utf-8', 'gbk', 'gb18030', 'big5', 'latin-1')
+
+
+def _format_bytes(size):
+    """把字节数格式化为便于阅读的字符串"""
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024 or unit == 'GB':
+            return f'{size:.0f} {unit}' if unit == 'B' else f'{size:.1f} {unit}'
+        size /= 1024
+
+
+def _format_ms(seconds):
+    """把秒格式化为毫秒字符串，无数据时显示-"""
+    return '-' if seconds is None else f'{seconds * 1000:.1f}'
+
+class VirtualListView(ttk.Frame):
+    """只渲染可见行的列表控件
+
+    Treeview插入十万行需要数秒并占用大量内存，这里Treeview只保留一屏的行，
+    滚动时替换这些行的内容，渲染开销与条目总数无关。
+
+    属性：
+        items: 全部条目
+        offset: 第一个可见行对应的条目下标
+        visible_rows: 可见行数
+        selected_index: 选中条目的下标，未选中时为None
+    """
+
+    def __init__(self, master, columns, headings, widths, format_row, on_activate=None, height=20):
+        """初始化虚拟列表
+
+        Args:
+            master: 父控件
+            columns: 列标识
+            headings: 列标题
+            widths: 列宽
+            format_row: 把条目转换为各列显示值的函数
+            on_activate: 双击或回车时的回调函数，参数为选中的条目
+            height: 初始可见行数
+        """
+        super().__init__(master)
+        self.format_row = format_row
+        self.on_activate = on_activate
+        self.items = []
+        self.offset = 0
+        self.visible_rows = height
+        self.selected_index = None
+
+        self.tree = ttk.Treeview(self, columns=columns, show='headings', height=height,
+                                 selectmode='none')
+        for column, heading, width in zip(columns, headings, widths):
+            self.tree.heading(column, text=heading)
+            self.tree.column(column, width=width)
+        self.scrollbar = ttk.Scrollbar(self, orient='vertical', command=self._on_scroll)
+        self.tree.grid(row=0, column=0, sticky='nsew')
+        self.scrollbar.grid(row=0, column=1, sticky='ns')
+        self.rowconfigure(0, weight=1)
+        self.columnconfigure(0, weight=1)
+
+        self.tree.bind('<Configure>', self._on_configure)
+        self.tree.bind('<MouseWheel>', lambda event: self._scroll_by(-3 if event.delta > 0 else 3))
+        self.tree.bind('<Button-4>', lambda event: self._scroll_by(-3))
+        self.tree.bind('<Button-5>', lambda event: self._scroll_by(3))
+        self.tree.bind('<Button-1>', self._on_click)
+        self.tree.bind('<Double-1>', lambda event: self._activate())
+        self.tree.bind('<Return>', lambda event: self._activate())
+        self.tree.bind('<Up>', lambda event: self._move_selection(-1))
+        self.tree.bind('<Down>', lambda event: self._move_selection(1))
+        self.tree.bind('<Prior>', lambda event: self._move_selection(-self.visible_rows))
+        self.tree.bind('<Next>', lambda event: self._move_selection(self.visible_rows))
+        self.tree.bind('<Home>', lambda event: self._move_selection(-len(self.items)))
+        self.tree.bind('<End>', lambda event: self._move_selection(len(self.items)))
+
+    def set_items(self, items):
+        """替换全部条目并滚动到顶部"""
+        self.items = items
+        self.offset = 0
+        self.selected_index = None
+        self._render()
+
+    def get_selected(self):
+        """返回选中的条目，未选中时返回None"""
+        if self.selected_index is None or self.selected_index >= len(self.items):
+            return None
+        return self.items[self.selected_index]
+
+    def scroll_to(self, offset):
+        """滚动到使第offset个条目位于第一行"""
+        self.offset = max(0, min(offset, len(self.items) - self.visible_rows))
+        self._render()
+
+    def _scroll_by(self, rows):
+        self.scroll_to(self.offset + rows)
+        return 'break'
+
+    def _on_scroll(self, *args):
+        if args[0] == 'moveto':
+            self.scroll_to(int(float(args[1]) * len(self.items)))
+        elif args[0] == 'scroll':
+            step = self.visible_rows if args[2] == 'pages' else 1
+            self._scroll_by(int(args[1]) * step)
+
+    def _on_configure(self, event):
+        row_height = ttk.Style().lookup('Treeview', 'rowheight') or 20
+        # 减去标题行高度
+        rows = max(1, (event.height - int(row_height) - 4) // int(row_height))
+        if rows != self.visible_rows:
+            self.visible_rows = rows
+            self.scroll_to(self.offset)
+
+    def _on_click(self, event):
+        row = self.tree.identify_row(event.y)
+        if row:
+            self.selected_index = self.offset + self.tree.index(row)
+            self._render()
+        self.tree.focus_set()
+
+    def _move_selection(self, delta):
+        if not self.items:
+            return 'break'
+        index = 0 if self.selected_index is None else self.selected_index + delta
+        self.selected_index = max(0, min(index, len(self.items) - 1))
+        if self.selected_index < self.offset:
+            self.offset = self.selected_index
+        elif self.selected_index >= self.offset + self.visible_rows:
+            self.offset = self.selected_index - self.visible_rows + 1
+        self._render()
+        return 'break'
+
+    def _activate(self):
+        item = self.get_selected()
+        if item is not None and self.on_activate is not None:
+            self.on_activate(item)
+        return 'break'
+
+    def _render(self):
+        rows = self.tree.get_children()
+        count = max(0, min(self.visible_rows, len(self.items) - self.offset))
+        for row in range(count):
+            values = self.format_row(self.items[self.offset + row])
+            if row < len(rows):
+                self.tree.item(rows[row], values=values)
+            else:
+                self.tree.insert('', 'end', iid=f'row{row}', values=values)
+        if len(rows) > count:
+            self.tree.delete(*rows[count:])
+
+        selected_row = None if self.selected_index is None else self.selected_index - self.offset
+        if selected_row is not None and 0 <= selected_row < count:
+            self.tree.selection_set(f'row{selected_row}')
+        else:
+            self.tree.selection_set(())
+
+        if self.items:
+            self.scrollbar.set(self.offset / len(self.items),
+                               min(1.0, (self.offset + count) / len(self.items)))
+        else:
+            self.scrollbar.set(0, 1)
+
+
+def _format_entry(entry):
+    """把远程目录条目转换为文件浏览列表的显示值"""
+    return (
+        entry.name + ('/' if entry.is_dir else ''),
+        '' if entry.is_dir else _format_bytes(entry.size),
+        time.strftime('%Y-%m-%d %H:%M', time.localtime(entry.mtime)),
+        stat.filemode(entry.mode)
+    )
+
 
 class RemoteControlUI:
     """Linux远程控制客户端图形界面类
@@ -45,8 +230,21 @@ class RemoteControlUI:
         root: Tkinter主窗口实例
         logger: 日志记录器实例
     """
+
+    # 连接状态事件对应的状态标签文本和颜色
+    _CONNECTION_STATES = {
+        'connected': ('已连接', 'green'),
+        'disconnected': ('连接中断', 'red'),
+        'reconnecting': ('正在重连...', 'orange'),
+        'failed': ('重连失败', 'red'),
+    }
     
-    def __init__(self, root, on_connect, on_disconnect, on_send_command):
+    def __init__(self, root, on_connect, on_disconnect, on_send_command,
+                 on_add_tunnel=None, on_remove_tunnel=None,
+                 on_request_stats=None, on_export_stats=None,
+                 on_toggle_profiler=None, on_list_dir=None,
+                 on_select_profile=None, on_save_profile=None, on_delete_profile=None,
+                 on_stat_path=None):
         """初始化图形界面
         
         Args:
@@ -54,6 +252,18 @@ class RemoteControlUI:
             on_connect: 连接按钮回调函数
             on_disconnect: 断开连接回调函数
             on_send_command: 发送命令回调函数
+            on_add_tunnel: 添加端口转发回调函数，参数为转发配置字典
+            on_remove_tunnel: 删除端口转发回调函数，参数为转发编号
+            on_request_stats: 获取延迟统计的回调函数，返回{主机: {阶段: 统计摘要}}
+            on_export_stats: 导出Prometheus文本文件的回调函数，返回文件路径
+            on_toggle_profiler: 开始或停止性能分析的回调函数，参数为是否开始
+            on_list_dir: 列出远程目录的回调函数，参数为(路径, 是否忽略缓存, 完成回调)，
+                完成回调需在Tk主线程中以(路径, 条目列表, 错误信息)调用
+            on_select_profile: 选择连接配置的回调函数，参数为配置名称，返回连接信息字典
+            on_save_profile: 保存连接配置的回调函数，参数为(配置名称, 连接信息, 是否启动时预热)
+            on_delete_profile: 删除连接配置的回调函数，参数为配置名称
+            on_stat_path: 跟随符号链接获取文件属性的回调函数，参数为(路径, 完成回调)，
+                完成回调需在Tk主线程中以(路径, 目标条目, 错误信息)调用
         """
         self.logger = logging.getLogger('LinuxRemoteControl.UI')
         self.root = root
@@ -65,9 +275,26 @@ class RemoteControlUI:
         self.on_connect = on_connect
         self.on_disconnect = on_disconnect
         self.on_send_command = on_send_command
+        self.on_add_tunnel = on_add_tunnel
+        self.on_remove_tunnel = on_remove_tunnel
+        self.on_request_stats = on_request_stats
+        self.on_export_stats = on_export_stats
+        self.on_toggle_profiler = on_toggle_profiler
+        self.on_list_dir = on_list_dir
+        self.on_select_profile = on_select_profile
+        self.on_save_profile = on_save_profile
+        self.on_delete_profile = on_delete_profile
+        self.on_stat_path = on_stat_path
+        self.selected_profile = None
+        self.stats_window = None
+        self.profiling = False
+        self.browser_window = None
+        self.browser_path = '/'
+        self._browse_generation = 0
 
         self._init_connection_frame()
         self._init_terminal_frame()
+        self._init_forwarding_frame()
 
     def _init_connection_frame(self):
         self.connection_frame = ttk.LabelFrame(self.root, text='连接设置', padding='10')
@@ -96,6 +323,48 @@ class RemoteControlUI:
         self.connect_btn = ttk.Button(self.connection_frame, text='连接', command=self._handle_connect)
         self.connect_btn.grid(row=0, column=6, padx=5)
 
+        # 私钥文件输入，填写私钥时密码框作为私钥密码短语使用
+        ttk.Label(self.connection_frame, text='私钥:').grid(row=1, column=0, padx=5, pady=(5, 0))
+        self.key_entry = ttk.Entry(self.connection_frame)
+        self.key_entry.grid(row=1, column=1, padx=5, pady=(5, 0))
+        self.key_browse_btn = ttk.Button(self.connection_frame, text='浏览...',
+                                         command=self._handle_browse_key)
+        self.key_browse_btn.grid(row=1, column=2, padx=5, pady=(5, 0))
+
+        # ssh-agent认证开关
+        self.use_agent_var = tk.BooleanVar(value=False)
+        self.use_agent_check = ttk.Checkbutton(self.connection_frame, text='使用ssh-agent',
+                                               variable=self.use_agent_var)
+        self.use_agent_check.grid(row=1, column=3, padx=5, pady=(5, 0), sticky='w')
+
+        # 命令输出编码，可直接输入其他编码名称
+        ttk.Label(self.connection_frame, text='编码:').grid(row=1, column=4, padx=5, pady=(5, 0))
+        self.encoding_combo = ttk.Combobox(self.connection_frame, values=OUTPUT_ENCODINGS)
+        self.encoding_combo.set(DEFAULT_ENCODING)
+        self.encoding_combo.grid(row=1, column=5, padx=5, pady=(5, 0))
+
+        # 连接配置选择
+        ttk.Label(self.connection_frame, text='配置:').grid(row=2, column=0, padx=5, pady=(5, 0))
+        self.profile_combo = ttk.Combobox(self.connection_frame, state='readonly')
+        self.profile_combo.grid(row=2, column=1, padx=5, pady=(5, 0))
+        self.profile_combo.bind('<<ComboboxSelected>>', lambda event: self._handle_select_profile())
+        self.save_profile_btn = ttk.Button(self.connection_frame, text='保存配置',
+                                           command=self._handle_save_profile)
+        self.save_profile_btn.grid(row=2, column=2, padx=5, pady=(5, 0))
+        self.delete_profile_btn = ttk.Button(self.connection_frame, text='删除配置',
+                                             command=self._handle_delete_profile)
+        self.delete_profile_btn.grid(row=2, column=3, padx=5, pady=(5, 0), sticky='w')
+        self.prewarm_var = tk.BooleanVar(value=False)
+        self.prewarm_check = ttk.Checkbutton(self.connection_frame, text='启动时预热',
+                                             variable=self.prewarm_var)
+        self.prewarm_check.grid(row=2, column=4, padx=5, pady=(5, 0), sticky='w')
+
+        # 远程代理模式开关，开启后命令和目录浏览经常驻的远程辅助进程执行
+        self.remote_agent_var = tk.BooleanVar(value=False)
+        self.remote_agent_check = ttk.Checkbutton(self.connection_frame, text='远程代理模式',
+                                                  variable=self.remote_agent_var)
+        self.remote_agent_check.grid(row=2, column=5, padx=5, pady=(5, 0), sticky='w')
+
     def _init_terminal_frame(self):
         self.terminal_frame = ttk.LabelFrame(self.root, text='终端', padding='10')
         self.terminal_frame.pack(fill='both', expand=True, padx=10, pady=5)
@@ -112,18 +381,70 @@ class RemoteControlUI:
         self.command_entry = ttk.Entry(self.command_frame)
         self.command_entry.pack(side='left', fill='x', expand=True)
 
+        # 文件浏览按钮
+        self.browser_btn = ttk.Button(self.command_frame, text='文件浏览', command=self.open_browser_window)
+        self.browser_btn.pack(side='right', padx=5)
+
+        # 性能分析开关
+        self.profile_btn = ttk.Button(self.command_frame, text='性能分析', command=self._handle_toggle_profiler)
+        self.profile_btn.pack(side='right', padx=5)
+
+        # 延迟统计按钮
+        self.stats_btn = ttk.Button(self.command_frame, text='延迟统计', command=self.open_stats_window)
+        self.stats_btn.pack(side='right', padx=5)
+
         # 发送按钮
         self.send_btn = ttk.Button(self.command_frame, text='发送', command=self._handle_send_command)
         self.send_btn.pack(side='right', padx=5)
 
+    def _init_forwarding_frame(self):
+        self.forwarding_frame = ttk.LabelFrame(self.root, text='端口转发', padding='10')
+        self.forwarding_frame.pack(fill='x', padx=10, pady=5)
+
+        # 转发配置输入
+        self.tunnel_input_frame = ttk.Frame(self.forwarding_frame)
+        self.tunnel_input_frame.pack(fill='x')
+
+        self.tunnel_kind_combo = ttk.Combobox(self.tunnel_input_frame, values=('本地', '远程'),
+                                              state='readonly', width=6)
+        self.tunnel_kind_combo.current(0)
+        self.tunnel_kind_combo.pack(side='left', padx=5)
+
+        ttk.Label(self.tunnel_input_frame, text='监听端口:').pack(side='left')
+        self.tunnel_bind_port_entry = ttk.Entry(self.tunnel_input_frame, width=8)
+        self.tunnel_bind_port_entry.pack(side='left', padx=5)
+
+        ttk.Label(self.tunnel_input_frame, text='目标主机:').pack(side='left')
+        self.tunnel_target_host_entry = ttk.Entry(self.tunnel_input_frame, width=16)
+        self.tunnel_target_host_entry.pack(side='left', padx=5)
+
+        ttk.Label(self.tunnel_input_frame, text='目标端口:').pack(side='left')
+        self.tunnel_target_port_entry = ttk.Entry(self.tunnel_input_frame, width=8)
+        self.tunnel_target_port_entry.pack(side='left', padx=5)
+
+        self.add_tunnel_btn = ttk.Button(self.tunnel_input_frame, text='添加',
+                                         command=self._handle_add_tunnel)
+        self.add_tunnel_btn.pack(side='left', padx=5)
+        self.remove_tunnel_btn = ttk.Button(self.tunnel_input_frame, text='删除',
+                                            command=self._handle_remove_tunnel)
+        self.remove_tunnel_btn.pack(side='left', padx=5)
+
+        # 转发列表及字节计数
+        columns = ('kind', 'bind', 'target', 'connections', 'sent', 'received')
+        self.tunnel_tree = ttk.Treeview(self.forwarding_frame, columns=columns,
+                                        show='headings', height=3)
+        for column, heading, width in zip(
+                columns,
+                ('类型', '监听', '目标', '连接数', '发送', '接收'),
+                (60, 140, 160, 70, 90, 90)):
+            self.tunnel_tree.heading(column, text=heading)
+            self.tunnel_tree.column(column, width=width)
+        self.tunnel_tree.pack(fill='x', pady=5)
+
     def _handle_connect(self):
         if self.connect_btn['text'] == '连接':
             self.status_label.config(text='正在连接...', foreground='orange')
-            connection_info = {
-                'ip': self.ip_entry.get(),
-                'username': self.username_entry.get(),
-                'password': self.password_entry.get()
-            }
+            connection_info = self._collect_connection_info()
             try:
                 if self.on_connect(connection_info):
                     self.connect_btn.config(text='断开')
@@ -136,12 +457,318 @@ class RemoteControlUI:
             self.connect_btn.config(text='连接')
             self.status_label.config(text='未连接', foreground='red')
 
+    def _collect_connection_info(self):
+        """根据输入框生成连接信息，目标与所选配置一致时带上配置中的其他字段"""
+        connection_info = {}
+        if self.selected_profile and self.selected_profile.get('ip') == self.ip_entry.get():
+            connection_info.update((key, value) for key, value in self.selected_profile.items()
+                                   if key not in ('password', 'key_filename', 'use_agent', 'prewarm',
+                                                  'encoding', 'remote_agent'))
+        connection_info.update({
+            'ip': self.ip_entry.get(),
+            'username': self.username_entry.get(),
+            'password': self.password_entry.get()
+        })
+        if self.key_entry.get():
+            connection_info['key_filename'] = self.key_entry.get()
+        if self.use_agent_var.get():
+            connection_info['use_agent'] = True
+        if self.remote_agent_var.get():
+            connection_info['remote_agent'] = True
+        encoding = self.encoding_combo.get().strip()
+        if encoding and encoding != DEFAULT_ENCODING:
+            connection_info['encoding'] = encoding
+        return connection_info
+
+    def set_profiles(self, names):
+        """更新连接配置下拉列表
+
+        Args:
+            names: 配置名称列表
+        """
+        self.profile_combo.config(values=list(names))
+        if self.profile_combo.get() not in names:
+            self.profile_combo.set('')
+            self.selected_profile = None
+
+    def _handle_select_profile(self):
+        name = self.profile_combo.get()
+        if not name or self.on_select_profile is None:
+            return
+        try:
+            profile = self.on_select_profile(name)
+        except Exception as e:
+            self.show_error('连接配置错误', str(e))
+            return
+        self.selected_profile = profile
+        for entry, value in ((self.ip_entry, profile.get('ip')),
+                             (self.username_entry, profile.get('username')),
+                             (self.password_entry, profile.get('password')),
+                             (self.key_entry, profile.get('key_filename'))):
+            entry.delete(0, 'end')
+            entry.insert(0, value or '')
+        self.use_agent_var.set(bool(profile.get('use_agent')))
+        self.remote_agent_var.set(bool(profile.get('remote_agent')))
+        self.prewarm_var.set(bool(profile.get('prewarm')))
+        self.encoding_combo.set(profile.get('encoding') or DEFAULT_ENCODING)
+
+    def _handle_save_profile(self):
+        if self.on_save_profile is None:
+            return
+        name = simpledialog.askstring('保存配置', '配置名称:', parent=self.root,
+                                      initialvalue=self.profile_combo.get())
+        if not name or not name.strip():
+            return
+        name = name.strip()
+        self.on_save_profile(name, self._collect_connection_info(), self.prewarm_var.get())
+        self.profile_combo.set(name)
+
+    def _handle_delete_profile(self):
+        name = self.profile_combo.get()
+        if not name or self.on_delete_profile is None:
+            return
+        if messagebox.askyesno('删除配置', f'确定删除连接配置 {name} 吗？'):
+            self.on_delete_profile(name)
+
+    def _handle_browse_key(self):
+        path = filedialog.askopenfilename(title='选择私钥文件')
+        if path:
+            self.key_entry.delete(0, 'end')
+            self.key_entry.insert(0, path)
+
     def _handle_send_command(self):
         command = self.command_entry.get()
         if command:
             self.on_send_command(command)
             self.command_entry.delete(0, 'end')
 
+    def _handle_add_tunnel(self):
+        if self.on_add_tunnel is None:
+            return
+        try:
+            bind_port = int(self.tunnel_bind_port_entry.get() or 0)
+            target_port = int(self.tunnel_target_port_entry.get())
+        except ValueError:
+            self.show_error('端口转发错误', '端口必须是数字')
+            return
+        self.on_add_tunnel({
+            'kind': 'remote' if self.tunnel_kind_combo.get() == '远程' else 'local',
+            'bind_port': bind_port,
+            'target_host': self.tunnel_target_host_entry.get() or '127.0.0.1',
+            'target_port': target_port
+        })
+
+    def _handle_remove_tunnel(self):
+        if self.on_remove_tunnel is None:
+            return
+        for item in self.tunnel_tree.selection():
+            self.on_remove_tunnel(int(item))
+
+    def update_tunnels(self, tunnels):
+        """刷新端口转发列表及字节计数
+
+        Args:
+            tunnels: PortForwarder.get_stats()返回的转发统计列表
+        """
+        current = set()
+        for tunnel in tunnels:
+            item = str(tunnel['id'])
+            current.add(item)
+            values = (
+                '本地' if tunnel['kind'] == 'local' else '远程',
+                tunnel['bind'],
+                tunnel['target'],
+                f'{tunnel["active_connections"]}/{tunnel["total_connections"]}',
+                _format_bytes(tunnel['bytes_sent']),
+                _format_bytes(tunnel['bytes_received'])
+            )
+            if self.tunnel_tree.exists(item):
+                self.tunnel_tree.item(item, values=values)
+            else:
+                self.tunnel_tree.insert('', 'end', iid=item, values=values)
+        for item in self.tunnel_tree.get_children():
+            if item not in current:
+                self.tunnel_tree.delete(item)
+
+    def open_stats_window(self):
+        """打开延迟统计窗口，窗口打开期间每秒刷新一次"""
+        if self.stats_window is not None and self.stats_window.winfo_exists():
+            self.stats_window.lift()
+            return
+        self.stats_window = tk.Toplevel(self.root)
+        self.stats_window.title('延迟统计')
+        self.stats_window.geometry('640x360')
+
+        columns = ('host', 'phase', 'count', 'mean', 'p50', 'p95', 'max')
+        self.stats_tree = ttk.Treeview(self.stats_window, columns=columns, show='headings')
+        for column, heading, width in zip(
+                columns,
+                ('主机', '阶段', '次数', '平均(ms)', 'P50(ms)', 'P95(ms)', '最大(ms)'),
+                (120, 110, 60, 80, 80, 80, 80)):
+            self.stats_tree.heading(column, text=heading)
+            self.stats_tree.column(column, width=width)
+        self.stats_tree.pack(fill='both', expand=True, padx=10, pady=5)
+
+        self.export_stats_btn = ttk.Button(self.stats_window, text='导出Prometheus',
+                                           command=self._handle_export_stats)
+        self.export_stats_btn.pack(side='right', padx=10, pady=5)
+
+        self._refresh_stats_window()
+
+    def _refresh_stats_window(self):
+        if self.stats_window is None or not self.stats_window.winfo_exists():
+            self.stats_window = None
+            return
+        if self.on_request_stats is not None:
+            self.update_stats(self.on_request_stats())
+        self.stats_window.after(1000, self._refresh_stats_window)
+
+    def update_stats(self, stats):
+        """刷新延迟统计窗口中的数据
+
+        Args:
+            stats: LatencyStats.get_stats()返回的{主机: {阶段: 统计摘要}}，耗时单位为秒
+        """
+        self.stats_tree.delete(*self.stats_tree.get_children())
+        for host, phases in stats.items():
+            for phase, summary in phases.items():
+                self.stats_tree.insert('', 'end', values=(
+                    host,
+                    phase,
+                    summary['count'],
+                    _format_ms(summary['mean']),
+                    _format_ms(summary['p50']),
+                    _format_ms(summary['p95']),
+                    _format_ms(summary['max'])
+                ))
+
+    def _handle_export_stats(self):
+        if self.on_export_stats is None:
+            return
+        path = self.on_export_stats()
+        if path:
+            messagebox.showinfo('导出完成', f'延迟统计已导出到 {path}')
+
+    def open_browser_window(self):
+        """打开远程文件浏览窗口"""
+        if self.browser_window is not None and self.browser_window.winfo_exists():
+            self.browser_window.lift()
+            return
+        self.browser_window = tk.Toplevel(self.root)
+        self.browser_window.title('文件浏览')
+        self.browser_window.geometry('720x480')
+
+        toolbar = ttk.Frame(self.browser_window)
+        toolbar.pack(fill='x', padx=10, pady=5)
+        self.browser_up_btn = ttk.Button(toolbar, text='上级', command=self._handle_browse_up)
+        self.browser_up_btn.pack(side='left')
+        self.browser_path_entry = ttk.Entry(toolbar)
+        self.browser_path_entry.pack(side='left', fill='x', expand=True, padx=5)
+        self.browser_path_entry.bind('<Return>', lambda event: self.browse(self.browser_path_entry.get()))
+        self.browser_refresh_btn = ttk.Button(
+            toolbar, text='刷新', command=lambda: self.browse(self.browser_path, refresh=True))
+        self.browser_refresh_btn.pack(side='left')
+
+        self.browser_list = VirtualListView(
+            self.browser_window,
+            columns=('name', 'size', 'mtime', 'mode'),
+            headings=('名称', '大小', '修改时间', '权限'),
+            widths=(300, 100, 150, 100),
+            format_row=_format_entry,
+            on_activate=self._handle_browse_entry
+        )
+        self.browser_list.pack(fill='both', expand=True, padx=10)
+
+        self.browser_status_label = ttk.Label(self.browser_window, text='')
+        self.browser_status_label.pack(fill='x', padx=10, pady=5)
+
+        self.browse(self.browser_path)
+
+    def browse(self, path, refresh=False):
+        """在后台列出远程目录，完成后刷新文件浏览列表
+
+        Args:
+            path: 远程目录路径
+            refresh: 忽略缓存重新获取
+        """
+        if self.on_list_dir is None or self.browser_window is None:
+            return
+        path = posixpath.normpath(path or '/')
+        self._browse_generation += 1
+        generation = self._browse_generation
+        self.browser_status_label.config(text=f'正在加载 {path} ...')
+        self.on_list_dir(path, refresh,
+                         lambda done_path, entries, error: self._handle_listing(
+                             generation, done_path, entries, error))
+
+    def _handle_listing(self, generation, path, entries, error):
+        # 用户在加载期间已经打开了其他目录时丢弃旧结果
+        if generation != self._browse_generation:
+            return
+        if self.browser_window is None or not self.browser_window.winfo_exists():
+            return
+        if error:
+            self.browser_status_label.config(text=error)
+            return
+        self.browser_path = path
+        self.browser_path_entry.delete(0, 'end')
+        self.browser_path_entry.insert(0, path)
+        self.browser_list.set_items(entries)
+        self.browser_status_label.config(text=f'{len(entries)} 个条目')
+
+    def _handle_browse_entry(self, entry):
+        path = posixpath.join(self.browser_path, entry.name)
+        if entry.is_dir:
+            self.browse(path)
+        elif entry.is_link and self.on_stat_path is not None:
+            # 符号链接可能指向文件，先解析目标，只有指向目录时才进入
+            self._browse_generation += 1
+            generation = self._browse_generation
+            self.browser_status_label.config(text=f'正在解析 {path} ...')
+            self.on_stat_path(path, lambda done_path, target, error: self._handle_link_target(
+                generation, done_path, target, error))
+
+    def _handle_link_target(self, generation, path, target, error):
+        if generation != self._browse_generation:
+            return
+        if self.browser_window is None or not self.browser_window.winfo_exists():
+            return
+        if error:
+            self.browser_status_label.config(text=error)
+        elif target.is_dir:
+            self.browse(path)
+        else:
+            self.browser_status_label.config(text=f'{path} 不是目录')
+
+    def _handle_browse_up(self):
+        self.browse(posixpath.dirname(self.browser_path))
+
+    def _handle_toggle_profiler(self):
+        if self.on_toggle_profiler is not None:
+            self.on_toggle_profiler(not self.profiling)
+
+    def set_profiling(self, active):
+        """更新性能分析开关的显示状态
+
+        Args:
+            active: 性能分析是否正在运行
+        """
+        self.profiling = active
+        self.profile_btn.config(text='停止分析' if active else '性能分析')
+
+    def set_connection_state(self, state):
+        """根据SSH连接状态事件更新状态标签和连接按钮
+
+        Args:
+            state: SSH连接状态，取值见src.ssh中的STATE_*常量
+        """
+        text, color = self._CONNECTION_STATES.get(state, (state, 'black'))
+        self.status_label.config(text=text, foreground=color)
+        if state == 'connected':
+            self.connect_btn.config(text='断开')
+        elif state == 'failed':
+            self.connect_btn.config(text='连接')
+
     def append_output(self, text):
         self.output_text.insert('end', text)
         self.output_text.see('end')
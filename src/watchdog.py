@@ -0,0 +1,282 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+界面卡顿监测模块
+
+这个模块负责定位导致界面无响应的代码，主要功能包括：
+1. 用root.after心跳测量Tk事件循环的调度延迟
+2. 卡顿超过阈值时由后台线程抓取主线程调用栈和正在执行的回调
+3. 按需运行采样分析器，生成折叠栈（collapsed stack）报告
+
+主要组件：
+- EventLoopWatchdog类：事件循环卡顿看门狗
+- SamplingProfiler类：基于sys._current_frames的采样分析器
+
+使用示例：
+    watchdog = EventLoopWatchdog(root, threshold=0.5)
+    on_send_command = watchdog.track(handle_send_command)
+    watchdog.start()
+
+    profiler = SamplingProfiler()
+    profiler.start(10, on_finish=lambda p: p.save('logs'))
+
+折叠栈报告每行为"帧;帧;帧 样本数"，可直接用flamegraph.pl或speedscope查看。
+
+作者：Cursor Team
+版本：0.1.0
+"""
+
+import collections
+import functools
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from datetime import datetime
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'
+
+
+class EventLoopWatchdog:
+    """Tk事件循环卡顿看门狗
+
+    主线程每隔interval秒通过root.after打一次心跳，后台线程发现心跳超过
+    threshold秒未到达时，抓取主线程当前的调用栈和经track包装的回调名称。
+    每次卡顿只报告一次，心跳恢复后再记录卡顿的总时长。
+
+    属性：
+        interval: 心跳间隔（秒）
+        threshold: 判定为卡顿的调度延迟（秒）
+        max_lag: 观察到的最大调度延迟（秒）
+        stalls: 最近的卡顿记录，包含time、callback、stack和duration
+    """
+
+    def __init__(self, root, interval: float = 0.1, threshold: float = 0.5,
+                 history: int = 50):
+        """初始化看门狗，必须在Tk主线程中创建
+
+        Args:
+            root: Tkinter主窗口实例
+            interval: 心跳间隔（秒）
+            threshold: 判定为卡顿的调度延迟（秒）
+            history: 保留的卡顿记录条数
+        """
+        self.logger = logging.getLogger('LinuxRemoteControl.Watchdog')
+        self.root = root
+        self.interval = interval
+        self.threshold = threshold
+        self.max_lag = 0.0
+        self.stalls: Deque[Dict] = collections.deque(maxlen=history)
+
+        self._thread_ident = threading.get_ident()
+        self._callbacks: Tuple[str, ...] = ()
+        self._last_tick = time.perf_counter()
+        self._stall: Optional[Dict] = None
+        self._after_id = None
+        self._stop = threading.Event()
+        self._monitor_thread: Optional[threading.Thread] = None
+
+    def track(self, func: Callable, name: Optional[str] = None) -> Callable:
+        """包装在主线程执行的回调，卡顿报告中会显示其名称
+
+        Args:
+            func: 要包装的回调函数
+            name: 报告中显示的名称，默认为函数名
+
+        Returns:
+            Callable: 包装后的函数
+        """
+        name = name or getattr(func, '__name__', repr(func))
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            previous = self._callbacks
+            self._callbacks = previous + (name,)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._callbacks = previous
+
+        return wrapper
+
+    @property
+    def current_callback(self) -> Optional[str]:
+        """当前正在执行的回调，嵌套时用" > "连接"""
+        callbacks = self._callbacks
+        return ' > '.join(callbacks) if callbacks else None
+
+    def start(self) -> None:
+        """开始心跳和后台监测"""
+        if self._monitor_thread is not None:
+            return
+        self._stop.clear()
+        self._tick()
+        self._monitor_thread = threading.Thread(
+            target=self._monitor_loop, name='EventLoopWatchdog', daemon=True)
+        self._monitor_thread.start()
+        self.logger.info(f'界面卡顿监测已启动，阈值 {self.threshold * 1000:.0f} ms')
+
+    def stop(self) -> None:
+        """停止监测"""
+        self._stop.set()
+        if self._after_id is not None:
+            try:
+                self.root.after_cancel(self._after_id)
+            except Exception:
+                pass
+            self._after_id = None
+        if self._monitor_thread is not None:
+            self._monitor_thread.join(timeout=self.interval * 5)
+            self._monitor_thread = None
+
+    def _tick(self) -> None:
+        now = time.perf_counter()
+        lag = max(0.0, now - self._last_tick - self.interval)
+        self.max_lag = max(self.max_lag, lag)
+        self._last_tick = now
+        stall = self._stall
+        if stall is not None:
+            self._stall = None
+            stall['duration'] = lag + self.interval
+            self.logger.warning(f'界面卡顿结束，持续 {stall["duration"] * 1000:.0f} ms，'
+                                f'回调: {stall["callback"] or "未知"}')
+        if not self._stop.is_set():
+            self._after_id = self.root.after(int(self.interval * 1000), self._tick)
+
+    def _monitor_loop(self) -> None:
+        while not self._stop.wait(self.interval / 2):
+            self._check()
+
+    def _check(self) -> None:
+        lag = time.perf_counter() - self._last_tick - self.interval
+        if lag < self.threshold or self._stall is not None:
+            return
+        frame = sys._current_frames().get(self._thread_ident)
+        stack = ''.join(traceback.format_stack(frame)) if frame is not None else ''
+        stall = {
+            'time': datetime.now().isoformat(timespec='milliseconds'),
+            'callback': self.current_callback,
+            'stack': stack,
+            'duration': None,
+        }
+        self._stall = stall
+        self.stalls.append(stall)
+        self.logger.warning(f'界面卡顿超过 {lag * 1000:.0f} ms，回调: {stall["callback"] or "未知"}，'
+                            f'主线程调用栈:\n{stack}')
+
+
+class SamplingProfiler:
+    """对单个线程定时采样调用栈的分析器
+
+    在后台线程中每隔interval秒读取目标线程的调用栈，按完整调用链计数。
+    只在运行期间产生开销，适合在正式版本中按需开启。
+
+    属性：
+        interval: 采样间隔（秒）
+        samples: 各调用链（由外到内，以";"连接）的样本数
+        sample_count: 样本总数
+    """
+
+    def __init__(self, thread_ident: Optional[int] = None, interval: float = 0.005):
+        """初始化采样分析器
+
+        Args:
+            thread_ident: 目标线程标识，默认为创建分析器的线程
+            interval: 采样间隔（秒）
+        """
+        self.logger = logging.getLogger('LinuxRemoteControl.Profiler')
+        self.interval = interval
+        self.samples: collections.Counter = collections.Counter()
+        self.sample_count = 0
+        self.started_at: Optional[datetime] = None
+        self._thread_ident = thread_ident if thread_ident is not None else threading.get_ident()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, duration: float,
+              on_finish: Optional[Callable[['SamplingProfiler'], None]] = None) -> None:
+        """开始采样，duration秒后或调用stop后结束
+
+        Args:
+            duration: 采样时长（秒）
+            on_finish: 采样结束后在分析器线程中调用的回调函数，参数为分析器本身
+        """
+        if self.is_running:
+            raise Exception('性能分析正在运行')
+        self.samples.clear()
+        self.sample_count = 0
+        self.started_at = datetime.now()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(duration, on_finish),
+                                        name='SamplingProfiler', daemon=True)
+        self._thread.start()
+        self.logger.info(f'性能分析已开始，时长 {duration:g} 秒')
+
+    def stop(self) -> None:
+        """提前结束采样"""
+        self._stop.set()
+
+    def wait(self, timeout: Optional[float] = None) -> None:
+        """等待采样结束"""
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self, duration: float, on_finish) -> None:
+        deadline = time.perf_counter() + duration
+        while time.perf_counter() < deadline and not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_ident)
+            if frame is None:
+                break
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            self.samples[';'.join(reversed(stack))] += 1
+            self.sample_count += 1
+        self.logger.info(f'性能分析结束，共 {self.sample_count} 个样本')
+        if on_finish is not None:
+            try:
+                on_finish(self)
+            except Exception as e:
+                self.logger.error(f'处理性能分析结果失败: {str(e)}')
+
+    def collapsed(self) -> str:
+        """返回折叠栈格式的报告"""
+        return ''.join(f'{stack} {count}\n' for stack, count in self.samples.most_common())
+
+    def top_functions(self, limit: int = 10) -> List[Tuple[str, int]]:
+        """按包含子调用的样本数返回最热的函数
+
+        Args:
+            limit: 返回的函数个数
+
+        Returns:
+            List[Tuple[str, int]]: (函数, 样本数)列表，按样本数降序
+        """
+        counts: collections.Counter = collections.Counter()
+        for stack, count in self.samples.items():
+            for label in set(stack.split(';')):
+                counts[label] += count
+        return counts.most_common(limit)
+
+    def save(self, directory: str) -> str:
+        """把折叠栈报告写入目录，返回文件路径"""
+        os.makedirs(directory, exist_ok=True)
+        started_at = self.started_at or datetime.now()
+        path = os.path.join(directory, f'profile-{started_at:%Y%m%d-%H%M%S}.folded')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(self.collapsed())
+        self.logger.info(f'性能分析报告已保存到 {path}，最热函数: ' + ', '.join(
+            f'{label}={count}' for label, count in self.top_functions(5)))
+        return path
@@ -0,0 +1,184 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+远程代理模块单元测试
+
+在本地子进程中运行辅助脚本，通过与SSH通道相同的引导方式测试：
+1. 各操作的请求和响应
+2. 同一通道上的并发请求
+3. 远程错误和代理退出的处理
+
+作者：Cursor Team
+版本：0.1.0
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import Mock
+from src.agent import RemoteAgent, _BOOTSTRAP
+
+
+class ProcessChannel:
+    """用本地子进程的标准输入输出模拟paramiko.Channel"""
+
+    def __init__(self):
+        self.command = None
+        self.proc = subprocess.Popen([sys.executable, '-u', '-c', _BOOTSTRAP],
+                                     stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+
+    def exec_command(self, command):
+        self.command = command
+
+    def sendall(self, data):
+        self.proc.stdin.write(data)
+        self.proc.stdin.flush()
+
+    def recv(self, size):
+        return os.read(self.proc.stdout.fileno(), size)
+
+    def close(self):
+        if self.proc.stdin.closed:
+            return
+        self.proc.stdin.close()
+        self.proc.wait(timeout=5)
+        self.proc.stdout.close()
+
+
+class TestRemoteAgent(unittest.TestCase):
+    """远程代理测试类"""
+
+    def setUp(self):
+        """测试前准备：启动辅助脚本并完成引导"""
+        self.ssh = Mock()
+        self.ssh.encoding = 'utf-8'
+        self.channel = ProcessChannel()
+        self.ssh.client.get_transport.return_value.open_session.return_value = self.channel
+        self.agent = RemoteAgent(self.ssh, python=sys.executable, timeout=10)
+        self.agent.start()
+
+    def tearDown(self):
+        """测试后清理"""
+        self.agent.close()
+
+    def test_start_uploads_helper(self):
+        """测试启动时经标准输入上传辅助脚本"""
+        self.assertEqual(self.channel.command, f'{sys.executable} -u -c "{_BOOTSTRAP}"')
+        self.assertEqual(self.agent.remote_pid, self.channel.proc.pid)
+        self.assertTrue(self.agent.is_running)
+
+    def test_run(self):
+        """测试执行命令并分别返回标准输出、标准错误和退出状态码"""
+        output, error, exit_status = self.agent.run('echo out; echo err >&2; exit 3')
+        self.assertEqual(output, 'out\n')
+        self.assertEqual(error, 'err\n')
+        self.assertEqual(exit_status, 3)
+
+        output, _, _ = self.agent.run('cat', stdin=b'from stdin')
+        self.assertEqual(output, 'from stdin')
+
+    def test_run_timeout(self):
+        """测试命令超时时报错"""
+        with self.assertRaises(Exception) as context:
+            self.agent.run('sleep 5', timeout=0.2)
+        self.assertIn('远程代理错误', str(context.exception))
+        self.assertIn('TimeoutExpired', str(context.exception))
+
+    def test_file_operations(self):
+        """测试获取文件属性、读取文件范围和列出目录"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'data.bin')
+            with open(path, 'wb') as f:
+                f.write(bytes(range(256)) * 4)
+            os.mkdir(os.path.join(directory, 'sub'))
+
+            info = self.agent.stat(path)
+            self.assertEqual(info['size'], 1024)
+            self.assertFalse(info['is_dir'])
+            self.assertEqual(self.agent.read(path, 250, 10), bytes(range(250, 256)) + bytes(range(4)))
+            self.assertEqual(len(self.agent.read(path, 1000)), 24)
+
+            entries = {entry['name']: entry for entry in self.agent.listdir(directory)}
+            self.assertEqual(sorted(entries), ['data.bin', 'sub'])
+            self.assertTrue(entries['sub']['is_dir'])
+            self.assertEqual(entries['data.bin']['size'], 1024)
+
+    @unittest.skipUnless(os.path.exists('/proc/loadavg'), '需要/proc文件系统')
+    def test_proc(self):
+        """测试读取/proc并拒绝越界路径"""
+        files = self.agent.proc('loadavg', 'self/status')
+        self.assertEqual(len(files['loadavg'].split()), 5)
+        self.assertIn('Pid:', files['self/status'])
+
+        with self.assertRaises(Exception):
+            self.agent.proc('../etc/passwd')
+
+    def test_remote_error(self):
+        """测试远程报错以异常返回且不影响后续请求"""
+        with self.assertRaises(Exception) as context:
+            self.agent.stat('/nonexistent/path')
+        self.assertIn('FileNotFoundError', str(context.exception))
+
+        with self.assertRaises(Exception) as context:
+            self.agent.call('unknown')
+        self.assertIn('不支持的操作', str(context.exception))
+
+        self.assertTrue(self.agent.stat('/')['is_dir'])
+
+    def test_concurrent_requests(self):
+        """测试同一通道上的请求并发执行，响应按编号匹配"""
+        start = time.perf_counter()
+        futures = [self.agent.submit('run', command=f'sleep 0.3; echo {index}', timeout=5)
+                   for index in range(6)]
+        fast = self.agent.stat('/')
+        self.assertLess(time.perf_counter() - start, 0.3)
+        self.assertTrue(fast['is_dir'])
+
+        for index, future in enumerate(futures):
+            header, data = future.result(5)
+            self.assertEqual(data, f'{index}\n'.encode())
+        self.assertLess(time.perf_counter() - start, 1.5)
+
+    def test_threads_share_agent(self):
+        """测试多个线程同时调用"""
+        results = []
+
+        def worker(index):
+            output, _, _ = self.agent.run(f'echo {index}')
+            results.append(output)
+
+        threads = [threading.Thread(target=worker, args=(index,)) for index in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(results), sorted(f'{index}\n' for index in range(10)))
+
+    def test_pending_requests_fail_on_exit(self):
+        """测试代理退出时未完成的请求以异常结束"""
+        future = self.agent.submit('run', command='sleep 5', timeout=10)
+        self.channel.proc.kill()
+
+        with self.assertRaises(Exception) as context:
+            future.result(5)
+        self.assertIn('远程代理', str(context.exception))
+        with self.assertRaises(Exception):
+            self.agent.submit('ping')
+
+    def test_not_connected(self):
+        """测试未连接时不能启动"""
+        ssh = Mock()
+        ssh.is_connected = False
+        with self.assertRaises(Exception) as context:
+            RemoteAgent(ssh).start()
+        self.assertEqual(str(context.exception), '未连接到服务器')
+
+
+if __name__ == '__main__':
+    unittest.main()
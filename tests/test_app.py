@@ -114,6 +114,30 @@ class TestApplication(unittest.TestCase):
         # 验证结果
         mock_ssh.execute_command.assert_called_once_with(test_command)
     
+    @patch('app.RemoteAgent')
+    def test_remote_agent_mode(self, mock_remote_agent):
+        """测试开启远程代理模式后命令和目录浏览经远程代理执行"""
+        self.app.initialize()
+        mock_ssh = Mock()
+        mock_ssh.is_connected = True
+        self.app.ssh = mock_ssh
+        agent = mock_remote_agent.return_value
+        agent.is_running = True
+        agent.run.return_value = ('command output', '', 0)
+
+        self.assertTrue(self.app._handle_connect({
+            'ip': '192.168.1.100', 'username': 'test_user', 'password': 'test_password',
+            'remote_agent': True
+        }))
+        self.assertIs(self.app.remote_fs.agent, agent)
+        self.app._handle_send_command('ls -l')
+        agent.run.assert_called_once_with('ls -l')
+        mock_ssh.execute_command.assert_not_called()
+
+        self.app._handle_disconnect()
+        agent.close.assert_called_once()
+        self.assertIsNone(self.app.remote_fs.agent)
+
     @patch('src.ssh.SSHConnection')
     def test_error_handling(self, mock_ssh_connection):
         """测试错误处理"""
@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+asyncio SSH连接模块单元测试
+
+基于进程内SSH服务器测试，包括：
+1. 连接、执行命令和错误信息与SSHConnection一致
+2. 流式读取输出和提前结束
+3. 读取慢时暂停接收
+4. 每个连接的并发会话数限制
+5. 远程过滤和压缩输出
+
+作者：Cursor Team
+版本：0.1.0
+"""
+
+import asyncio
+import sys
+import time
+import unittest
+from benchmarks.server import LocalSSHServer
+from src.async_ssh import AsyncSSHConnection
+from src.output import OutputFilter
+
+
+class TestAsyncSSHConnection(unittest.TestCase):
+    """asyncio SSH连接测试类"""
+
+    @classmethod
+    def setUpClass(cls):
+        """启动本地SSH服务器"""
+        cls.server = LocalSSHServer().start()
+
+    @classmethod
+    def tearDownClass(cls):
+        """停止本地SSH服务器"""
+        cls.server.stop()
+
+    def setUp(self):
+        """测试前准备"""
+        self.loop = asyncio.new_event_loop()
+        self.conn = AsyncSSHConnection(keepalive_interval=0)
+        self.run_async(self.conn.connect(self.server.connection_info()))
+
+    def tearDown(self):
+        """测试后清理"""
+        self.run_async(self.conn.disconnect())
+        self.loop.close()
+
+    def run_async(self, coro):
+        return self.loop.run_until_complete(coro)
+
+    def test_execute_command(self):
+        """测试执行命令并记录各阶段耗时"""
+        output, error = self.run_async(self.conn.execute_command('echo hello'))
+
+        self.assertEqual(output, 'hello\n')
+        self.assertEqual(error, '')
+        self.assertTrue(self.conn.is_connected)
+        self.assertIn('first_byte', self.conn.ssh.last_command_timings)
+        self.assertIn('command_total', self.conn.ssh.last_command_timings)
+
+    def test_open_command_separates_stderr(self):
+        """测试不分配伪终端时分别读取标准错误和退出状态码"""
+        async def run_command():
+            running = await self.conn.open_command('echo out; echo err >&2; exit 3', get_pty=False)
+            return await running.read(), running.stderr, running.exit_status
+
+        self.assertEqual(self.run_async(run_command()), ('out\n', 'err\n', 3))
+
+    def test_execute_command_with_output_filter(self):
+        """测试在远程过滤并压缩输出，只传回匹配的行"""
+        command = "seq 1 100000 | sed 's/$/ ok/; 0~25000s/ok/FAILED/'"
+        output_filter = OutputFilter(grep='FAILED', compress=True)
+        output, error = self.run_async(self.conn.execute_command(command, output_filter=output_filter))
+
+        self.assertEqual(output.splitlines(), ['%d FAILED' % i for i in range(25000, 125000, 25000)])
+        self.assertEqual(error, '')
+        stats = self.conn.ssh.last_transfer_stats
+        self.assertEqual(stats['raw_bytes'], 888911)
+        self.assertEqual(stats['output_bytes'], len(output))
+        self.assertLess(stats['wire_bytes'], 100)
+
+    def test_stream_command(self):
+        """测试流式读取大输出，提前结束后连接仍可使用"""
+        async def stream(command, limit=None):
+            total = 0
+            async for text in self.conn.stream_command(command):
+                total += len(text)
+                if limit and total >= limit:
+                    break
+            return total
+
+        self.assertEqual(self.run_async(stream('head -c 3000000 /dev/zero')), 3000000)
+        self.assertGreaterEqual(self.run_async(stream('yes', limit=100000)), 100000)
+        self.assertEqual(self.run_async(self.conn.execute_command('echo ok'))[0], 'ok\n')
+
+    def test_stream_decodes_host_encoding(self):
+        """测试流式输出按主机编码增量解码，原始字节可直接读取"""
+        data = '中文输出'.encode('gbk') * 20000
+        conn = AsyncSSHConnection(keepalive_interval=0)
+
+        async def run_commands():
+            await conn.connect(self.server.connection_info(encoding='gbk'))
+            try:
+                command = (f'{sys.executable} -c "import sys; '
+                           f'sys.stdout.buffer.write(\'中文输出\'.encode(\'gbk\') * 20000)"')
+                text = ''.join([part async for part in conn.stream_command(command)])
+                raw, _ = await conn.execute_command_raw(command)
+                return text, raw.tobytes()
+            finally:
+                await conn.disconnect()
+
+        text, raw = self.run_async(run_commands())
+        self.assertEqual(text, '中文输出' * 20000)
+        self.assertEqual(raw, data)
+
+    def test_slow_reader_pauses_channel(self):
+        """测试读取慢时未读取的输出不超过上限"""
+        conn = AsyncSSHConnection(keepalive_interval=0, max_buffered=256 * 1024)
+
+        async def run_command():
+            await conn.connect(self.server.connection_info())
+            try:
+                running = await conn.open_command('head -c 20000000 /dev/zero')
+                await asyncio.sleep(0.5)
+                buffered = running._buffered
+                await running.wait()
+                return buffered, running.exit_status
+            finally:
+                await conn.disconnect()
+
+        buffered, exit_status = self.run_async(run_command())
+        self.assertGreater(buffered, 0)
+        self.assertLess(buffered, 256 * 1024 + 65536)
+        self.assertEqual(exit_status, 0)
+
+    def test_max_sessions(self):
+        """测试超过会话数上限的命令排队执行"""
+        conn = AsyncSSHConnection(keepalive_interval=0, max_sessions=1)
+
+        async def run_commands():
+            await conn.connect(self.server.connection_info())
+            try:
+                start = time.perf_counter()
+                results = await asyncio.gather(*(conn.execute_command(f'sleep 0.3; echo {i}')
+                                                 for i in range(2)))
+                return results, time.perf_counter() - start
+            finally:
+                await conn.disconnect()
+
+        results, elapsed = self.run_async(run_commands())
+        self.assertEqual([output for output, _ in results], ['0\n', '1\n'])
+        self.assertGreaterEqual(elapsed, 0.6)
+
+    def test_command_timeout(self):
+        """测试命令没有输出超过超时时间"""
+        with self.assertRaises(Exception) as context:
+            self.run_async(self.conn.execute_command('sleep 2', timeout=0.3))
+        self.assertEqual(str(context.exception), '命令执行超时，请检查命令是否正确或网络状态')
+
+    def test_errors_match_sync_connection(self):
+        """测试未连接和认证失败的错误信息与SSHConnection一致"""
+        self.run_async(self.conn.disconnect())
+        with self.assertRaises(Exception) as context:
+            self.run_async(self.conn.execute_command('ls'))
+        self.assertEqual(str(context.exception), '未连接到服务器')
+
+        conn = AsyncSSHConnection(keepalive_interval=0)
+        with self.assertRaises(Exception) as context:
+            self.run_async(conn.connect(self.server.connection_info(password='wrong')))
+        self.assertEqual(str(context.exception), '认证失败：用户名或密码错误')
+
+
+if __name__ == '__main__':
+    unittest.main()
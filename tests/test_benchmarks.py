@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+基准测试套件单元测试
+
+测试基准结果对比逻辑，包括：
+1. 按指标方向判定退化
+2. 忽略基线中不存在的指标
+
+作者：Cursor Team
+版本：0.1.0
+"""
+
+import unittest
+from benchmarks.suite import compare, HIGHER_IS_BETTER, LOWER_IS_BETTER
+
+
+def make_results(**metrics):
+    return {
+        'meta': {},
+        'results': {
+            name: {'value': value, 'unit': unit, 'better': better}
+            for name, (value, unit, better) in metrics.items()
+        }
+    }
+
+
+class TestCompare(unittest.TestCase):
+    """基准结果对比测试类"""
+
+    def test_flags_regressions_by_direction(self):
+        """测试延迟上升和吞吐下降都被判定为退化"""
+        baseline = make_results(
+            connect_latency_ms=(10.0, 'ms', LOWER_IS_BETTER),
+            large_output_mb_per_s=(100.0, 'MB/s', HIGHER_IS_BETTER),
+        )
+        current = make_results(
+            connect_latency_ms=(12.0, 'ms', LOWER_IS_BETTER),
+            large_output_mb_per_s=(80.0, 'MB/s', HIGHER_IS_BETTER),
+        )
+
+        rows = {row['name']: row for row in compare(baseline, current, threshold=0.1)}
+
+        self.assertTrue(rows['connect_latency_ms']['regressed'])
+        self.assertTrue(rows['large_output_mb_per_s']['regressed'])
+        self.assertAlmostEqual(rows['large_output_mb_per_s']['change'], -0.2)
+
+    def test_improvements_and_small_changes_pass(self):
+        """测试性能提升和阈值内的波动不算退化"""
+        baseline = make_results(
+            connect_latency_ms=(10.0, 'ms', LOWER_IS_BETTER),
+            large_output_mb_per_s=(100.0, 'MB/s', HIGHER_IS_BETTER),
+        )
+        current = make_results(
+            connect_latency_ms=(10.5, 'ms', LOWER_IS_BETTER),
+            large_output_mb_per_s=(150.0, 'MB/s', HIGHER_IS_BETTER),
+        )
+
+        rows = compare(baseline, current, threshold=0.1)
+
+        self.assertFalse(any(row['regressed'] for row in rows))
+
+    def test_skips_new_metrics(self):
+        """测试基线中没有的指标不参与对比"""
+        baseline = make_results(connect_latency_ms=(10.0, 'ms', LOWER_IS_BETTER))
+        current = make_results(
+            connect_latency_ms=(10.0, 'ms', LOWER_IS_BETTER),
+            append_output_mb_per_s=(5.0, 'MB/s', HIGHER_IS_BETTER),
+        )
+
+        rows = compare(baseline, current, threshold=0.1)
+
+        self.assertEqual([row['name'] for row in rows], ['connect_latency_ms'])
+
+    def test_missing_metrics_regress(self):
+        """测试基线中有而当前结果缺少的指标判定为退化"""
+        baseline = make_results(
+            connect_latency_ms=(10.0, 'ms', LOWER_IS_BETTER),
+            large_output_mb_per_s=(100.0, 'MB/s', HIGHER_IS_BETTER),
+        )
+        current = make_results(connect_latency_ms=(10.0, 'ms', LOWER_IS_BETTER))
+
+        rows = {row['name']: row for row in compare(baseline, current, threshold=0.1)}
+
+        self.assertFalse(rows['connect_latency_ms']['regressed'])
+        self.assertTrue(rows['large_output_mb_per_s']['regressed'])
+        self.assertTrue(rows['large_output_mb_per_s']['missing'])
+        self.assertIsNone(rows['large_output_mb_per_s']['current'])
+
+        current['meta']['only'] = ['connect']
+        rows = compare(baseline, current, threshold=0.1)
+        self.assertEqual([row['name'] for row in rows], ['connect_latency_ms'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+端口转发模块单元测试
+
+测试端口转发管理器的核心功能，包括：
+1. 本地端口转发的数据中转和字节计数
+2. 远程端口转发的申请、分发和取消
+3. 删除转发和停止事件循环
+
+作者：Cursor Team
+版本：0.1.0
+"""
+
+import socket
+import threading
+import time
+import unittest
+from unittest.mock import Mock
+from src.forwarding import PortForwarder, LOCAL, REMOTE
+
+
+class FakeChannel:
+    """用socketpair一端模拟paramiko.Channel"""
+
+    def __init__(self, sock):
+        self.sock = sock
+
+    def fileno(self):
+        return self.sock.fileno()
+
+    def setblocking(self, blocking):
+        self.sock.setblocking(blocking)
+
+    def recv(self, size):
+        try:
+            return self.sock.recv(size)
+        except BlockingIOError:
+            raise socket.timeout()
+
+    def send_ready(self):
+        return True
+
+    def send(self, data):
+        return self.sock.send(data)
+
+    def shutdown_write(self):
+        self.sock.shutdown(socket.SHUT_WR)
+
+    def close(self):
+        self.sock.close()
+
+
+def echo(sock):
+    """模拟远程目标：原样回显直到对端关闭"""
+    with sock:
+        while True:
+            data = sock.recv(65536)
+            if not data:
+                break
+            sock.sendall(data)
+
+
+def wait_for(predicate, timeout=2):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class TestPortForwarder(unittest.TestCase):
+    """端口转发管理器测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.ssh = Mock()
+        self.transport = self.ssh.client.get_transport.return_value
+        self.forwarder = PortForwarder(self.ssh)
+
+    def tearDown(self):
+        """测试后清理"""
+        self.forwarder.stop()
+
+    def _remote_endpoint(self):
+        local, remote = socket.socketpair()
+        threading.Thread(target=echo, args=(remote,), daemon=True).start()
+        return FakeChannel(local)
+
+    def test_local_forward_relays_data(self):
+        """测试本地转发中转数据并统计字节数"""
+        self.transport.open_channel.side_effect = lambda *args, **kwargs: self._remote_endpoint()
+        tunnel = self.forwarder.add_local_forward(0, 'db.internal', 5432)
+
+        with socket.create_connection(('127.0.0.1', tunnel.bind_port), timeout=2) as client:
+            payload = b'x' * 200000
+            client.sendall(payload)
+            received = b''
+            while len(received) < len(payload):
+                received += client.recv(65536)
+        self.assertEqual(received, payload)
+
+        args = self.transport.open_channel.call_args.args
+        self.assertEqual(args[0], 'direct-tcpip')
+        self.assertEqual(args[1], ('db.internal', 5432))
+        self.assertTrue(wait_for(lambda: tunnel.active_connections == 0))
+        stats = self.forwarder.get_stats()[0]
+        self.assertEqual(stats['kind'], LOCAL)
+        self.assertEqual(stats['bytes_sent'], 200000)
+        self.assertEqual(stats['bytes_received'], 200000)
+        self.assertEqual(stats['total_connections'], 1)
+
+    def test_concurrent_local_connections(self):
+        """测试多个并发连接共用同一个事件循环"""
+        self.transport.open_channel.side_effect = lambda *args, **kwargs: self._remote_endpoint()
+        tunnel = self.forwarder.add_local_forward(0, 'db.internal', 5432)
+
+        clients = [socket.create_connection(('127.0.0.1', tunnel.bind_port), timeout=2)
+                   for _ in range(20)]
+        for index, client in enumerate(clients):
+            client.sendall(f'hello {index}'.encode())
+        for index, client in enumerate(clients):
+            self.assertEqual(client.recv(100), f'hello {index}'.encode())
+            client.close()
+
+        self.assertTrue(wait_for(lambda: tunnel.total_connections == 20))
+        names = [thread.name for thread in threading.enumerate()]
+        self.assertEqual(names.count('PortForwarder'), 1)
+
+    def test_remote_forward(self):
+        """测试远程转发申请端口并把新通道接到本地目标"""
+        target = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        target.bind(('127.0.0.1', 0))
+        target.listen(1)
+        self.addCleanup(target.close)
+        self.transport.request_port_forward.return_value = 40022
+
+        tunnel = self.forwarder.add_remote_forward(0, '127.0.0.1', target.getsockname()[1])
+        self.assertEqual(tunnel.bind_port, 40022)
+        self.assertEqual(tunnel.kind, REMOTE)
+        handler = self.transport.request_port_forward.call_args.kwargs['handler']
+
+        local, remote = socket.socketpair()
+        handler(FakeChannel(local), ('10.0.0.5', 51000), ('', 40022))
+        conn, _ = target.accept()
+        with conn, remote:
+            remote.sendall(b'from remote')
+            self.assertEqual(conn.recv(100), b'from remote')
+            conn.sendall(b'from local')
+            self.assertEqual(remote.recv(100), b'from local')
+
+        self.forwarder.remove_tunnel(tunnel.id)
+        self.transport.cancel_port_forward.assert_called_once_with('', 40022)
+        self.assertEqual(self.forwarder.get_stats(), [])
+
+    def test_remove_local_forward_closes_listener(self):
+        """测试删除本地转发后不再监听端口"""
+        tunnel = self.forwarder.add_local_forward(0, 'db.internal', 5432)
+        port = tunnel.bind_port
+        self.forwarder.remove_tunnel(tunnel.id)
+
+        self.assertTrue(wait_for(lambda: tunnel.listener is None))
+        with self.assertRaises(OSError):
+            socket.create_connection(('127.0.0.1', port), timeout=1)
+
+    def test_add_local_forward_port_in_use(self):
+        """测试监听端口被占用时报错"""
+        busy = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        busy.bind(('127.0.0.1', 0))
+        busy.listen(1)
+        self.addCleanup(busy.close)
+
+        with self.assertRaises(Exception) as context:
+            self.forwarder.add_local_forward(busy.getsockname()[1], 'db.internal', 5432)
+        self.assertIn('无法监听本地端口', str(context.exception))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+延迟统计模块单元测试
+
+测试延迟直方图和统计集合，包括：
+1. 分桶计数和分位数估计
+2. 按主机查询统计数据
+3. Prometheus文本格式导出
+
+作者：Cursor Team
+版本：0.1.0
+"""
+
+import os
+import tempfile
+import unittest
+from src.metrics import Histogram, LatencyStats, BUCKETS
+
+
+class TestHistogram(unittest.TestCase):
+    """延迟直方图测试类"""
+
+    def test_empty(self):
+        """测试没有样本时返回空值"""
+        summary = Histogram().summary()
+        self.assertEqual(summary['count'], 0)
+        self.assertIsNone(summary['mean'])
+        self.assertIsNone(summary['p95'])
+
+    def test_observe_and_summary(self):
+        """测试样本计入正确的分桶并计算统计摘要"""
+        histogram = Histogram()
+        for seconds in (0.002, 0.004, 0.02, 0.2):
+            histogram.observe(seconds)
+
+        self.assertEqual(histogram.counts[BUCKETS.index(0.0025)], 1)
+        self.assertEqual(histogram.counts[BUCKETS.index(0.005)], 1)
+        summary = histogram.summary()
+        self.assertEqual(summary['count'], 4)
+        self.assertAlmostEqual(summary['mean'], 0.0565)
+        self.assertEqual(summary['min'], 0.002)
+        self.assertEqual(summary['max'], 0.2)
+
+    def test_quantile_within_bounds(self):
+        """测试分位数估计落在样本所在分桶内"""
+        histogram = Histogram()
+        for _ in range(90):
+            histogram.observe(0.003)
+        for _ in range(10):
+            histogram.observe(0.3)
+
+        self.assertTrue(0.0025 <= histogram.quantile(0.5) <= 0.005)
+        self.assertTrue(0.25 <= histogram.quantile(0.99) <= 0.3)
+
+    def test_overflow_bucket(self):
+        """测试超过最大分桶的样本计入+Inf桶"""
+        histogram = Histogram()
+        histogram.observe(120.0)
+        self.assertEqual(histogram.counts[-1], 1)
+        self.assertEqual(histogram.quantile(0.5), 120.0)
+
+
+class TestLatencyStats(unittest.TestCase):
+    """延迟统计集合测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.stats = LatencyStats()
+        self.stats.record_all('10.0.0.1', {'kex': 0.04, 'auth': 0.01})
+        self.stats.record('10.0.0.2', 'kex', 0.08)
+
+    def test_get_stats(self):
+        """测试按主机和阶段返回统计摘要"""
+        stats = self.stats.get_stats()
+        self.assertEqual(sorted(stats), ['10.0.0.1', '10.0.0.2'])
+        self.assertEqual(sorted(stats['10.0.0.1']), ['auth', 'kex'])
+        self.assertEqual(stats['10.0.0.2']['kex']['count'], 1)
+
+        only = self.stats.get_stats('10.0.0.2')
+        self.assertEqual(list(only), ['10.0.0.2'])
+
+    def test_reset(self):
+        """测试清空统计数据"""
+        self.stats.reset()
+        self.assertEqual(self.stats.get_stats(), {})
+
+    def test_prometheus_format(self):
+        """测试导出的Prometheus文本包含累计分桶、总和和计数"""
+        text = self.stats.to_prometheus()
+        name = 'linux_remote_controller_ssh_phase_seconds'
+        labels = 'host="10.0.0.1",phase="kex"'
+
+        self.assertIn(f'# TYPE {name} histogram', text)
+        self.assertIn(f'{name}_bucket{{{labels},le="0.025"}} 0', text)
+        self.assertIn(f'{name}_bucket{{{labels},le="0.05"}} 1', text)
+        self.assertIn(f'{name}_bucket{{{labels},le="+Inf"}} 1', text)
+        self.assertIn(f'{name}_sum{{{labels}}} 0.040000', text)
+        self.assertIn(f'{name}_count{{{labels}}} 1', text)
+
+    def test_write_prometheus(self):
+        """测试写入文本文件且不留下临时文件"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'metrics', 'ssh_latency.prom')
+            self.stats.write_prometheus(path)
+
+            with open(path, encoding='utf-8') as f:
+                self.assertEqual(f.read(), self.stats.to_prometheus())
+            self.assertEqual(os.listdir(os.path.dirname(path)), ['ssh_latency.prom'])
+
+
+if __name__ == '__main__':
+    unittest.main()
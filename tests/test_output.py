@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+命令输出处理模块单元测试
+
+测试输出缓冲区和增量解码，包括：
+1. 缓冲区扩容后内容完整
+2. 多字节字符被拆分到多个数据块时正确解码
+3. 无法解码的字节被替换
+4. 远程过滤管道和流式解压
+
+作者：Cursor Team
+版本：0.1.0
+"""
+
+import gzip
+import subprocess
+import unittest
+from src.output import (OutputBuffer, StreamDecoder, OutputFilter, FilteredOutput,
+                        RAW_BYTES_MARKER, check_encoding)
+
+
+class TestOutputBuffer(unittest.TestCase):
+    """输出缓冲区测试类"""
+
+    def test_append_grows_buffer(self):
+        """测试写入超过预分配大小的数据"""
+        buffer = OutputBuffer(size_hint=4)
+        for index in range(100):
+            buffer.append(b'%03d' % index)
+
+        self.assertEqual(len(buffer), 300)
+        self.assertEqual(buffer.getbuffer().tobytes(), b''.join(b'%03d' % i for i in range(100)))
+
+    def test_empty_buffer(self):
+        """测试没有写入数据"""
+        self.assertEqual(OutputBuffer().getbuffer().tobytes(), b'')
+
+
+class TestStreamDecoder(unittest.TestCase):
+    """增量解码器测试类"""
+
+    def test_split_multibyte_characters(self):
+        """测试逐字节输入时多字节字符在完整后才输出"""
+        for encoding, text in (('utf-8', '日志：正常'), ('gbk', '日志：正常')):
+            decoder = StreamDecoder(encoding)
+            data = text.encode(encoding)
+            decoded = ''.join(decoder.decode(data[i:i + 1]) for i in range(len(data)))
+            self.assertEqual(decoded + decoder.decode(b'', final=True), text)
+
+    def test_invalid_bytes_replaced(self):
+        """测试二进制数据和结尾不完整的字符被替换"""
+        decoder = StreamDecoder()
+        self.assertEqual(decoder.decode(memoryview(b'ok\xff')), 'ok�')
+        self.assertEqual(decoder.decode(b'\xe4\xb8'), '')
+        self.assertEqual(decoder.decode(b'', final=True), '�')
+
+    def test_unknown_encoding(self):
+        """测试编码不存在"""
+        self.assertEqual(check_encoding('GBK'), 'gbk')
+        with self.assertRaises(Exception) as context:
+            StreamDecoder('no-such-codec')
+        self.assertEqual(str(context.exception), '不支持的编码: no-such-codec')
+
+    def test_non_text_codecs_rejected(self):
+        """测试hex、zlib、rot13等非文本编码被拒绝"""
+        for name in ('hex', 'zlib', 'rot13'):
+            with self.assertRaises(Exception) as context:
+                check_encoding(name)
+            self.assertEqual(str(context.exception), f'不支持的编码: {name}')
+        self.assertEqual(check_encoding('GBK'), 'gbk')
+
+
+class TestOutputFilter(unittest.TestCase):
+    """远程过滤测试类"""
+
+    COMMAND = "seq 1 5000 | sed 's/$/ kernel: ok/; 0~1000s/ok/FAILED/' # 注释"
+
+    def run_filtered(self, output_filter, command=COMMAND):
+        """在本机sh中执行过滤管道，按小块送入接收端"""
+        proc = subprocess.run(['sh', '-c', output_filter.wrap(command)],
+                              stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        receiver = output_filter.receiver()
+        for offset in range(0, len(proc.stdout), 7):
+            receiver.feed(proc.stdout[offset:offset + 7])
+        output, error = receiver.finish(proc.stderr)
+        return output.tobytes(), error, receiver
+
+    def test_grep_with_compression(self):
+        """测试远程grep并压缩，本地解压并统计原始字节数"""
+        output, error, receiver = self.run_filtered(OutputFilter(grep='failed', ignore_case=True,
+                                                                 compress=True))
+
+        self.assertEqual(output.splitlines(), [b'%d kernel: FAILED' % i for i in range(1000, 6000, 1000)])
+        self.assertEqual(error, b'')
+        raw = subprocess.run(['sh', '-c', self.COMMAND], stdout=subprocess.PIPE).stdout
+        self.assertEqual(receiver.stats, {'raw_bytes': len(raw), 'output_bytes': len(output),
+                                          'wire_bytes': receiver.wire_bytes})
+        self.assertLess(receiver.wire_bytes, len(output))
+
+    def test_tail_and_byte_cap(self):
+        """测试tail和字节数上限，命令的标准错误保留"""
+        output, error, _ = self.run_filtered(OutputFilter(tail=2, max_bytes=10),
+                                             self.COMMAND + '\necho warning >&2')
+        self.assertEqual(output, b'4999 kerne')
+        self.assertEqual(error, b'warning\n')
+
+    def test_quoted_pattern(self):
+        """测试grep模式中的引号和shell元字符不会被展开"""
+        output, _, _ = self.run_filtered(OutputFilter(grep="it's [$]HOME"),
+                                         "printf '%s\\n' \"it's \\$HOME\" other")
+        self.assertEqual(output, b"it's $HOME\n")
+
+    def test_corrupt_stream(self):
+        """测试压缩数据损坏"""
+        receiver = FilteredOutput(compressed=True)
+        receiver.feed(gzip.compress(b'data')[:10])
+        with self.assertRaises(Exception) as context:
+            receiver.feed(b'not gzip data')
+        self.assertTrue(str(context.exception).startswith('解压命令输出失败'))
+
+    def test_truncated_stream(self):
+        """测试压缩流不完整（远程gzip被终止）时报错"""
+        receiver = FilteredOutput(compressed=True)
+        receiver.feed(gzip.compress(b'data' * 100)[:-8])
+        with self.assertRaises(Exception) as context:
+            receiver.finish(b'')
+        self.assertTrue(str(context.exception).startswith('解压命令输出失败'))
+
+    def test_marker_parsing(self):
+        """测试从标准错误中取出原始字节数标记"""
+        receiver = FilteredOutput(compressed=False)
+        receiver.feed(b'abc')
+        _, error = receiver.finish(b'err1\n' + RAW_BYTES_MARKER + b' 1234\nerr2\n')
+        self.assertEqual(error, b'err1\nerr2\n')
+        self.assertEqual(receiver.raw_bytes, 1234)
+
+        _, error = receiver.finish(b'no newline' + RAW_BYTES_MARKER + b' 5\n')
+        self.assertEqual(error, b'no newline')
+        self.assertEqual(receiver.raw_bytes, 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,199 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+连接配置管理模块单元测试
+
+测试连接配置存储和后台预热，包括：
+1. 凭据保存在密钥环中，不写入配置文件
+2. 未安装keyring时不保存凭据
+3. 预热连接按连接信息匹配并只能取走一次
+4. 预热时记录主机密钥
+
+作者：Cursor Team
+版本：0.1.0
+"""
+
+import json
+import os
+import stat
+import tempfile
+import threading
+import unittest
+from unittest.mock import Mock, patch
+from src.profiles import (ProfileStore, ConnectionPrewarmer, KEYRING_SERVICE,
+                          PREWARM_READY, PREWARM_FAILED)
+
+
+class FakeKeyring:
+    """内存中的密钥环"""
+
+    def __init__(self):
+        self.passwords = {}
+
+    def get_password(self, service, name):
+        return self.passwords.get((service, name))
+
+    def set_password(self, service, name, value):
+        self.passwords[(service, name)] = value
+
+    def delete_password(self, service, name):
+        del self.passwords[(service, name)]
+
+
+class TestProfileStore(unittest.TestCase):
+    """连接配置存储测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'config', 'profiles.json')
+        self.keyring = FakeKeyring()
+        patcher = patch('src.profiles.keyring', self.keyring)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.store = ProfileStore(self.path)
+        self.info = {'ip': '10.0.0.1', 'username': 'root', 'password': 'secret', 'port': 2222}
+
+    def tearDown(self):
+        """测试后清理"""
+        self.directory.cleanup()
+
+    def test_save_keeps_secrets_out_of_file(self):
+        """测试密码只保存在密钥环中，配置文件仅当前用户可读写"""
+        self.assertTrue(self.store.save('web', self.info, prewarm=True))
+
+        with open(self.path, encoding='utf-8') as f:
+            content = f.read()
+        self.assertNotIn('secret', content)
+        self.assertEqual(json.loads(content)['web'], {'ip': '10.0.0.1', 'username': 'root',
+                                                      'port': 2222, 'prewarm': True})
+        self.assertEqual(stat.S_IMODE(os.stat(self.path).st_mode), 0o600)
+        self.assertIn('secret', self.keyring.get_password(KEYRING_SERVICE, 'web'))
+
+        reloaded = ProfileStore(self.path)
+        self.assertEqual(reloaded.get('web')['password'], 'secret')
+        self.assertEqual(reloaded.list_profiles(), ['web'])
+        self.assertEqual(reloaded.prewarm_profiles(), ['web'])
+
+    def test_without_keyring(self):
+        """测试未安装keyring时不保存凭据"""
+        with patch('src.profiles.keyring', None):
+            store = ProfileStore(self.path)
+            self.assertFalse(store.save('web', self.info))
+            self.assertNotIn('password', store.get('web'))
+            self.assertTrue(store.save('agent', {'ip': '10.0.0.2', 'username': 'root', 'use_agent': True}))
+        with open(self.path, encoding='utf-8') as f:
+            self.assertNotIn('secret', f.read())
+
+    def test_delete(self):
+        """测试删除配置时一并删除凭据"""
+        self.store.save('web', self.info)
+        self.store.delete('web')
+        self.assertEqual(self.store.list_profiles(), [])
+        self.assertEqual(self.keyring.passwords, {})
+        with self.assertRaises(Exception) as context:
+            self.store.get('web')
+        self.assertEqual(str(context.exception), '连接配置不存在: web')
+
+    def test_host_key_kept_until_target_changes(self):
+        """测试重新保存时保留主机密钥，目标变化后丢弃"""
+        self.store.save('web', self.info)
+        self.store.set_host_key('web', 'ssh-ed25519 AAAA')
+        self.store.save('web', dict(self.info, username='admin'))
+        self.assertEqual(self.store.get('web')['host_key'], 'ssh-ed25519 AAAA')
+
+        self.store.save('web', dict(self.info, ip='10.0.0.9'))
+        self.assertNotIn('host_key', self.store.get('web'))
+
+
+class TestConnectionPrewarmer(unittest.TestCase):
+    """连接预热器测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.store = Mock()
+        self.info = {'ip': '10.0.0.1', 'username': 'root', 'password': 'secret', 'prewarm': True}
+        self.store.get.return_value = dict(self.info)
+        self.store.prewarm_profiles.return_value = ['web']
+        self.connection = Mock()
+        self.connection.get_host_key.return_value = 'ssh-ed25519 AAAA'
+        self.connection.last_connect_timings = {'connect_total': 0.05}
+        self.prewarmer = ConnectionPrewarmer(self.store, connection_factory=lambda: self.connection)
+
+    def tearDown(self):
+        """测试后清理"""
+        self.prewarmer.close()
+
+    def test_prewarm_and_take(self):
+        """测试预热后按连接信息取走连接，且只能取走一次"""
+        results = [future.result(2) for future in self.prewarmer.prewarm_all()]
+
+        self.assertEqual(results, [True])
+        self.assertEqual(self.prewarmer.status('web'), PREWARM_READY)
+        self.connection.connect.assert_called_once()
+        self.store.set_host_key.assert_called_once_with('web', 'ssh-ed25519 AAAA')
+
+        self.assertIsNone(self.prewarmer.take(dict(self.info, password='other')))
+        connection_info = {'ip': '10.0.0.1', 'username': 'root', 'password': 'secret', 'port': '22',
+                           'host_key': 'ssh-ed25519 AAAA'}
+        self.assertIs(self.prewarmer.take(connection_info), self.connection)
+        self.assertIsNone(self.prewarmer.take(connection_info))
+
+    def test_take_requires_same_encoding(self):
+        """测试连接时选择的编码与预热时不同不取走预热连接"""
+        self.store.get.return_value = dict(self.info, encoding='gbk')
+        self.prewarmer.prewarm('web').result(2)
+
+        self.assertIsNone(self.prewarmer.take(self.info))
+        self.assertIsNone(self.prewarmer.take(dict(self.info, encoding='utf-8')))
+        self.assertIs(self.prewarmer.take(dict(self.info, encoding='GBK')), self.connection)
+
+    def test_take_default_encoding(self):
+        """测试未指定编码与显式指定utf-8视为相同"""
+        self.prewarmer.prewarm('web').result(2)
+        self.assertIs(self.prewarmer.take(dict(self.info, encoding='UTF8')), self.connection)
+
+    def test_take_dead_connection(self):
+        """测试预热连接已断开时不返回"""
+        self.prewarmer.prewarm('web').result(2)
+        self.connection.is_connected = False
+
+        self.assertIsNone(self.prewarmer.take(self.info))
+        self.connection.disconnect.assert_called_once()
+
+    def test_prewarm_failure(self):
+        """测试预热失败时记录状态"""
+        self.connection.connect.side_effect = Exception('连接超时：请检查网络连接和服务器状态')
+
+        self.assertFalse(self.prewarmer.prewarm('web').result(2))
+        self.assertEqual(self.prewarmer.status('web'), PREWARM_FAILED)
+        self.assertIsNone(self.prewarmer.take(self.info))
+
+    def test_close_during_prewarm(self):
+        """测试关闭时仍在进行的预热完成后断开连接，不保留在预热池中"""
+        connecting = threading.Event()
+        release = threading.Event()
+
+        def slow_connect(connection_info):
+            connecting.set()
+            release.wait(2)
+        self.connection.connect.side_effect = slow_connect
+        future = self.prewarmer.prewarm('web')
+        self.assertTrue(connecting.wait(2))
+
+        self.prewarmer.close()
+        release.set()
+        self.assertFalse(future.result(2))
+        self.connection.disconnect.assert_called_once()
+        self.assertIsNone(self.prewarmer.take(self.info))
+
+    def test_close_disconnects_unused(self):
+        """测试关闭时断开未被取走的预热连接"""
+        self.prewarmer.prewarm('web').result(2)
+        self.prewarmer.close()
+        self.connection.disconnect.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
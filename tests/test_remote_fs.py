@@ -0,0 +1,248 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+远程文件系统浏览模块单元测试
+
+测试目录列表缓存和预取，包括：
+1. 缓存命中、TTL过期和手动失效
+2. 后台预取子目录
+3. 同一目录的并发请求只获取一次
+4. 连接变化后重新打开SFTP会话
+5. 远程代理运行时改用代理列目录
+
+作者：Cursor Team
+版本：0.1.0
+"""
+
+import stat
+import threading
+import time
+import unittest
+from unittest.mock import Mock, patch
+import paramiko
+from src.remote_fs import RemoteFileSystem, RemoteEntry
+
+
+def make_attr(name, is_dir=False, size=0):
+    attr = paramiko.SFTPAttributes()
+    attr.filename = name
+    attr.st_mode = (stat.S_IFDIR | 0o755) if is_dir else (stat.S_IFREG | 0o644)
+    attr.st_size = size
+    attr.st_mtime = 1700000000
+    return attr
+
+
+class FakeSFTP:
+    """按路径返回预设目录内容的SFTP客户端"""
+
+    def __init__(self, tree, delay=0):
+        self.tree = tree
+        self.delay = delay
+        self.calls = []
+        self.channel = Mock(closed=False)
+
+    def listdir_iter(self, path, read_aheads=50):
+        self.calls.append(path)
+        time.sleep(self.delay)
+        if path not in self.tree:
+            raise IOError(2, 'No such file')
+        return iter(self.tree[path])
+
+    def lstat(self, path):
+        self.calls.append(('lstat', path))
+        return make_attr(path.rsplit('/', 1)[-1], size=7)
+
+    def stat(self, path):
+        self.calls.append(('stat', path))
+        return make_attr(path.rsplit('/', 1)[-1], is_dir=path in self.tree)
+
+    def get_channel(self):
+        return self.channel
+
+    def close(self):
+        self.channel.closed = True
+
+
+class TestRemoteFileSystem(unittest.TestCase):
+    """远程文件系统测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.tree = {
+            '/srv': [make_attr('b.txt', size=10), make_attr('logs', is_dir=True),
+                     make_attr('a.txt', size=5), make_attr('data', is_dir=True)],
+            '/srv/logs': [make_attr('app.log', size=100)],
+            '/srv/data': [],
+        }
+        self.sessions = []
+        self.ssh = Mock()
+        self.ssh.is_connected = True
+        self.ssh.client.open_sftp.side_effect = self._open_sftp
+        self.fs = RemoteFileSystem(self.ssh, ttl=30, prefetch_limit=0)
+
+    def tearDown(self):
+        """测试后清理"""
+        self.fs.close()
+
+    def _open_sftp(self):
+        sftp = FakeSFTP(self.tree)
+        self.sessions.append(sftp)
+        return sftp
+
+    def test_list_dir_sorted_and_cached(self):
+        """测试目录在前按名称排序，再次列出命中缓存"""
+        entries = self.fs.list_dir('/srv/')
+
+        self.assertEqual([entry.name for entry in entries], ['data', 'logs', 'a.txt', 'b.txt'])
+        self.assertTrue(entries[0].is_dir)
+        self.assertEqual(entries[2].size, 5)
+        self.assertIs(self.fs.list_dir('/srv'), entries)
+        self.assertEqual(self.sessions[0].calls, ['/srv'])
+        self.assertEqual((self.fs.hits, self.fs.misses), (1, 1))
+
+    def test_ttl_expiry(self):
+        """测试缓存过期后重新获取"""
+        with patch('src.remote_fs.time.monotonic', return_value=1000.0):
+            self.fs.list_dir('/srv')
+        with patch('src.remote_fs.time.monotonic', return_value=1020.0):
+            self.fs.list_dir('/srv')
+        self.assertEqual(len(self.sessions[0].calls), 1)
+        with patch('src.remote_fs.time.monotonic', return_value=1031.0):
+            self.fs.list_dir('/srv')
+        self.assertEqual(len(self.sessions[0].calls), 2)
+
+    def test_invalidate_and_refresh(self):
+        """测试手动失效和强制刷新"""
+        self.fs.list_dir('/srv')
+        self.fs.invalidate('/srv')
+        self.fs.list_dir('/srv')
+        self.fs.list_dir('/srv', refresh=True)
+        self.assertEqual(len(self.sessions[0].calls), 3)
+
+    def test_lru_eviction(self):
+        """测试超过缓存目录数时淘汰最久未使用的目录"""
+        self.fs.max_cached_dirs = 2
+        self.fs.list_dir('/srv')
+        self.fs.list_dir('/srv/logs')
+        self.fs.list_dir('/srv')
+        self.fs.list_dir('/srv/data')
+
+        self.fs.list_dir('/srv')
+        self.assertEqual(self.sessions[0].calls.count('/srv'), 1)
+        self.fs.list_dir('/srv/logs')
+        self.assertEqual(self.sessions[0].calls.count('/srv/logs'), 2)
+
+    def test_stat_uses_parent_cache(self):
+        """测试父目录已缓存时直接返回条目属性"""
+        self.fs.list_dir('/srv')
+        entry = self.fs.stat('/srv/b.txt')
+        self.assertEqual(entry, RemoteEntry('b.txt', 10, stat.S_IFREG | 0o644, 1700000000, False, False))
+        self.assertEqual(self.sessions[0].calls, ['/srv'])
+
+        self.assertEqual(self.fs.stat('/etc/hosts').size, 7)
+        self.assertIn(('lstat', '/etc/hosts'), self.sessions[0].calls)
+
+    def test_stat_follow_symlink(self):
+        """测试跟随符号链接时不使用父目录缓存，返回目标的类型"""
+        link = make_attr('logs-link')
+        link.st_mode = stat.S_IFLNK | 0o777
+        self.tree['/srv'].append(link)
+        self.tree['/srv/logs-link'] = self.tree['/srv/logs']
+        self.fs.list_dir('/srv')
+        self.assertTrue(self.fs.stat('/srv/logs-link').is_link)
+
+        target = self.fs.stat_async('/srv/logs-link', follow=True).result(2)
+        self.assertTrue(target.is_dir)
+        self.assertFalse(target.is_link)
+        self.assertFalse(self.fs.stat('/srv/a.txt', follow=True).is_dir)
+        self.assertEqual(self.sessions[0].calls,
+                         ['/srv', ('stat', '/srv/logs-link'), ('stat', '/srv/a.txt')])
+
+    def test_list_dir_error(self):
+        """测试目录不存在时报错"""
+        with self.assertRaises(Exception) as context:
+            self.fs.list_dir('/missing')
+        self.assertIn('无法列出目录 /missing', str(context.exception))
+
+    def test_not_connected(self):
+        """测试未连接时报错"""
+        self.ssh.is_connected = False
+        with self.assertRaises(Exception) as context:
+            self.fs.list_dir('/srv')
+        self.assertEqual(str(context.exception), '未连接到服务器')
+
+    def test_prefetch_children(self):
+        """测试打开目录后用独立会话预取子目录"""
+        self.fs.prefetch_limit = 16
+        self.fs.list_dir('/srv')
+
+        deadline = time.time() + 2
+        while self.fs.prefetched < 2 and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.fs.prefetched, 2)
+        self.assertEqual(len(self.sessions), 2)
+        self.assertEqual(sorted(self.sessions[1].calls), ['/srv/data', '/srv/logs'])
+
+        self.assertEqual([entry.name for entry in self.fs.list_dir('/srv/logs')], ['app.log'])
+        self.assertEqual(self.sessions[0].calls, ['/srv'])
+
+    def test_concurrent_list_fetches_once(self):
+        """测试同一目录的并发请求只获取一次"""
+        self.ssh.client.open_sftp.side_effect = None
+        sftp = FakeSFTP(self.tree, delay=0.1)
+        self.ssh.client.open_sftp.return_value = sftp
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self.fs.list_dir('/srv')))
+                   for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(results), 5)
+        self.assertEqual(sftp.calls, ['/srv'])
+
+    def test_list_dir_async(self):
+        """测试后台列出目录"""
+        future = self.fs.list_dir_async('/srv/logs')
+        self.assertEqual([entry.name for entry in future.result(2)], ['app.log'])
+
+    def test_reopen_after_reconnect(self):
+        """测试连接重建后重新打开SFTP会话"""
+        self.fs.list_dir('/srv')
+        self.ssh.client.get_transport.return_value = Mock()
+        self.fs.list_dir('/srv', refresh=True)
+
+        self.assertEqual(len(self.sessions), 2)
+        self.assertTrue(self.sessions[0].channel.closed)
+
+    def test_list_dir_via_agent(self):
+        """测试远程代理运行时用代理列目录和获取属性，不打开SFTP会话"""
+        agent = Mock(is_running=True)
+        agent.listdir.return_value = [
+            {'name': 'b.txt', 'mode': stat.S_IFREG | 0o644, 'size': 10, 'mtime': 1700000000.5},
+            {'name': 'logs', 'mode': stat.S_IFDIR | 0o755, 'size': 4096, 'mtime': 1700000000},
+            # 代理按跟随后的类型标记is_dir，条目类型以lstat的mode为准
+            {'name': 'current', 'mode': stat.S_IFLNK | 0o777, 'size': 4, 'mtime': 1700000000,
+             'is_dir': True},
+        ]
+        agent.stat.return_value = {'mode': stat.S_IFREG | 0o600, 'size': 7, 'mtime': 1700000000}
+        self.fs.agent = agent
+
+        entries = self.fs.list_dir('/srv')
+        self.assertEqual([entry.name for entry in entries], ['logs', 'b.txt', 'current'])
+        self.assertTrue(entries[2].is_link)
+        self.assertFalse(entries[2].is_dir)
+        self.assertEqual(entries[1].mtime, 1700000000)
+        self.assertEqual(self.fs.stat('/etc/shadow').size, 7)
+        agent.stat.assert_called_once_with('/etc/shadow', follow=False)
+        self.assertEqual(self.sessions, [])
+
+        agent.is_running = False
+        self.fs.list_dir('/srv', refresh=True)
+        self.assertEqual(self.sessions[0].calls, ['/srv'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -14,10 +14,21 @@ SSH连接模块单元测试
 版本：0.1.0
 """
 
+import gzip
+import os
+import socket
+import tempfile
+import threading
+import time
 import unittest
 from unittest.mock import Mock, patch
-from src.ssh import SSHConnection
+from src.metrics import LatencyStats, CONNECT_PHASES, COMMAND_PHASES
+from src.output import OutputFilter, RAW_BYTES_MARKER
+from src.ssh import (SSHConnection, STATE_DISCONNECTED, STATE_CONNECTED, STATE_FAILED,
+                     TRANSPORT_PROFILES, JumpHostPool, PrivateKeyCache,
+                     _prefer, _profile_transport_factory)
 import paramiko
+from benchmarks.server import LocalSSHServer
 
 class TestSSHConnection(unittest.TestCase):
     """SSH连接管理器测试类"""
@@ -78,7 +89,7 @@ class TestSSHConnection(unittest.TestCase):
         mock_client = Mock()
         mock_stdout = Mock()
         mock_stderr = Mock()
-        mock_stdout.read.return_value = b'command output'
+        mock_stdout.channel.recv.side_effect = [b'command output', b'']
         mock_stderr.read.return_value = b''
         mock_client.exec_command.return_value = (None, mock_stdout, mock_stderr)
         mock_ssh_client.return_value = mock_client
@@ -130,5 +141,573 @@ class TestSSHConnection(unittest.TestCase):
         self.ssh.disconnect()
         self.assertFalse(self.ssh.is_connected)
 
+    @patch('paramiko.SSHClient')
+    def test_is_connected_transport_inactive(self, mock_ssh_client):
+        """测试传输层失效时连接状态为未连接"""
+        mock_client = Mock()
+        mock_ssh_client.return_value = mock_client
+        self.ssh.connect(self.test_connection_info)
+
+        mock_client.get_transport.return_value.is_active.return_value = False
+        self.assertFalse(self.ssh.is_connected)
+
+        mock_client.get_transport.return_value = None
+        self.assertFalse(self.ssh.is_connected)
+
+    @patch('paramiko.SSHClient')
+    def test_connect_enables_keepalive(self, mock_ssh_client):
+        """测试连接成功后开启传输层保活"""
+        mock_client = Mock()
+        mock_ssh_client.return_value = mock_client
+        self.ssh.connect(self.test_connection_info)
+
+        mock_client.get_transport.return_value.set_keepalive.assert_called_once_with(
+            self.ssh.keepalive_interval
+        )
+
+    @patch('paramiko.SSHClient')
+    def test_auto_reconnect(self, mock_ssh_client):
+        """测试监控线程发现断线后自动重连并通知监听者"""
+        dead_client = Mock()
+        dead_client.get_transport.return_value.is_active.return_value = True
+        new_client = Mock()
+        mock_ssh_client.side_effect = [dead_client, new_client]
+
+        self.ssh = SSHConnection(keepalive_interval=0.05, reconnect_backoff=0.01)
+        states = []
+        reconnected = threading.Event()
+
+        def listener(state):
+            states.append(state)
+            if state == STATE_CONNECTED:
+                reconnected.set()
+
+        self.ssh.add_state_listener(listener)
+        self.ssh.connect(self.test_connection_info)
+        dead_client.get_transport.return_value.is_active.return_value = False
+
+        self.assertTrue(reconnected.wait(2))
+        self.assertEqual(states[0], STATE_DISCONNECTED)
+        self.assertIs(self.ssh.client, new_client)
+        self.assertTrue(self.ssh.is_connected)
+
+    @patch('paramiko.SSHClient')
+    def test_reconnect_gives_up(self, mock_ssh_client):
+        """测试重连次数用尽后放弃并通知失败"""
+        mock_client = Mock()
+        mock_ssh_client.return_value = mock_client
+        self.ssh = SSHConnection(keepalive_interval=0, max_reconnect_attempts=2,
+                                 reconnect_backoff=0.01)
+        states = []
+        self.ssh.add_state_listener(states.append)
+        self.ssh.connect(self.test_connection_info)
+
+        mock_client.connect.side_effect = OSError('Network is unreachable')
+        mock_client.get_transport.return_value.is_active.return_value = False
+
+        self.assertFalse(self.ssh.reconnect())
+        self.assertEqual(mock_client.connect.call_count, 3)
+        self.assertEqual(states[-1], STATE_FAILED)
+
+    @patch('paramiko.SSHClient')
+    def test_disconnect_during_reconnect(self, mock_ssh_client):
+        """测试重连过程中断开连接时，重连成功后不恢复会话"""
+        dead_client = Mock()
+        new_client = Mock()
+        mock_ssh_client.side_effect = [dead_client, new_client]
+        key_cache = Mock()
+        self.ssh = SSHConnection(keepalive_interval=0, reconnect_backoff=0.01, key_cache=key_cache)
+        states = []
+        self.ssh.add_state_listener(states.append)
+        self.ssh.connect(dict(self.test_connection_info, key_filename='id_rsa'))
+        dead_client.get_transport.return_value.is_active.return_value = False
+
+        # 用户在重连加载私钥期间点击断开，之后的握手和认证仍然成功
+        def disconnect_while_loading(path, passphrase):
+            self.ssh.disconnect()
+            return Mock()
+        key_cache.load.side_effect = disconnect_while_loading
+
+        self.assertFalse(self.ssh.reconnect())
+        new_client.connect.assert_called_once()
+        self.assertNotIn(STATE_CONNECTED, states)
+        self.assertIsNone(self.ssh.client)
+        self.assertFalse(self.ssh.is_connected)
+        new_client.close.assert_called()
+
+    @patch('paramiko.SSHClient')
+    def test_execute_command_retry_after_reconnect(self, mock_ssh_client):
+        """测试连接中断时幂等命令在重连后重试"""
+        dead_client = Mock()
+        dead_client.exec_command.side_effect = EOFError()
+        new_client = Mock()
+        mock_stdout = Mock()
+        mock_stdout.channel.recv.side_effect = [b'uptime output', b'']
+        mock_stdout.channel.recv_exit_status.return_value = 0
+        mock_stderr = Mock()
+        mock_stderr.read.return_value = b''
+        new_client.exec_command.return_value = (None, mock_stdout, mock_stderr)
+        mock_ssh_client.side_effect = [dead_client, new_client]
+
+        self.ssh = SSHConnection(keepalive_interval=0, reconnect_backoff=0.01)
+        self.ssh.connect(self.test_connection_info)
+
+        def drop_connection(*args, **kwargs):
+            dead_client.get_transport.return_value.is_active.return_value = False
+            raise EOFError()
+
+        dead_client.exec_command.side_effect = drop_connection
+
+        output, error = self.ssh.execute_command('uptime', retry=True)
+        self.assertEqual(output, 'uptime output')
+        self.assertIs(self.ssh.client, new_client)
+
+    @patch('paramiko.SSHClient')
+    def test_phase_timings_recorded(self, mock_ssh_client):
+        """测试连接和命令各阶段的耗时写入延迟统计"""
+        mock_client = Mock()
+        mock_stdout = Mock()
+        mock_stdout.channel.recv.side_effect = [b'load', b' average', b'']
+        mock_stdout.channel.recv_exit_status.return_value = 0
+        mock_stderr = Mock()
+        mock_stderr.read.return_value = b''
+        mock_client.exec_command.return_value = (None, mock_stdout, mock_stderr)
+        mock_ssh_client.return_value = mock_client
+        stats = LatencyStats()
+
+        self.ssh = SSHConnection(keepalive_interval=0, auto_reconnect=False, latency_stats=stats)
+        self.ssh.connect(self.test_connection_info)
+        output, _ = self.ssh.execute_command('uptime')
+
+        self.assertEqual(output, 'load average')
+        self.assertEqual(set(self.ssh.last_command_timings), set(COMMAND_PHASES))
+        host_stats = stats.get_stats()['192.168.1.100']
+        self.assertIn('connect_total', host_stats)
+        self.assertTrue(set(host_stats) <= set(CONNECT_PHASES) | set(COMMAND_PHASES))
+        self.assertEqual(host_stats['command_total']['count'], 1)
+
+    @patch('paramiko.SSHClient')
+    def test_disconnect_during_command(self, mock_ssh_client):
+        """测试命令执行期间其他线程断开连接时，已完成的命令仍正常返回并记录耗时"""
+        mock_client = Mock()
+        mock_stdout = Mock()
+        mock_stdout.channel.recv_exit_status.return_value = 0
+        mock_stderr = Mock()
+        mock_stderr.read.return_value = b''
+        mock_client.exec_command.return_value = (None, mock_stdout, mock_stderr)
+        mock_ssh_client.return_value = mock_client
+        stats = LatencyStats()
+        self.ssh = SSHConnection(keepalive_interval=0, auto_reconnect=False, latency_stats=stats)
+        self.ssh.connect(self.test_connection_info)
+
+        def recv(size):
+            if mock_stdout.channel.recv.call_count == 1:
+                return b'done'
+            self.ssh.disconnect()
+            return b''
+        mock_stdout.channel.recv.side_effect = recv
+
+        output, _ = self.ssh.execute_command('uptime')
+        self.assertEqual(output, 'done')
+        self.assertEqual(stats.get_stats()['192.168.1.100']['command_total']['count'], 1)
+
+    @patch('paramiko.SSHClient')
+    def test_execute_command_decodes_with_host_encoding(self, mock_ssh_client):
+        """测试按主机编码解码被拆分的多字节字符，无法解码的字节不再报错"""
+        data = '磁盘空间不足'.encode('gbk') + b'\xff'
+        mock_client = Mock()
+        mock_stdout = Mock()
+        mock_stdout.channel.recv.side_effect = [data[:3], data[3:7], data[7:], b'']
+        mock_stdout.channel.recv_exit_status.return_value = 0
+        mock_stderr = Mock()
+        mock_stderr.read.return_value = b''
+        mock_client.exec_command.return_value = (None, mock_stdout, mock_stderr)
+        mock_ssh_client.return_value = mock_client
+
+        self.ssh = SSHConnection(keepalive_interval=0)
+        self.ssh.connect(dict(self.test_connection_info, encoding='gbk'))
+        output, error = self.ssh.execute_command('df')
+
+        self.assertEqual(output, '磁盘空间不足\ufffd')
+        self.assertEqual(error, '')
+
+        mock_stdout.channel.recv.side_effect = [data[:5], data[5:], b'']
+        raw, _ = self.ssh.execute_command_raw('df')
+        self.assertEqual(raw.tobytes(), data)
+
+    @patch('paramiko.SSHClient')
+    def test_execute_command_with_output_filter(self, mock_ssh_client):
+        """测试远程过滤时不分配伪终端，本地解压并记录传输字节数"""
+        compressed = gzip.compress(b'error: disk full\n')
+        mock_client = Mock()
+        mock_stdout = Mock()
+        mock_stdout.channel.recv.side_effect = [compressed[:8], compressed[8:], b'']
+        mock_stdout.channel.recv_exit_status.return_value = 0
+        mock_stdout.channel.recv_stderr.side_effect = [RAW_BYTES_MARKER + b' 52428800\n', b'']
+        mock_client.exec_command.return_value = (None, mock_stdout, Mock())
+        mock_ssh_client.return_value = mock_client
+
+        self.ssh = SSHConnection(keepalive_interval=0)
+        self.ssh.connect(self.test_connection_info)
+        output_filter = OutputFilter(grep='error', compress=True)
+        output, error = self.ssh.execute_command('journalctl', output_filter=output_filter)
+
+        self.assertEqual(output, 'error: disk full\n')
+        self.assertEqual(error, '')
+        args, kwargs = mock_client.exec_command.call_args
+        self.assertEqual(args[0], output_filter.wrap('journalctl'))
+        self.assertFalse(kwargs['get_pty'])
+        self.assertEqual(self.ssh.last_transfer_stats, {
+            'raw_bytes': 52428800, 'output_bytes': 17, 'wire_bytes': len(compressed)})
+
+    def test_connect_unknown_encoding(self):
+        """测试连接信息中的编码不存在"""
+        with self.assertRaises(Exception) as context:
+            self.ssh.connect(dict(self.test_connection_info, encoding='no-such-codec'))
+        self.assertEqual(str(context.exception), '不支持的编码: no-such-codec')
+
+    @patch('paramiko.SSHClient')
+    def test_connect_pins_saved_host_key(self, mock_ssh_client):
+        """测试连接信息带主机密钥时加入客户端的已知主机"""
+        mock_client = Mock()
+        mock_ssh_client.return_value = mock_client
+        key = paramiko.RSAKey.generate(1024)
+
+        self.ssh = SSHConnection(keepalive_interval=0)
+        self.ssh.connect(dict(self.test_connection_info, port=2222,
+                              host_key=f'{key.get_name()} {key.get_base64()}'))
+
+        hostname, key_type, pinned = mock_client.get_host_keys.return_value.add.call_args.args
+        self.assertEqual(hostname, '[192.168.1.100]:2222')
+        self.assertEqual(key_type, 'ssh-rsa')
+        self.assertEqual(pinned.get_base64(), key.get_base64())
+
+    @patch('paramiko.SSHClient')
+    def test_adopt_prewarmed_connection(self, mock_ssh_client):
+        """测试接管预热连接后由本实例持有会话"""
+        mock_client = Mock()
+        mock_ssh_client.return_value = mock_client
+        warm = SSHConnection(keepalive_interval=0, auto_reconnect=False)
+        warm.connect(self.test_connection_info)
+
+        self.ssh = SSHConnection(keepalive_interval=0)
+        self.ssh.adopt(warm)
+
+        self.assertIs(self.ssh.client, mock_client)
+        self.assertIsNone(warm.client)
+        self.assertTrue(self.ssh.is_connected)
+        self.assertEqual(self.ssh._connection_info, self.test_connection_info)
+        with self.assertRaises(Exception) as context:
+            SSHConnection().adopt(warm)
+        self.assertEqual(str(context.exception), '预热的连接已断开')
+
+    @patch('paramiko.SSHClient')
+    def test_execute_command_no_retry_by_default(self, mock_ssh_client):
+        """测试默认情况下连接中断不重试命令"""
+        mock_client = Mock()
+        mock_ssh_client.return_value = mock_client
+        self.ssh = SSHConnection(keepalive_interval=0)
+        self.ssh.connect(self.test_connection_info)
+
+        def drop_connection(*args, **kwargs):
+            mock_client.get_transport.return_value.is_active.return_value = False
+            raise EOFError()
+
+        mock_client.exec_command.side_effect = drop_connection
+        with self.assertRaises(Exception):
+            self.ssh.execute_command('uptime')
+        self.assertEqual(mock_client.exec_command.call_count, 1)
+
+    @patch('paramiko.SSHClient')
+    def test_connect_with_profile(self, mock_ssh_client):
+        """测试按传输配置档设置压缩和端口"""
+        mock_client = Mock()
+        mock_ssh_client.return_value = mock_client
+        info = dict(self.test_connection_info, profile='low_bandwidth', port=2222)
+
+        self.ssh.connect(info)
+
+        kwargs = mock_client.connect.call_args.kwargs
+        self.assertTrue(kwargs['compress'])
+        self.assertEqual(kwargs['port'], 2222)
+        self.assertTrue(callable(kwargs['transport_factory']))
+
+    def test_connect_unknown_profile(self):
+        """测试未知传输配置档直接报错"""
+        info = dict(self.test_connection_info, profile='satellite')
+        with self.assertRaises(Exception) as context:
+            self.ssh.connect(info)
+        self.assertEqual(str(context.exception), '未知的传输配置: satellite')
+
+    def test_prefer_algorithms(self):
+        """测试偏好算法排序及未知算法过滤"""
+        available = ('aes128-ctr', 'aes256-ctr', 'aes128-gcm@openssh.com')
+        result = _prefer(available, ('aes128-gcm@openssh.com', 'chacha20-unknown'))
+        self.assertEqual(result, ('aes128-gcm@openssh.com', 'aes128-ctr', 'aes256-ctr'))
+
+    def test_profile_transport_factory(self):
+        """测试传输工厂按配置档设置窗口和包长"""
+        profile = TRANSPORT_PROFILES['wan']
+        local, remote = socket.socketpair()
+        try:
+            transport = _profile_transport_factory(profile)(local)
+            self.assertEqual(transport.default_window_size, profile['window_size'])
+            self.assertEqual(transport.default_max_packet_size, profile['max_packet_size'])
+            self.assertEqual(transport.get_security_options().ciphers[0], profile['ciphers'][0])
+            transport.close()
+        finally:
+            local.close()
+            remote.close()
+
+    @patch('paramiko.SSHClient')
+    def test_connect_via_shared_jump_host(self, mock_ssh_client):
+        """测试多个目标主机共享同一个跳板机连接"""
+        bastion_client = Mock()
+        target_clients = [Mock(), Mock()]
+        mock_ssh_client.side_effect = [bastion_client] + target_clients
+        bastion_transport = bastion_client.get_transport.return_value
+        channels = [Mock(), Mock()]
+        bastion_transport.open_channel.side_effect = channels
+
+        pool = JumpHostPool()
+        jump_info = {'ip': '10.0.0.1', 'username': 'jump', 'password': 'jump_password'}
+        connections = []
+        for host, client in zip(('192.168.1.101', '192.168.1.102'), target_clients):
+            ssh = SSHConnection(keepalive_interval=0, jump_pool=pool)
+            ssh.connect(dict(self.test_connection_info, ip=host, jump_host=jump_info))
+            self.assertIs(client.connect.call_args.kwargs['sock'], channels[len(connections)])
+            connections.append(ssh)
+
+        bastion_client.connect.assert_called_once()
+        bastion_transport.open_channel.assert_any_call(
+            'direct-tcpip', ('192.168.1.102', 22), ('127.0.0.1', 0), timeout=30
+        )
+
+        connections[0].disconnect()
+        bastion_client.close.assert_not_called()
+        connections[1].disconnect()
+        bastion_client.close.assert_called_once()
+        self.assertEqual(len(pool), 0)
+
+    @patch('paramiko.SSHClient')
+    def test_jump_host_released_on_failure(self, mock_ssh_client):
+        """测试目标连接失败时释放跳板机引用"""
+        bastion_client = Mock()
+        target_client = Mock()
+        target_client.connect.side_effect = paramiko.AuthenticationException()
+        mock_ssh_client.side_effect = [bastion_client, target_client]
+
+        pool = JumpHostPool()
+        self.ssh = SSHConnection(keepalive_interval=0, jump_pool=pool)
+        jump_info = {'ip': '10.0.0.1', 'username': 'jump', 'password': 'jump_password'}
+        with self.assertRaises(Exception):
+            self.ssh.connect(dict(self.test_connection_info, jump_host=jump_info))
+
+        self.assertEqual(len(pool), 0)
+        bastion_client.close.assert_called_once()
+        bastion_client.get_transport.return_value.open_channel.return_value.close.assert_called_once()
+        target_client.close.assert_called_once()
+
+    @patch('paramiko.SSHClient')
+    def test_failed_target_closes_channel_on_shared_jump_host(self, mock_ssh_client):
+        """测试跳板机被其他连接共享时，目标连接失败也关闭direct-tcpip通道"""
+        bastion_client = Mock()
+        target_clients = [Mock(), Mock()]
+        target_clients[1].connect.side_effect = paramiko.SSHException('Error reading SSH protocol banner')
+        mock_ssh_client.side_effect = [bastion_client] + target_clients
+        channels = [Mock(), Mock()]
+        bastion_client.get_transport.return_value.open_channel.side_effect = channels
+
+        pool = JumpHostPool()
+        jump_info = {'ip': '10.0.0.1', 'username': 'jump', 'password': 'jump_password'}
+        self.ssh = SSHConnection(keepalive_interval=0, jump_pool=pool)
+        self.ssh.connect(dict(self.test_connection_info, jump_host=jump_info))
+        failed = SSHConnection(keepalive_interval=0, jump_pool=pool)
+        with self.assertRaises(Exception):
+            failed.connect(dict(self.test_connection_info, ip='192.168.1.102', jump_host=jump_info))
+
+        channels[1].close.assert_called_once()
+        channels[0].close.assert_not_called()
+        bastion_client.close.assert_not_called()
+        self.assertEqual(len(pool), 1)
+
+    @patch('paramiko.SSHClient')
+    def test_dead_jump_host_closed_before_redial(self, mock_ssh_client):
+        """测试跳板机断开后先关闭旧连接再重新登录"""
+        dead_bastion = Mock()
+        new_bastion = Mock()
+        mock_ssh_client.side_effect = [dead_bastion, new_bastion]
+
+        pool = JumpHostPool()
+        jump_info = {'ip': '10.0.0.1', 'username': 'jump', 'password': 'jump_password'}
+        pool.acquire(jump_info)
+        pool.open_channel(jump_info, ('192.168.1.101', 22))
+        dead_bastion.get_transport.return_value.is_active.return_value = False
+
+        pool.open_channel(jump_info, ('192.168.1.101', 22))
+        dead_bastion.close.assert_called_once()
+        new_bastion.get_transport.return_value.open_channel.assert_called_once()
+        pool.release(jump_info)
+
+    @patch('paramiko.SSHClient')
+    def test_connect_with_key_and_agent(self, mock_ssh_client):
+        """测试私钥和ssh-agent认证参数"""
+        mock_client = Mock()
+        mock_ssh_client.return_value = mock_client
+        key_cache = Mock()
+        self.ssh = SSHConnection(keepalive_interval=0, key_cache=key_cache)
+        info = {
+            'ip': '192.168.1.100',
+            'username': 'test_user',
+            'key_filename': '~/.ssh/id_ed25519',
+            'passphrase': 'secret',
+            'use_agent': True
+        }
+
+        self.ssh.connect(info)
+
+        key_cache.load.assert_called_once_with('~/.ssh/id_ed25519', 'secret')
+        kwargs = mock_client.connect.call_args.kwargs
+        self.assertIs(kwargs['pkey'], key_cache.load.return_value)
+        self.assertIsNone(kwargs['password'])
+        self.assertTrue(kwargs['allow_agent'])
+        self.assertFalse(kwargs['look_for_keys'])
+
+    def test_output_filter_reads_stderr_concurrently(self):
+        """测试远程过滤时大量标准错误不会阻塞命令"""
+        server = LocalSSHServer().start()
+        self.addCleanup(server.stop)
+        self.ssh = SSHConnection(keepalive_interval=0, auto_reconnect=False)
+        self.ssh.connect(server.connection_info())
+
+        output, error = self.ssh.execute_command('head -c 8000000 /dev/zero >&2; echo done', timeout=10,
+                                                 output_filter=OutputFilter(grep='done'))
+        self.assertEqual(output, 'done\n')
+        self.assertEqual(len(error), 8000000)
+
+    def test_output_filter_timeout(self):
+        """测试远程过滤长时间没有输出时按timeout参数判断超时"""
+        server = LocalSSHServer().start()
+        self.addCleanup(server.stop)
+        self.ssh = SSHConnection(keepalive_interval=0, auto_reconnect=False)
+        self.ssh.connect(server.connection_info())
+        command = 'sleep 1; echo rare; echo common'
+
+        with self.assertRaises(Exception) as context:
+            self.ssh.execute_command(command, timeout=0.3, output_filter=OutputFilter(grep='rare'))
+        self.assertEqual(str(context.exception), '命令执行超时，请检查命令是否正确或网络状态')
+        output, _ = self.ssh.execute_command(command, timeout=5, output_filter=OutputFilter(grep='rare'))
+        self.assertEqual(output, 'rare\n')
+
+    def test_key_load_not_counted_as_tcp_connect(self):
+        """测试私钥解密计为key_load阶段，不计入tcp_connect"""
+        key = paramiko.RSAKey.generate(1024)
+        server = LocalSSHServer(authorized_keys=[key]).start()
+        self.addCleanup(server.stop)
+
+        def slow_load(path, passphrase):
+            time.sleep(0.3)
+            return key
+        key_cache = Mock()
+        key_cache.load.side_effect = slow_load
+        self.ssh = SSHConnection(keepalive_interval=0, auto_reconnect=False, key_cache=key_cache,
+                                 latency_stats=LatencyStats())
+        info = server.connection_info(password='', key_filename='id_rsa', passphrase='secret')
+        self.ssh.connect(info)
+
+        timings = self.ssh.last_connect_timings
+        self.assertGreaterEqual(timings['key_load'], 0.3)
+        self.assertLess(timings['tcp_connect'], 0.3)
+        self.assertGreaterEqual(timings['connect_total'], timings['key_load'] + timings['tcp_connect'])
+        self.assertTrue(set(timings) <= set(CONNECT_PHASES))
+
+    @patch('paramiko.SSHClient')
+    def test_connect_password_only_disables_agent(self, mock_ssh_client):
+        """测试仅提供密码时不使用私钥和ssh-agent"""
+        mock_client = Mock()
+        mock_ssh_client.return_value = mock_client
+        self.ssh.connect(self.test_connection_info)
+
+        kwargs = mock_client.connect.call_args.kwargs
+        self.assertIsNone(kwargs['pkey'])
+        self.assertFalse(kwargs['allow_agent'])
+
+
+class TestPrivateKeyCache(unittest.TestCase):
+    """私钥缓存测试类"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.key = paramiko.RSAKey.generate(1024)
+
+    def setUp(self):
+        """测试前准备"""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'id_rsa')
+        self.key.write_private_key_file(self.path, password='secret')
+        self.cache = PrivateKeyCache()
+
+    def tearDown(self):
+        """测试后清理"""
+        self.tmpdir.cleanup()
+
+    def test_decrypts_once(self):
+        """测试同一私钥只解密一次"""
+        first = self.cache.load(self.path, 'secret')
+        second = self.cache.load(self.path, 'secret')
+
+        self.assertIs(first, second)
+        self.assertEqual(first.get_fingerprint(), self.key.get_fingerprint())
+        self.assertEqual((self.cache.misses, self.cache.hits), (1, 1))
+
+    def test_concurrent_loads_decrypt_once(self):
+        """测试并发加载同一私钥时只解密一次"""
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self.cache.load(self.path, 'secret')))
+                   for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len({id(key) for key in results}), 1)
+        self.assertEqual(self.cache.misses, 1)
+
+    def test_reload_after_file_changes(self):
+        """测试私钥文件修改后缓存失效"""
+        first = self.cache.load(self.path, 'secret')
+        stat = os.stat(self.path)
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000000))
+
+        second = self.cache.load(self.path, 'secret')
+        self.assertIsNot(first, second)
+        self.assertEqual(self.cache.misses, 2)
+
+    def test_cached_key_requires_same_passphrase(self):
+        """测试命中缓存时错误或缺少的密码短语被拒绝"""
+        first = self.cache.load(self.path, 'secret')
+
+        with self.assertRaises(Exception) as context:
+            self.cache.load(self.path, 'WRONG')
+        self.assertIn('无法加载私钥', str(context.exception))
+        with self.assertRaises(Exception) as context:
+            self.cache.load(self.path)
+        self.assertEqual(str(context.exception), '私钥已加密，请提供密码短语')
+
+        self.assertIs(self.cache.load(self.path, 'secret'), first)
+        self.assertEqual((self.cache.misses, self.cache.hits), (3, 1))
+
+    def test_missing_passphrase(self):
+        """测试加密私钥缺少密码短语时报错"""
+        with self.assertRaises(Exception) as context:
+            self.cache.load(self.path)
+        self.assertEqual(str(context.exception), '私钥已加密，请提供密码短语')
+
+    def test_missing_file(self):
+        """测试私钥文件不存在时报错"""
+        with self.assertRaises(Exception) as context:
+            self.cache.load(os.path.join(self.tmpdir.name, 'missing'))
+        self.assertIn('无法读取私钥文件', str(context.exception))
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
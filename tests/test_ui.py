@@ -17,7 +17,7 @@
 import unittest
 from unittest.mock import Mock, patch
 import tkinter as tk
-from src.ui import RemoteControlUI
+from src.ui import RemoteControlUI, VirtualListView
 
 class TestRemoteControlUI(unittest.TestCase):
     """用户界面测试类"""
@@ -70,6 +70,23 @@ class TestRemoteControlUI(unittest.TestCase):
             'password': 'test_password'
         })
     
+    def test_connect_with_key_file(self):
+        """测试填写私钥和勾选ssh-agent时的连接信息"""
+        self.ui.ip_entry.insert(0, '192.168.1.100')
+        self.ui.username_entry.insert(0, 'test_user')
+        self.ui.key_entry.insert(0, '/home/test/.ssh/id_ed25519')
+        self.ui.use_agent_var.set(True)
+
+        self.ui.connect_btn.invoke()
+
+        self.mock_on_connect.assert_called_once_with({
+            'ip': '192.168.1.100',
+            'username': 'test_user',
+            'password': '',
+            'key_filename': '/home/test/.ssh/id_ed25519',
+            'use_agent': True
+        })
+    
     def test_disconnect_button_click(self):
         """测试断开连接按钮点击事件"""
         # 先设置按钮为已连接状态
@@ -108,6 +125,160 @@ class TestRemoteControlUI(unittest.TestCase):
         output_text = self.ui.output_text.get('1.0', tk.END).strip()
         self.assertEqual(output_text, test_output)
     
+    def test_set_connection_state(self):
+        """测试连接状态事件更新界面"""
+        self.ui.set_connection_state('reconnecting')
+        self.assertEqual(self.ui.status_label['text'], '正在重连...')
+
+        self.ui.set_connection_state('connected')
+        self.assertEqual(self.ui.status_label['text'], '已连接')
+        self.assertEqual(self.ui.connect_btn['text'], '断开')
+
+        self.ui.set_connection_state('failed')
+        self.assertEqual(self.ui.connect_btn['text'], '连接')
+
+    def test_update_tunnels(self):
+        """测试端口转发列表显示字节计数"""
+        tunnel = {
+            'id': 1, 'kind': 'local', 'bind': '127.0.0.1:15432', 'target': 'db:5432',
+            'bytes_sent': 2048, 'bytes_received': 5 * 1024 * 1024,
+            'active_connections': 1, 'total_connections': 3
+        }
+        self.ui.update_tunnels([tunnel])
+        values = self.ui.tunnel_tree.item('1', 'values')
+        self.assertEqual(values[3], '1/3')
+        self.assertEqual(values[4], '2.0 KB')
+        self.assertEqual(values[5], '5.0 MB')
+
+        self.ui.update_tunnels([])
+        self.assertEqual(self.ui.tunnel_tree.get_children(), ())
+
+    def test_stats_window(self):
+        """测试延迟统计窗口按毫秒显示各阶段统计"""
+        summary = {'count': 4, 'mean': 0.0125, 'min': 0.01, 'max': 0.02,
+                   'p50': 0.012, 'p95': 0.019, 'p99': 0.02}
+        self.ui.on_request_stats = Mock(return_value={'10.0.0.1': {'kex': summary}})
+
+        self.ui.stats_btn.invoke()
+
+        rows = self.ui.stats_tree.get_children()
+        self.assertEqual(len(rows), 1)
+        values = self.ui.stats_tree.item(rows[0], 'values')
+        self.assertEqual(list(values), ['10.0.0.1', 'kex', '4', '12.5', '12.0', '19.0', '20.0'])
+
+    def test_profiler_toggle(self):
+        """测试性能分析开关按当前状态回调"""
+        on_toggle_profiler = Mock()
+        self.ui.on_toggle_profiler = on_toggle_profiler
+
+        self.ui.profile_btn.invoke()
+        on_toggle_profiler.assert_called_with(True)
+
+        self.ui.set_profiling(True)
+        self.assertEqual(self.ui.profile_btn.cget('text'), '停止分析')
+        self.ui.profile_btn.invoke()
+        on_toggle_profiler.assert_called_with(False)
+
+    def test_virtual_list_renders_visible_rows(self):
+        """测试虚拟列表只渲染一屏的行"""
+        activated = Mock()
+        view = VirtualListView(self.root, columns=('name',), headings=('名称',), widths=(100,),
+                               format_row=lambda item: (item,), on_activate=activated, height=10)
+        view.set_items([f'file{index:06d}' for index in range(100000)])
+
+        self.assertEqual(len(view.tree.get_children()), 10)
+        view.scroll_to(50000)
+        first = view.tree.get_children()[0]
+        self.assertEqual(view.tree.item(first, 'values'), ('file050000',))
+
+        view._move_selection(1)
+        self.assertEqual(view.get_selected(), 'file050000')
+        view._activate()
+        activated.assert_called_once_with('file050000')
+
+        view.scroll_to(10 ** 9)
+        self.assertEqual(view.offset, 100000 - 10)
+
+    def test_browse_remote_directory(self):
+        """测试文件浏览窗口显示列表并忽略过期的结果"""
+        entry = Mock(is_dir=True, is_link=False, size=4096, mtime=0, mode=0o40755)
+        entry.name = 'log'
+        requests = []
+        self.ui.on_list_dir = lambda path, refresh, done: requests.append((path, done))
+
+        self.ui.open_browser_window()
+        self.ui.browse('/var')
+        requests[0][1]('/', [], None)
+        self.assertEqual(self.ui.browser_list.items, [])
+        requests[1][1]('/var', [entry], None)
+
+        self.assertEqual(self.ui.browser_path, '/var')
+        self.assertEqual(self.ui.browser_list.items, [entry])
+        self.ui._handle_browse_entry(entry)
+        self.assertEqual(requests[-1][0], '/var/log')
+
+    def test_browse_symlink(self):
+        """测试符号链接先解析目标，只有指向目录时才进入"""
+        requests = []
+        stats = []
+        self.ui.on_list_dir = lambda path, refresh, done: requests.append((path, done))
+        self.ui.on_stat_path = lambda path, done: stats.append((path, done))
+        self.ui.open_browser_window()
+        requests[0][1]('/', [], None)
+        link = Mock(is_dir=False, is_link=True)
+        link.name = 'vmlinuz'
+
+        self.ui._handle_browse_entry(link)
+        self.assertEqual(stats[0][0], '/vmlinuz')
+        stats[0][1]('/vmlinuz', Mock(is_dir=False), None)
+        self.assertEqual(len(requests), 1)
+        self.assertEqual(self.ui.browser_status_label.cget('text'), '/vmlinuz 不是目录')
+
+        self.ui._handle_browse_entry(link)
+        stats[1][1]('/vmlinuz', Mock(is_dir=True), None)
+        self.assertEqual(requests[-1][0], '/vmlinuz')
+
+    def test_select_profile_fills_connection(self):
+        """测试选择连接配置后填充输入框，连接时带上配置中的其他字段"""
+        self.ui.on_select_profile = Mock(return_value={
+            'ip': '10.0.0.1', 'username': 'root', 'password': 'secret',
+            'port': 2222, 'host_key': 'ssh-ed25519 AAAA', 'prewarm': True, 'encoding': 'gbk',
+            'remote_agent': True
+        })
+        self.ui.set_profiles(['web'])
+        self.ui.profile_combo.set('web')
+
+        self.ui._handle_select_profile()
+        self.ui.connect_btn.invoke()
+
+        self.assertTrue(self.ui.prewarm_var.get())
+        self.mock_on_connect.assert_called_once_with({
+            'ip': '10.0.0.1',
+            'username': 'root',
+            'password': 'secret',
+            'port': 2222,
+            'host_key': 'ssh-ed25519 AAAA',
+            'remote_agent': True,
+            'encoding': 'gbk'
+        })
+
+    def test_add_tunnel_button_click(self):
+        """测试添加端口转发按钮点击事件"""
+        on_add_tunnel = Mock()
+        self.ui.on_add_tunnel = on_add_tunnel
+        self.ui.tunnel_bind_port_entry.insert(0, '15432')
+        self.ui.tunnel_target_host_entry.insert(0, 'db.internal')
+        self.ui.tunnel_target_port_entry.insert(0, '5432')
+
+        self.ui.add_tunnel_btn.invoke()
+
+        on_add_tunnel.assert_called_once_with({
+            'kind': 'local',
+            'bind_port': 15432,
+            'target_host': 'db.internal',
+            'target_port': 5432
+        })
+
     @patch('tkinter.messagebox.showerror')
     def test_show_error(self, mock_showerror):
         """测试错误提示功能"""
@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+界面卡顿监测模块单元测试
+
+测试事件循环看门狗和采样分析器，包括：
+1. 卡顿时抓取主线程调用栈和回调名称
+2. 心跳恢复后记录卡顿时长
+3. 采样分析器生成折叠栈报告
+
+作者：Cursor Team
+版本：0.1.0
+"""
+
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import Mock
+from src.watchdog import EventLoopWatchdog, SamplingProfiler
+
+
+def append_output(text):
+    """模拟阻塞主线程的界面回调"""
+    time.sleep(0.3)
+
+
+def busy_loop(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+class TestEventLoopWatchdog(unittest.TestCase):
+    """事件循环看门狗测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.root = Mock()
+        self.watchdog = EventLoopWatchdog(self.root, interval=0.02, threshold=0.1)
+
+    def tearDown(self):
+        """测试后清理"""
+        self.watchdog.stop()
+
+    def test_track_nested_callbacks(self):
+        """测试嵌套回调名称按调用顺序连接"""
+        seen = []
+
+        @self.watchdog.track
+        def _handle_send_command():
+            self.watchdog.track(lambda: seen.append(self.watchdog.current_callback),
+                                name='append_output')()
+
+        _handle_send_command()
+
+        self.assertEqual(seen, ['_handle_send_command > append_output'])
+        self.assertIsNone(self.watchdog.current_callback)
+
+    def test_stall_captures_stack_and_callback(self):
+        """测试卡顿时记录主线程调用栈和正在执行的回调"""
+        self.watchdog.start()
+        self.root.after.assert_called_once()
+
+        self.watchdog.track(append_output)('x' * 10)
+
+        self.assertEqual(len(self.watchdog.stalls), 1)
+        stall = self.watchdog.stalls[0]
+        self.assertEqual(stall['callback'], 'append_output')
+        self.assertIn('in append_output', stall['stack'])
+        self.assertIsNone(stall['duration'])
+
+        self.watchdog._tick()
+        self.assertGreaterEqual(stall['duration'], 0.3)
+        self.assertGreaterEqual(self.watchdog.max_lag, 0.25)
+
+    def test_no_stall_below_threshold(self):
+        """测试调度延迟低于阈值时不报告"""
+        self.watchdog._tick()
+        self.watchdog._check()
+        self.assertEqual(len(self.watchdog.stalls), 0)
+
+    def test_stop_cancels_heartbeat(self):
+        """测试停止后取消心跳"""
+        self.watchdog.start()
+        self.watchdog.stop()
+        self.root.after_cancel.assert_called_once_with(self.root.after.return_value)
+
+
+class TestSamplingProfiler(unittest.TestCase):
+    """采样分析器测试类"""
+
+    def test_collapsed_report(self):
+        """测试采样结果包含热点函数并写入折叠栈文件"""
+        profiler = SamplingProfiler(interval=0.002)
+        finished = Mock()
+        profiler.start(0.2, on_finish=finished)
+        busy_loop(0.3)
+        profiler.wait(1)
+
+        self.assertFalse(profiler.is_running)
+        finished.assert_called_once_with(profiler)
+        self.assertGreater(profiler.sample_count, 10)
+        top_label, top_count = profiler.top_functions(1)[0]
+        self.assertEqual(top_count, profiler.sample_count)
+        busy = sum(count for stack, count in profiler.samples.items() if ';busy_loop (' in stack)
+        self.assertGreater(busy, profiler.sample_count / 2)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = profiler.save(directory)
+            with open(path, encoding='utf-8') as f:
+                lines = f.read().splitlines()
+        self.assertTrue(os.path.basename(path).endswith('.folded'))
+        stack, count = lines[0].rsplit(' ', 1)
+        self.assertIn(';busy_loop (test_watchdog.py:', stack)
+        self.assertEqual(int(count), max(profiler.samples.values()))
+        self.assertEqual(sum(int(line.rsplit(' ', 1)[1]) for line in lines), profiler.sample_count)
+
+    def test_stop_early(self):
+        """测试提前停止采样"""
+        profiler = SamplingProfiler(interval=0.002)
+        profiler.start(10)
+        with self.assertRaises(Exception):
+            profiler.start(10)
+        profiler.stop()
+        profiler.wait(1)
+        self.assertFalse(profiler.is_running)
+
+
+if __name__ == '__main__':
+    unittest.main()